@@ -163,7 +163,7 @@ export default function Navbar({ onSearch, formData, setFormData }) {
             const response = await axios.get(`${config.API_BASE_URL}/api/produit/search-products/`, {
                 params: { q: query, categories: selectedCategories }
             });
-            setSuggestions(response.data);
+            setSuggestions(response.data.results);
         } catch (error) {
             console.error('Erreur lors de la récupération des suggestions:', error);
         }
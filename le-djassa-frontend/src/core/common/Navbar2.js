@@ -24,6 +24,8 @@ const Navbar2 = () => {
   const [categoryImages, setCategoryImages] = useState({});
   const [selectedCategory, setSelectedCategory] = useState(null);
   const [categoryItems, setCategoryItems] = useState([]);
+  // URL de la page suivante de la catégorie (curseur), null quand tout est chargé
+  const [categoryNextPage, setCategoryNextPage] = useState(null);
   const toast = useRef(null);
 
   const showError = (message) => {
@@ -32,11 +34,12 @@ const Navbar2 = () => {
 
   const fetchCategoryImages = useCallback(() => {
     const fetchPromises = categories.map(category =>
-      fetch(`${config.API_BASE_URL}/api/produit/?category=${category.query}`)
+      // Une seule annonce suffit pour illustrer la catégorie
+      fetch(`${config.API_BASE_URL}/api/produit/?category=${category.query}&page_size=1`)
         .then(response => response.json())
-        .then(data => {
-          if (data.length > 0 && data[0].images && data[0].images.length > 0) {
-            return { [category.label]: getImageUrl(data[0].images[0].image) };
+        .then(({ results }) => {
+          if (results.length > 0 && results[0].couverture) {
+            return { [category.label]: getImageUrl(results[0].couverture) };
           }
           return null;
         })
@@ -73,15 +76,30 @@ const Navbar2 = () => {
     fetch(`${config.API_BASE_URL}/api/produit/?category=${category.query}`)
       .then(response => response.json())
       .then(data => {
-        setCategoryItems(data);
+        setCategoryItems(data.results);
+        setCategoryNextPage(data.next);
       })
       .catch(error => {
         console.error(`Error fetching items for ${category.label}:`, error);
         showError(`Erreur lors de la récupération des articles pour ${category.label}`);
         setCategoryItems([]);
+        setCategoryNextPage(null);
       });
   }, []);
 
+  const handleLoadMoreClick = useCallback(() => {
+    fetch(categoryNextPage)
+      .then(response => response.json())
+      .then(data => {
+        setCategoryItems(previous => [...previous, ...data.results]);
+        setCategoryNextPage(data.next);
+      })
+      .catch(error => {
+        console.error(`Error fetching more items for ${selectedCategory.label}:`, error);
+        showError(`Erreur lors de la récupération des articles pour ${selectedCategory.label}`);
+      });
+  }, [categoryNextPage, selectedCategory]);
+
   return (
     <div>
       <Toast ref={toast} /> {/* Composant Toast pour afficher les notifications */}
@@ -123,7 +141,7 @@ const Navbar2 = () => {
               <CSSTransition key={index} timeout={300} classNames="fade">
                 <div className="navbar2-item-card">
                   <img 
-                    src={item.images && item.images.length > 0 ? getImageUrl(item.images[0].image) : '/placeholder-image.jpg'} 
+                    src={getImageUrl(item.couverture_miniature || item.couverture)} 
                     alt={item.name} 
                     className="navbar2-item-image" 
                   />
@@ -133,6 +151,11 @@ const Navbar2 = () => {
               </CSSTransition>
             ))}
           </div>
+          {categoryNextPage && (
+            <button type="button" className="navbar2-load-more" onClick={handleLoadMoreClick}>
+              Voir plus
+            </button>
+          )}
         </div>
       )}
     </div>
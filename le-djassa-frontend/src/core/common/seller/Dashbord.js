@@ -13,12 +13,12 @@ const Dashboard = () => {
 
     const fetchOrderCount = async () => {
         try {
-            const response = await axios.get(`${config.API_BASE_URL}/api/orders/commandes-vendeur/`, {
+            const response = await axios.get(`${config.API_BASE_URL}/api/orders/commandes-en-attente/`, {
                 headers: {
                     'Authorization': `Bearer ${localStorage.getItem('access')}`
                 }
             });
-            setBadgeCount(response.data.length); // Mettre à jour le badgeCount avec le nombre de commandes
+            setBadgeCount(response.data.count); // Mettre à jour le badgeCount avec le nombre de commandes à traiter
         } catch (error) {
             console.error("Erreur lors de la récupération des commandes:", error);
         }
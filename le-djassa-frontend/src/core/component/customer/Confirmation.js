@@ -12,6 +12,8 @@ const Confirmation = () => {
     const [address, setAddress] = useState('');
     const [loading, setLoading] = useState(false);
     const toast = useRef(null);
+    // Même clé pour tous les renvois de ce panier : le serveur ne crée les commandes qu'une fois
+    const idempotencyKey = useRef(crypto.randomUUID());
     const navigate = useNavigate();
 
     const showToast = useCallback((severity, summary, detail) => {
@@ -68,6 +70,7 @@ const calculateTotalPrice = () => {
                 headers: {
                     'Content-Type': 'application/json',
                     'Authorization': `Bearer ${accessToken}`,
+                    'Idempotency-Key': idempotencyKey.current,
                 },
                 body: JSON.stringify(commandesData),
             });
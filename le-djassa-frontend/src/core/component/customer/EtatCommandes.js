@@ -115,9 +115,9 @@ const EtatCommandes = () => {
               getFilteredOrders().map(order => (
                 <div key={order.id} className="ec-order-item">
                   <div className="ec-order-image">
-                    {order.produit_image || order.produit?.images?.[0]?.image ? (
+                    {order.produit_image || order.produit?.couverture ? (
                       <Image 
-                        src={getImageUrl(order.produit_image || order.produit?.images?.[0]?.image)}
+                        src={getImageUrl(order.produit_image || order.produit?.couverture)}
                         alt={order.produit_nom}
                         width="120" 
                         height="120"
@@ -3,6 +3,7 @@ import { Modal, message, Input, Badge, Tooltip } from 'antd';
 import { ExclamationCircleOutlined, DeleteOutlined, InfoCircleOutlined } from '@ant-design/icons';
 import '../../../app_main/style/seller/Annonces.css';
 import config from '../../../core/store/config';
+import { chargerPage } from '../../../core/store/pagination';
 
 const { confirm } = Modal;
 
@@ -12,37 +13,40 @@ const Annonces = () => {
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
     const [searchTerm, setSearchTerm] = useState("");
-    const [currentPage, setCurrentPage] = useState(1);
-    const itemsPerPage = 10;
+    const [recherche, setRecherche] = useState("");
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
-    // Fonction pour récupérer les données
-    const fetchProducts = useCallback(async () => {
-        setLoading(true);
+    // La recherche est faite par le serveur, une fois la saisie terminée
+    useEffect(() => {
+        const minuteur = setTimeout(() => setRecherche(searchTerm.trim()), 300);
+        return () => clearTimeout(minuteur);
+    }, [searchTerm]);
+
+    // Une page d'annonces à la fois ; `url` absente : première page de la recherche courante
+    const fetchProducts = useCallback(async (url) => {
+        const setChargement = url ? setLoadingMore : setLoading;
+        setChargement(true);
         setError(null);
         const accessToken = localStorage.getItem('access');
 
         if (!accessToken) {
             setError("Token d'authentification non trouvé");
-            setLoading(false);
+            setChargement(false);
             return;
         }
 
         try {
-            const response = await fetch(`${config.API_BASE_URL}/api/produit/ownerproduct/`, {
+            const premiere = `${config.API_BASE_URL}/api/produit/ownerproduct/?page_size=20`
+                + (recherche ? `&q=${encodeURIComponent(recherche)}` : '');
+            const page = await chargerPage(url || premiere, {
                 headers: {
                     'Authorization': `Bearer ${accessToken}`,
                     'Content-Type': 'application/json'
                 }
             });
 
-            if (!response.ok) {
-                throw new Error(`Erreur HTTP: ${response.status}`);
-            }
-
-            const rawData = await response.json();
-            console.log("RAW DATA API:", rawData);
-
-            const formattedData = rawData.map((item) => ({
+            const formattedData = page.results.map((item) => ({
                 key: item.id,
                 id: item.id,
                 produits: item.nom,
@@ -57,14 +61,15 @@ const Annonces = () => {
                 date_creation: item.cree_le || '—',
             }));
 
-            setData(formattedData);
+            setData(prevData => (url ? [...prevData, ...formattedData] : formattedData));
+            setNextPage(page.next);
         } catch (err) {
             setError(`Erreur lors de la récupération des données: ${err.message}`);
             message.error(`Erreur: ${err.message}`);
         } finally {
-            setLoading(false);
+            setChargement(false);
         }
-    }, []);
+    }, [recherche]);
 
     useEffect(() => {
         fetchProducts();
@@ -110,21 +115,6 @@ const Annonces = () => {
         });
     }, []);
 
-    const filteredData = data.filter((item) =>
-        item.produits.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
-    const totalPages = Math.ceil(filteredData.length / itemsPerPage);
-    const paginatedData = filteredData.slice(
-        (currentPage - 1) * itemsPerPage,
-        currentPage * itemsPerPage
-    );
-
-    const handlePageChange = (newPage) => {
-        setCurrentPage(newPage);
-        window.scrollTo({ top: 0, behavior: 'smooth' });
-    };
-
     return (
         <div className="an-container">
             <div className="an-header">
@@ -161,7 +151,7 @@ const Annonces = () => {
                     <ExclamationCircleOutlined className="an-error-icon" />
                     <p>{error}</p>
                 </div>
-            ) : paginatedData.length > 0 ? (
+            ) : data.length > 0 ? (
                 <div className="an-table-container">
                     <table className="an-table">
                         <thead>
@@ -176,7 +166,7 @@ const Annonces = () => {
                             </tr>
                         </thead>
                         <tbody>
-                            {paginatedData.map((item) => (
+                            {data.map((item) => (
                                 <tr
                                     key={item.key}
                                     className={item.qte_stock === 0 || item.est_vendu ? 'an-row-sold-out' : 'an-row-available'}
@@ -215,25 +205,17 @@ const Annonces = () => {
                         </tbody>
                     </table>
 
-                    <div className="an-pagination">
-                        <button
-                            className="an-pagination-btn"
-                            disabled={currentPage === 1}
-                            onClick={() => handlePageChange(currentPage - 1)}
-                        >
-                            Précédent
-                        </button>
-                        <span className="an-pagination-info">
-                            Page {currentPage} sur {totalPages}
-                        </span>
-                        <button
-                            className="an-pagination-btn"
-                            disabled={currentPage === totalPages}
-                            onClick={() => handlePageChange(currentPage + 1)}
-                        >
-                            Suivant
-                        </button>
-                    </div>
+                    {nextPage && (
+                        <div className="an-pagination">
+                            <button
+                                className="an-pagination-btn"
+                                disabled={loadingMore}
+                                onClick={() => fetchProducts(nextPage)}
+                            >
+                                {loadingMore ? 'Chargement...' : 'Voir plus d\'annonces'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             ) : (
                 <div className="an-empty-state">
@@ -1,32 +1,53 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { DataTable } from 'primereact/datatable';
 import { Column } from 'primereact/column';
 import { Button } from 'primereact/button';
+import { Dropdown } from 'primereact/dropdown';
 import { Tag } from 'primereact/tag';
-import axios from 'axios';
 import config from '../../../core/store/config';
+import { chargerPage } from '../../../core/store/pagination';
 import CommandeDetails from './CommandeDetails';
 
+const statutsOptions = [
+    { label: 'Tous les statuts', value: '' },
+    { label: 'En attente', value: 'en_attente' },
+    { label: 'En traitement', value: 'en_traitement' },
+    { label: 'Livraison en cours', value: 'livraison_en_cours' },
+    { label: 'Livrée', value: 'livree' },
+    { label: 'Annulée', value: 'annulee' },
+];
+
 const Commandes = () => {
     const [orders, setOrders] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
+    const [loading, setLoading] = useState(false);
+    const [statut, setStatut] = useState('');
     const [selectedOrderId, setSelectedOrderId] = useState(null);
 
-    useEffect(() => {
-        fetchOrders();
-    }, []);
-
-    const fetchOrders = async () => {
+    // Flux paginé par curseur : une page à la fois, filtrée par le serveur.
+    // `url` absente : première page du filtre courant, qui remplace la liste.
+    const fetchOrders = useCallback(async (url) => {
+        setLoading(true);
         try {
-            const response = await axios.get(`${config.API_BASE_URL}/api/orders/commandes-vendeur/`, {
+            const premiere = `${config.API_BASE_URL}/api/orders/commandes-vendeur/?page_size=50`
+                + (statut ? `&statut=${statut}` : '');
+            const page = await chargerPage(url || premiere, {
                 headers: {
                     'Authorization': `Bearer ${localStorage.getItem('access')}`
                 }
             });
-            setOrders(response.data);
+            setOrders(prev => (url ? [...prev, ...page.results] : page.results));
+            setNextPage(page.next);
         } catch (error) {
             console.error("Erreur lors de la récupération des commandes:", error);
+        } finally {
+            setLoading(false);
         }
-    };
+    }, [statut]);
+
+    useEffect(() => {
+        fetchOrders();
+    }, [fetchOrders]);
 
     const formatDate = (value) => {
         return new Date(value).toLocaleDateString();
@@ -70,10 +91,18 @@ const Commandes = () => {
                 <CommandeDetails orderId={selectedOrderId} onBack={() => setSelectedOrderId(null)} />
             ) : (
                 <>
-                    <div className="p-d-flex p-jc-end p-mb-3">
+                    <div className="p-d-flex p-jc-between p-mb-3">
+                        <Dropdown
+                            value={statut}
+                            options={statutsOptions}
+                            onChange={(e) => setStatut(e.value)}
+                            optionLabel="label"
+                            optionValue="value"
+                            placeholder="Filtrer par statut"
+                        />
                         <Button label="Nouvelle annonce" className="p-button" />
                     </div>
-                    <DataTable value={orders} paginator rows={10}>
+                    <DataTable value={orders} loading={loading && orders.length === 0}>
                         <Column field="id" header="COMMANDES" />
                         <Column field="cree_le" header="DATE" body={(rowData) => formatDate(rowData.cree_le)} />
                         <Column field="acheteur.username" header="CLIENT" />
@@ -85,6 +114,16 @@ const Commandes = () => {
                         <Column field="statut" header="STATUT" body={statusBodyTemplate} />
                         <Column body={actionBodyTemplate} header="ACTIONS" />
                     </DataTable>
+                    {nextPage && (
+                        <div className="p-d-flex p-jc-center p-mt-3">
+                            <Button
+                                label="Charger plus de commandes"
+                                className="p-button-outlined"
+                                loading={loading}
+                                onClick={() => fetchOrders(nextPage)}
+                            />
+                        </div>
+                    )}
                 </>
             )}
         </div>
@@ -0,0 +1,13 @@
+// Listes paginées par curseur de l'API : { next, first, results }.
+// `next` est l'URL complète de la page suivante, null sur la dernière page.
+
+// Une page d'une liste : ses résultats et l'URL de la suivante. Les filtres sont passés
+// dans l'URL de la première page ; le serveur les reporte dans `next`.
+export const chargerPage = async (url, options = {}) => {
+    const response = await fetch(url, options);
+    if (!response.ok) {
+        throw new Error(`Erreur HTTP: ${response.status}`);
+    }
+    const page = await response.json();
+    return { results: page.results, next: page.next };
+};
@@ -2,14 +2,13 @@ import React, { useEffect, useState, useCallback } from 'react';
 import '../../app_main/style/customer/HomePage.css';
 import { useNavigate } from 'react-router-dom';
 import config from '../../core/store/config';
-import { Card } from 'antd';
-import { Paginator } from 'primereact/paginator';
+import { Button, Card } from 'antd';
 
 const HomePage = ({ searchQuery, formData, setFormData }) => {
     const [products, setProducts] = useState([]);
-    const [totalProducts, setTotalProducts] = useState(0);
-    const [first, setFirst] = useState(0);
-    const [rows] = useState(12);
+    // URL de la page suivante (curseur), null quand tout est chargé
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const navigate = useNavigate();
 
     const fetchProducts = useCallback(() => {
@@ -18,12 +17,24 @@ const HomePage = ({ searchQuery, formData, setFormData }) => {
         fetch(`${config.API_BASE_URL}/api/produit/?categories=${selectedCategories.join(',')}`)
             .then(response => response.json())
             .then(data => {
-                setProducts(data);
-                setTotalProducts(data.length);
+                setProducts(data.results);
+                setNextPage(data.next);
             })
             .catch(error => console.error('Erreur lors de la récupération des produits:', error));
     }, [formData.categorie]);
 
+    const fetchMoreProducts = () => {
+        setLoadingMore(true);
+        fetch(nextPage)
+            .then(response => response.json())
+            .then(data => {
+                setProducts(previous => [...previous, ...data.results]);
+                setNextPage(data.next);
+            })
+            .catch(error => console.error('Erreur lors de la récupération des produits:', error))
+            .finally(() => setLoadingMore(false));
+    };
+
     useEffect(() => {
         fetchProducts();
     }, [fetchProducts]);
@@ -48,15 +59,11 @@ const HomePage = ({ searchQuery, formData, setFormData }) => {
         return product.nom.toLowerCase().includes(searchQuery.toLowerCase());
     });
 
-    const onPageChange = (event) => {
-        setFirst(event.first);
-    };
-
     return (
         <div className="hp-container">
             <div className="hp-products-container">
                 <div className="hp-products-grid">
-                    {filteredProducts.slice(first, first + rows).map((product) => (
+                    {filteredProducts.map((product) => (
                         <Card
                             key={product.id}
                             className="hp-product-card"
@@ -64,7 +71,7 @@ const HomePage = ({ searchQuery, formData, setFormData }) => {
                             cover={
                                 <img
                                     alt={product.nom}
-                                    src={getImageUrl(product.images[0]?.image)}
+                                    src={getImageUrl(product.couverture_miniature || product.couverture)}
                                     className='hp-product-image'
                                 />
                             }
@@ -83,14 +90,12 @@ const HomePage = ({ searchQuery, formData, setFormData }) => {
                     }
                 </div>
             </div>
-            {totalProducts > 0 && (
-                <Paginator
-                    first={first}
-                    rows={rows}
-                    totalRecords={totalProducts}
-                    onPageChange={onPageChange}
-                    className="hp-paginator"
-                />
+            {nextPage && (
+                <div className="hp-load-more">
+                    <Button onClick={fetchMoreProducts} loading={loadingMore}>
+                        Voir plus de produits
+                    </Button>
+                </div>
             )}
         </div>
     );
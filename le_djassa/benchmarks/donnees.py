@@ -0,0 +1,225 @@
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.test.utils import (override_settings, setup_databases, setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from orders.classement import reconstruire_classement
+from orders.compteurs import reconcilier_compteurs
+from orders.models import Commande, Conversation, Evaluation, HistoriqueStatutCommande, Message
+from orders.notes import reconstruire_notes
+from products.couverture import actualiser_couvertures
+from products.models import Categorie, ImageProduit, Produit, VarianteImage
+from users.models import Utilisateur
+
+MOT_DE_PASSE = 'benchmark-Djassa-2024'
+
+CATEGORIES = ['Téléphones', 'Informatique', 'Mode', 'Maison', 'Électroménager', 'Véhicules', 'Sport', 'Beauté']
+ARTICLES = ['Samsung Galaxy', 'iPhone', 'Ordinateur portable', 'Chaussures', 'Robe en pagne', 'Canapé',
+            'Réfrigérateur', 'Moto', 'Ballon', 'Parfum', 'Télévision', 'Montre']
+VILLES = ['Abidjan', 'Bouaké', 'Yamoussoukro', 'San-Pédro', 'Korhogo', 'Daloa']
+
+# Cycle de vie d'une commande : chaque statut final est précédé des statuts intermédiaires
+PARCOURS = {
+    'en_attente': [],
+    'en_traitement': ['en_traitement'],
+    'livraison_en_cours': ['en_traitement', 'livraison_en_cours'],
+    'livree': ['en_traitement', 'livraison_en_cours', 'livree'],
+    'annulee': ['annulee'],
+}
+
+
+@contextmanager
+def base_de_test():
+    """
+    Base de test jetable, sur le moteur configuré (SQLite ou PostgreSQL) ; les
+    réplicas en sont des miroirs. Médias, SMS et cache restent en local : le
+    benchmark vide le cache entre deux mesures.
+    """
+    setup_test_environment()
+    anciennes_bases = setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+    try:
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media, SMS_BACKEND='notifications.sms.MemoireSmsBackend',
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}},
+        ):
+            yield
+    finally:
+        teardown_databases(anciennes_bases, verbosity=0)
+        teardown_test_environment()
+
+
+class JeuDeDonnees:
+    """Utilisateurs et objets de référence utilisés par les scénarios."""
+
+    def __init__(self, vendeur, acheteur, produit, categorie):
+        self.vendeur = vendeur
+        self.acheteur = acheteur
+        self.produit = produit
+        self.categorie = categorie
+        self.mot_de_passe = MOT_DE_PASSE
+
+    def jeton_d_acces(self, role):
+        """Jeton JWT neuf, comme l'envoie le frontend (sa durée de vie est courte)."""
+        return str(RefreshToken.for_user(getattr(self, role)).access_token)
+
+    def jeton_de_rafraichissement(self):
+        return str(RefreshToken.for_user(self.acheteur))
+
+
+def creer_jeu_de_donnees(produits=2000, vendeurs=20, acheteurs=200, commandes=3000, conversations=0, graine=42):
+    """
+    Remplit la base avec un marché de taille réaliste, en insertions groupées.
+
+    Le premier vendeur et le premier acheteur servent de comptes de test ;
+    le mot de passe n'est haché qu'une fois pour tous les utilisateurs.
+    """
+    aleatoire = random.Random(graine)
+    maintenant = timezone.now()
+    mot_de_passe = make_password(MOT_DE_PASSE)
+
+    categories = Categorie.objects.bulk_create([Categorie(nom=nom) for nom in CATEGORIES])
+
+    utilisateurs = Utilisateur.objects.bulk_create(
+        [
+            Utilisateur(username=f'vendeur{i}', email=f'vendeur{i}@ledjassa.test', password=mot_de_passe,
+                        est_vendeur=True, numero_telephone=f'+22507{i:08d}', nom_boutique=f'Boutique {i}')
+            for i in range(vendeurs)
+        ] + [
+            Utilisateur(username=f'acheteur{i}', email=f'acheteur{i}@ledjassa.test', password=mot_de_passe,
+                        first_name=f'Client{i}', numero_telephone=f'+22501{i:08d}', adresse=aleatoire.choice(VILLES))
+            for i in range(acheteurs)
+        ],
+        batch_size=1000,
+    )
+    liste_vendeurs, liste_acheteurs = utilisateurs[:vendeurs], utilisateurs[vendeurs:]
+
+    liste_produits = Produit.objects.bulk_create([
+        Produit(
+            nom=f'{aleatoire.choice(ARTICLES)} {i}',
+            description='Article en très bon état, disponible immédiatement. Livraison possible.',
+            prix=Decimal(aleatoire.randrange(1000, 1000000, 500)),
+            etat=aleatoire.choice(Produit.ETATS)[0],
+            localisation=aleatoire.choice(VILLES),
+            qte_stock=aleatoire.randint(1, 50),
+            vendeur=liste_vendeurs[i % vendeurs],
+            categorie=aleatoire.choice(categories),
+        )
+        for i in range(produits)
+    ], batch_size=1000)
+    # Le premier produit garde du stock pour les scénarios de commande répétés
+    Produit.objects.filter(pk=liste_produits[0].pk).update(qte_stock=1000000)
+
+    # Images sans fichier : seules les lignes comptent pour le coût des requêtes
+    images = ImageProduit.objects.bulk_create([
+        ImageProduit(produit=produit, image=f'images_produit/benchmark_{produit.pk}_{n}.jpg',
+                     statut_traitement='traitee', largeur=1200, hauteur=900, taille=250000)
+        for produit in liste_produits
+        for n in range(aleatoire.randint(1, 3))
+    ], batch_size=1000)
+    VarianteImage.objects.bulk_create([
+        VarianteImage(image=image, nom=nom, format=format_, largeur=cote, hauteur=cote * 3 // 4, taille=cote * 40,
+                      fichier=f'images_produit/variantes/benchmark_{image.pk}_{nom}.{format_}')
+        for image in images
+        for nom, cote in (('thumbnail', 200), ('card', 600), ('full', 1600))
+        for format_ in ('webp', 'jpeg')
+    ], batch_size=1000)
+    # Insertions groupées : pas de signal, couvertures recalculées en une requête
+    actualiser_couvertures(Produit.objects.all(), modification=False)
+
+    statuts = list(PARCOURS)
+    nouvelles_commandes = []
+    for i in range(commandes):
+        # L'acheteur de test reçoit une part fixe des commandes, comme un client régulier
+        acheteur = liste_acheteurs[0] if i % 100 == 0 else aleatoire.choice(liste_acheteurs)
+        produit = liste_produits[0] if i % 50 == 0 else aleatoire.choice(liste_produits)
+        quantite = aleatoire.randint(1, 3)
+        nouvelles_commandes.append(Commande(
+            acheteur=acheteur,
+            produit=produit,
+            vendeur=produit.vendeur,
+            quantite=quantite,
+            montant_total=produit.prix * quantite,
+            statut=aleatoire.choice(statuts),
+            methode_paiement='espece_sur_place',
+            infos_livraison=acheteur.adresse,
+        ))
+    nouvelles_commandes = Commande.objects.bulk_create(nouvelles_commandes, batch_size=1000)
+
+    historique = []
+    for commande in nouvelles_commandes:
+        for statut in PARCOURS[commande.statut]:
+            historique.append(HistoriqueStatutCommande(
+                commande=commande, statut=statut, modifie_par=commande.vendeur,
+                commentaire=f"Commande passée en statut : {dict(Commande.STATUT_CHOICES)[statut]}",
+            ))
+    HistoriqueStatutCommande.objects.bulk_create(historique, batch_size=1000)
+
+    # Deux commandes livrées sur trois sont notées, plutôt bien
+    Evaluation.objects.bulk_create([
+        Evaluation(commande=commande, noteur=commande.acheteur, note=aleatoire.choice((2, 3, 4, 4, 5, 5)))
+        for commande in nouvelles_commandes
+        if commande.statut == 'livree' and aleatoire.random() < 2 / 3
+    ], batch_size=1000)
+
+    # Étale les dates de création sur l'année écoulée (auto_now_add les fixe à l'insertion)
+    for modele, objets in ((Produit, liste_produits), (Commande, nouvelles_commandes)):
+        for objet in objets:
+            objet.cree_le = maintenant - timedelta(minutes=aleatoire.randint(0, 525600))
+        modele.objects.bulk_update(objets, ['cree_le'], batch_size=1000)
+
+    reconstruire_classement()
+    reconcilier_compteurs()
+    # Insertions groupées : pas de signal, notes agrégées en une fois
+    reconstruire_notes()
+    if conversations:
+        _creer_conversations(aleatoire, conversations, liste_acheteurs, liste_produits)
+    return JeuDeDonnees(liste_vendeurs[0], liste_acheteurs[0], liste_produits[0], categories[0])
+
+
+def _creer_conversations(aleatoire, nombre, acheteurs, produits):
+    """
+    Conversations d'un à dix messages, dont une part fixe pour l'acheteur et le
+    vendeur de test. Le dernier message de chacune n'est pas encore lu.
+    """
+    paires = {}
+    for i in range(nombre):
+        acheteur = acheteurs[0] if i % 5 == 0 else aleatoire.choice(acheteurs)
+        # Le premier vendeur possède un produit sur vingt : on lui en assure sa part
+        produit = produits[aleatoire.randrange(0, len(produits), 20)] if i % 5 == 1 else aleatoire.choice(produits)
+        paires[acheteur.pk, produit.pk] = Conversation(acheteur=acheteur, vendeur=produit.vendeur, produit=produit)
+    conversations = Conversation.objects.bulk_create(paires.values(), batch_size=1000)
+
+    messages = [
+        Message(conversation=conversation, contenu=f'Message {n} : le produit est-il toujours disponible ?',
+                expediteur=conversation.acheteur if n % 2 == 0 else conversation.vendeur)
+        for conversation in conversations
+        for n in range(aleatoire.randint(1, 10))
+    ]
+    messages = Message.objects.bulk_create(messages, batch_size=1000)
+
+    # Champs tenus par orders.messagerie, calculés ici sur les messages insérés
+    fil = {}
+    for message in messages:
+        fil.setdefault(message.conversation_id, []).append(message)
+    for conversation in conversations:
+        messages_conversation = fil[conversation.pk]
+        dernier = messages_conversation[-1]
+        expediteur = 'acheteur' if dernier.expediteur_id == conversation.acheteur_id else 'vendeur'
+        destinataire = 'vendeur' if expediteur == 'acheteur' else 'acheteur'
+        conversation.dernier_message = dernier
+        conversation.dernier_message_le = dernier.timestamp
+        setattr(conversation, f'lu_jusqu_a_{expediteur}', dernier.pk)
+        setattr(conversation, f'lu_jusqu_a_{destinataire}',
+                messages_conversation[-2].pk if len(messages_conversation) > 1 else 0)
+        setattr(conversation, f'non_lus_{destinataire}', 1)
+    Conversation.objects.bulk_update(conversations, [
+        'dernier_message', 'dernier_message_le', 'lu_jusqu_a_acheteur', 'lu_jusqu_a_vendeur',
+        'non_lus_acheteur', 'non_lus_vendeur',
+    ], batch_size=1000)
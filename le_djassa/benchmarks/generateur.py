@@ -0,0 +1,311 @@
+"""
+Génération de gros volumes de données synthétiques pour les tests de charge.
+
+Tout est tiré d'un générateur pseudo-aléatoire initialisé par une graine :
+deux exécutions sur une même base produisent les mêmes lignes (les dates
+sont relatives au moment de l'exécution). Les
+identifiants sont attribués ici (à partir du plus grand id existant), ce qui
+évite de relire les lignes insérées et permet d'utiliser COPY sur PostgreSQL ;
+les séquences sont recalées à la fin.
+"""
+import io
+import random
+import time
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from orders.classement import reconstruire_classement
+from orders.compteurs import reconcilier_compteurs
+from orders.notes import CHAMPS_NOTES
+from orders.models import Commande, HistoriqueStatutCommande
+from products.couverture import actualiser_couvertures
+from products.models import Categorie, ImageProduit, Produit
+from users.models import Utilisateur
+
+from .donnees import ARTICLES, CATEGORIES, PARCOURS, VILLES
+
+MOT_DE_PASSE = 'synthetique-Djassa-2024'
+
+DESCRIPTIONS = [
+    'Article en très bon état, disponible immédiatement.',
+    'Jamais servi, encore sous emballage. Livraison possible sur Abidjan.',
+    'Quelques traces d\'usure, fonctionne parfaitement. Prix à débattre.',
+    'Vendu avec tous ses accessoires et la facture d\'achat.',
+]
+PRENOMS = ['Awa', 'Koffi', 'Mariam', 'Yao', 'Fatou', 'Ibrahim', 'Aya', 'Moussa', 'Adjoua', 'Konan']
+NOMS = ['Kouassi', 'Traoré', 'Koné', 'Bamba', 'Ouattara', 'Diallo', 'Yao', 'Coulibaly', 'Kouamé', 'Touré']
+
+# Statut final d'une commande récente (moins de DELAI_CLOTURE) et poids relatifs
+STATUTS_RECENTS = ['en_attente', 'en_traitement', 'livraison_en_cours', 'livree', 'annulee']
+POIDS_RECENTS = [30, 20, 20, 20, 10]
+# Au-delà, une commande est close : livrée ou annulée
+DELAI_CLOTURE = timedelta(days=14)
+
+CHAMPS_DATE_STATUT = {
+    'en_traitement': 'date_en_traitement',
+    'livraison_en_cours': 'date_livraison',
+    'livree': 'date_livree',
+    'annulee': 'date_annulee',
+}
+
+
+class Insertion:
+    """Insertion groupée de tuples dans la table d'un modèle : COPY sur PostgreSQL, executemany ailleurs."""
+
+    def __init__(self, modele, champs):
+        self.modele = modele
+        self.champs = [modele._meta.get_field(nom) for nom in champs]
+        qn = connection.ops.quote_name
+        self.table = qn(modele._meta.db_table)
+        self.colonnes = ', '.join(qn(champ.column) for champ in self.champs)
+
+    def inserer(self, lignes):
+        if not lignes:
+            return
+        with transaction.atomic(), connection.cursor() as curseur:
+            if connection.vendor == 'postgresql':
+                self._copier(curseur.cursor, lignes)
+            else:
+                marques = ', '.join(['%s'] * len(self.champs))
+                curseur.executemany(
+                    f'INSERT INTO {self.table} ({self.colonnes}) VALUES ({marques})',
+                    [[champ.get_db_prep_save(valeur, connection) for champ, valeur in zip(self.champs, ligne)]
+                     for ligne in lignes],
+                )
+
+    def _copier(self, curseur, lignes):
+        texte = '\n'.join('\t'.join(_valeur_copy(valeur) for valeur in ligne) for ligne in lignes) + '\n'
+        sql = f'COPY {self.table} ({self.colonnes}) FROM STDIN'
+        if hasattr(curseur, 'copy_expert'):  # psycopg2
+            curseur.copy_expert(sql, io.StringIO(texte))
+        else:  # psycopg 3
+            with curseur.copy(sql) as copie:
+                copie.write(texte)
+
+
+def _valeur_copy(valeur):
+    """Représentation d'une valeur au format texte de COPY."""
+    if valeur is None:
+        return '\\N'
+    if isinstance(valeur, bool):
+        return 't' if valeur else 'f'
+    if isinstance(valeur, datetime):
+        return valeur.isoformat()
+    if isinstance(valeur, str):
+        return valeur.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return str(valeur)
+
+
+def _premier_id(modele):
+    return (modele.objects.aggregate(maximum=Max('id'))['maximum'] or 0) + 1
+
+
+class GenerateurMarche:
+    """
+    Utilisateurs, produits, images, commandes et historique des statuts.
+
+    Les tableaux compacts (array) gardent ce qu'il faut des produits pour
+    générer les commandes — vendeur, prix, date — sans relire la base :
+    quelques dizaines de Mo pour plusieurs millions de produits.
+    """
+
+    def __init__(self, graine=1, taille_lot=10000, jours=365, rapport=None):
+        self.aleatoire = random.Random(graine)
+        self.taille_lot = taille_lot
+        self.maintenant = datetime.now(dt_timezone.utc).replace(microsecond=0)
+        self.debut = self.maintenant - timedelta(days=jours)
+        self.rapport = rapport or (lambda message: None)
+
+        self.vendeurs = array('q')
+        self.acheteurs = array('q')
+        self.produits = array('q')
+        self.vendeur_du_produit = array('q')
+        self.prix_du_produit = array('q')
+        self.date_du_produit = array('d')  # secondes depuis self.debut
+        self.commandes = 0
+        self.historique = 0
+
+    def generer(self, utilisateurs, part_vendeurs, produits, images_par_produit, commandes):
+        self.generer_utilisateurs(utilisateurs, part_vendeurs)
+        self.generer_produits(produits, images_par_produit)
+        self.generer_commandes(commandes)
+        self.finaliser()
+
+    def _par_lots(self, insertion, lignes, libelle, total, apres_lot=None):
+        """Insère les tuples produits par l'itérateur `lignes`, par lots de taille_lot."""
+        debut, lot, faits = time.perf_counter(), [], 0
+        for ligne in lignes:
+            lot.append(ligne)
+            if len(lot) >= self.taille_lot:
+                insertion.inserer(lot)
+                if apres_lot:
+                    apres_lot()
+                faits += len(lot)
+                lot = []
+                self.rapport(f"  {libelle} : {faits}/{total}")
+        insertion.inserer(lot)
+        if apres_lot:
+            apres_lot()
+        faits += len(lot)
+        self.rapport(f"{faits} {libelle} en {time.perf_counter() - debut:.1f} s.")
+        return faits
+
+    def _date(self, secondes):
+        return self.debut + timedelta(seconds=secondes)
+
+    def generer_utilisateurs(self, nombre, part_vendeurs):
+        aleatoire = self.aleatoire
+        # Un seul hachage pour tous les comptes : c'est de loin le poste le plus coûteux sinon
+        mot_de_passe = make_password(MOT_DE_PASSE)
+        etendue = (self.maintenant - self.debut).total_seconds()
+        premier = _premier_id(Utilisateur)
+
+        def lignes():
+            for identifiant in range(premier, premier + nombre):
+                vendeur = aleatoire.random() < part_vendeurs
+                (self.vendeurs if vendeur else self.acheteurs).append(identifiant)
+                prenom, nom = aleatoire.choice(PRENOMS), aleatoire.choice(NOMS)
+                yield (
+                    identifiant, mot_de_passe, False, f'{prenom.lower()}.{nom.lower()}{identifiant}',
+                    prenom, nom, f'u{identifiant}@ledjassa.test', False, True,
+                    self._date(aleatoire.random() * etendue), f'+225{aleatoire.choice("0157")}{identifiant:08d}',
+                    aleatoire.choice(VILLES), vendeur, f'Boutique {prenom} {nom}' if vendeur else None,
+                )
+
+        insertion = Insertion(Utilisateur, [
+            'id', 'password', 'is_superuser', 'username', 'first_name', 'last_name', 'email', 'is_staff',
+            'is_active', 'date_joined', 'numero_telephone', 'adresse', 'est_vendeur', 'nom_boutique',
+        ])
+        self._par_lots(insertion, lignes(), 'utilisateurs', nombre)
+        if not self.vendeurs or not self.acheteurs:
+            raise ValueError("Il faut au moins un vendeur et un acheteur : augmentez le nombre d'utilisateurs.")
+
+    def generer_produits(self, nombre, images_par_produit):
+        aleatoire = self.aleatoire
+        categories = [Categorie.objects.get_or_create(nom=nom)[0].pk for nom in CATEGORIES]
+        etats = [cle for cle, _ in Produit.ETATS]
+        etendue = (self.maintenant - self.debut).total_seconds()
+        premier = _premier_id(Produit)
+
+        def lignes():
+            for identifiant in range(premier, premier + nombre):
+                # Quelques gros vendeurs, beaucoup de petits
+                vendeur = self.vendeurs[int(len(self.vendeurs) * aleatoire.random() ** 2)]
+                prix = aleatoire.randrange(500, 1000000, 500)
+                secondes = aleatoire.random() * etendue
+                self.produits.append(identifiant)
+                self.vendeur_du_produit.append(vendeur)
+                self.prix_du_produit.append(prix)
+                self.date_du_produit.append(secondes)
+                yield (
+                    identifiant, f'{aleatoire.choice(ARTICLES)} {identifiant}', aleatoire.choice(DESCRIPTIONS),
+                    prix, aleatoire.choice(etats), aleatoire.choice(VILLES), False, aleatoire.randint(0, 50),
+                    True, vendeur, aleatoire.choice(categories), self._date(secondes), self._date(secondes),
+                    # Couverture recopiée après l'insertion des images ; aucune évaluation, notes à zéro
+                    '', '', *[0] * len(CHAMPS_NOTES),
+                )
+
+        insertion = Insertion(Produit, [
+            'id', 'nom', 'description', 'prix', 'etat', 'localisation', 'est_vendu', 'qte_stock',
+            'est_actif', 'vendeur', 'categorie', 'cree_le', 'modifie_le', 'couverture', 'couverture_miniature',
+            *CHAMPS_NOTES,
+        ])
+        self._par_lots(insertion, lignes(), 'produits', nombre)
+
+        # Images sans fichier, marquées traitées pour que traiter_images les ignore
+        premier_image = _premier_id(ImageProduit)
+
+        def images():
+            identifiant = premier_image
+            for produit in self.produits:
+                for _ in range(aleatoire.randint(1, images_par_produit)):
+                    yield (identifiant, produit, f'images_produit/synthetique/{identifiant}.jpg',
+                           'traitee', 1200, 900, 250000)
+                    identifiant += 1
+
+        insertion = Insertion(ImageProduit, [
+            'id', 'produit', 'image', 'statut_traitement', 'largeur', 'hauteur', 'taille',
+        ])
+        self._par_lots(insertion, images(), 'images', f'~{nombre * (images_par_produit + 1) // 2}')
+        debut = time.perf_counter()
+        actualiser_couvertures(Produit.objects.filter(pk__gte=premier), modification=False)
+        self.rapport(f"Images de couverture recopiées en {time.perf_counter() - debut:.1f} s.")
+
+    def generer_commandes(self, nombre):
+        aleatoire = self.aleatoire
+        etendue = (self.maintenant - self.debut).total_seconds()
+        cloture = etendue - DELAI_CLOTURE.total_seconds()
+        libelles = dict(Commande.STATUT_CHOICES)
+        historique = []
+        premier = _premier_id(Commande)
+        premier_historique = _premier_id(HistoriqueStatutCommande)
+
+        def lignes():
+            for identifiant in range(premier, premier + nombre):
+                # Les produits les plus anciens sont aussi les plus commandés
+                indice = int(len(self.produits) * aleatoire.random() ** 3)
+                vendeur = self.vendeur_du_produit[indice]
+                quantite = aleatoire.choice((1, 1, 1, 2, 3))
+                passee = self.date_du_produit[indice]
+                passee += aleatoire.random() * (etendue - passee)
+                if passee < cloture:
+                    statut = 'livree' if aleatoire.random() < 0.85 else 'annulee'
+                else:
+                    statut = aleatoire.choices(STATUTS_RECENTS, POIDS_RECENTS)[0]
+
+                # Chaque étape du parcours survient de 1 h à 2 jours après la précédente
+                dates, moment = {}, passee
+                for etape in PARCOURS[statut]:
+                    moment = min(moment + aleatoire.uniform(3600, 172800), etendue)
+                    dates[CHAMPS_DATE_STATUT[etape]] = self._date(moment)
+                    commentaire = ("Commande annulée par le vendeur" if etape == 'annulee'
+                                   else f"Commande passée en statut : {libelles[etape]}")
+                    historique.append((premier_historique + self.historique, identifiant, etape,
+                                       self._date(moment), commentaire, vendeur))
+                    self.historique += 1
+
+                self.commandes += 1
+                yield (
+                    identifiant, self.acheteurs[aleatoire.randrange(len(self.acheteurs))],
+                    self.produits[indice], vendeur, quantite, self.prix_du_produit[indice] * quantite, statut,
+                    aleatoire.choice(('espece_sur_place', 'espece_sur_place', 'carte_credit')),
+                    aleatoire.choice(VILLES), self._date(passee), self._date(moment),
+                    dates.get('date_en_traitement'), dates.get('date_livraison'),
+                    dates.get('date_livree'), dates.get('date_annulee'),
+                )
+
+        insertion = Insertion(Commande, [
+            'id', 'acheteur', 'produit', 'vendeur', 'quantite', 'montant_total', 'statut', 'methode_paiement',
+            'infos_livraison', 'cree_le', 'modifie_le', 'date_en_traitement', 'date_livraison', 'date_livree',
+            'date_annulee',
+        ])
+        insertion_historique = Insertion(HistoriqueStatutCommande, [
+            'id', 'commande', 'statut', 'date_changement', 'commentaire', 'modifie_par',
+        ])
+
+        def vider_historique():
+            # Inséré après chaque lot de commandes, auxquelles il fait référence
+            insertion_historique.inserer(historique)
+            historique.clear()
+
+        debut = time.perf_counter()
+        self._par_lots(insertion, lignes(), 'commandes', nombre, apres_lot=vider_historique)
+        self.rapport(f"{self.historique} changements de statut en {time.perf_counter() - debut:.1f} s.")
+
+    def finaliser(self):
+        """Recale les séquences d'identifiants, met à jour les statistiques, le classement et les compteurs."""
+        modeles = [Utilisateur, Produit, ImageProduit, Commande, HistoriqueStatutCommande]
+        with connection.cursor() as curseur:
+            for sql in connection.ops.sequence_reset_sql(no_style(), modeles):
+                curseur.execute(sql)
+            if connection.vendor == 'postgresql':
+                for modele in modeles:
+                    curseur.execute(f'ANALYZE {connection.ops.quote_name(modele._meta.db_table)}')
+        reconstruire_classement()
+        reconcilier_compteurs()
+
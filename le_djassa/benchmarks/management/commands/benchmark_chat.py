@@ -0,0 +1,154 @@
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.donnees import base_de_test, creer_jeu_de_donnees
+from notifications.diffusion import get_diffusion
+from orders.chat import get_tampon
+from orders.models import Conversation, Message
+
+
+class ClientWebSocket:
+    """Client WebSocket minimal branché directement sur l'application ASGI (sans réseau)."""
+
+    def __init__(self, application, utilisateur_id):
+        self.utilisateur_id = utilisateur_id
+        self.entrant = asyncio.Queue()
+        self.sortant = asyncio.Queue()
+        self.entrant.put_nowait({'type': 'websocket.connect'})
+        jeton = AccessToken()
+        jeton['user_id'] = utilisateur_id
+        scope = {
+            'type': 'websocket', 'asgi': {'version': '3.0'}, 'path': '/ws/chat/', 'raw_path': b'/ws/chat/',
+            'query_string': b'', 'root_path': '', 'scheme': 'ws', 'subprotocols': [],
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {jeton}'.encode())],
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        self.tache = asyncio.create_task(application(scope, self.entrant.get, self.sortant.put))
+
+    async def ouvrir(self):
+        reponse = await self.sortant.get()
+        if reponse['type'] != 'websocket.accept':
+            raise CommandError(f"Connexion refusée : {reponse}.")
+
+    def envoyer(self, **trame):
+        self.entrant.put_nowait({'type': 'websocket.receive', 'text': json.dumps(trame)})
+
+    async def attendre(self, condition):
+        """Première trame reçue qui remplit la condition ; les autres sont ignorées."""
+        while True:
+            trame = json.loads((await self.sortant.get())['text'])
+            if condition(trame):
+                return trame
+
+    async def fermer(self):
+        self.entrant.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+        await self.tache
+
+
+class Command(BaseCommand):
+    help = (
+        "Ouvre de nombreux WebSocket de chat sur une seule boucle asyncio (un worker), abonne chaque acheteur "
+        "et chaque vendeur à leur conversation, puis mesure la mémoire par connexion, la latence de livraison "
+        "des messages et leur écriture différée par lots."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conversations', type=int, default=1000,
+                            help="Conversations suivies, deux connexions chacune.")
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--simultanes', type=int, default=200, help="Messages en vol à la fois.")
+        parser.add_argument('--graine', type=int, default=42, help="Graine du générateur de données.")
+
+    def handle(self, *args, **options):
+        with base_de_test():
+            creer_jeu_de_donnees(produits=max(200, options['conversations']), vendeurs=20, acheteurs=500,
+                                 commandes=0, conversations=options['conversations'], graine=options['graine'])
+            # Une connexion par participant et par conversation, comme autant d'onglets ouverts
+            conversations = list(Conversation.objects.order_by('id').values('id', 'acheteur_id', 'vendeur_id'))
+            asyncio.run(self.mesurer(conversations, options['messages'], options['simultanes']))
+
+    async def mesurer(self, conversations, nombre_messages, simultanes):
+        from le_djassa.asgi import application
+
+        tracemalloc.start()
+        memoire_avant = tracemalloc.get_traced_memory()[0]
+        debut = time.perf_counter()
+        paires = []
+        for conversation in conversations:
+            acheteur = ClientWebSocket(application, conversation['acheteur_id'])
+            vendeur = ClientWebSocket(application, conversation['vendeur_id'])
+            paires.append((conversation['id'], acheteur, vendeur))
+        clients = [client for _, acheteur, vendeur in paires for client in (acheteur, vendeur)]
+        await asyncio.gather(*(client.ouvrir() for client in clients))
+        for conversation_id, acheteur, vendeur in paires:
+            acheteur.envoyer(type='abonner', conversation=conversation_id)
+            vendeur.envoyer(type='abonner', conversation=conversation_id)
+        await asyncio.gather(*(client.attendre(lambda t: t['type'] == 'abonne') for client in clients))
+        ouverture = time.perf_counter() - debut
+        par_connexion = (tracemalloc.get_traced_memory()[0] - memoire_avant) / len(clients)
+        tracemalloc.stop()
+        self.stdout.write(f"{len(clients)} connexions ouvertes et abonnées en {ouverture:.2f} s, "
+                          f"~{par_connexion / 1024:.1f} Kio chacune (boucle unique).")
+
+        # Signal « en train d'écrire », relayé à l'autre participant
+        conversation_id, acheteur, vendeur = paires[0]
+        vendeur.envoyer(type='frappe', conversation=conversation_id)
+        await asyncio.wait_for(acheteur.attendre(lambda t: t['type'] == 'frappe'), 5)
+
+        # Deux messages d'affilée sur une connexion : le second est refusé (CHAT_MESSAGES_INTERVALLE)
+        vendeur.envoyer(type='message', conversation=conversation_id, contenu='Premier', ref='limite-1')
+        vendeur.envoyer(type='message', conversation=conversation_id, contenu='Second', ref='limite-2')
+        await asyncio.wait_for(acheteur.attendre(lambda t: t['type'] == 'message' and t['ref'] == 'limite-1'), 5)
+        await asyncio.wait_for(vendeur.attendre(lambda t: t['type'] == 'erreur' and t.get('ref') == 'limite-2'), 5)
+        await get_tampon().vider()
+
+        messages_avant = await sync_to_async(Message.objects.count)()
+        latences = []
+        cpu_avant = time.process_time()
+        debut = time.perf_counter()
+        semaphore = asyncio.Semaphore(simultanes)
+
+        async def envoyer(i):
+            conversation_id, acheteur, vendeur = paires[i % len(paires)]
+            expediteur, destinataire = (acheteur, vendeur) if i % 2 == 0 else (vendeur, acheteur)
+            async with semaphore:
+                envoi = time.perf_counter()
+                expediteur.envoyer(type='message', conversation=conversation_id, contenu=f'Message {i}', ref=i)
+                await destinataire.attendre(lambda t: t['type'] == 'message' and t['ref'] == i)
+                latences.append((time.perf_counter() - envoi) * 1000)
+
+        # Un message en vol au plus par conversation : chaque destinataire attend ses trames dans l'ordre.
+        # Sans limite de débit par connexion : chaque connexion envoie ici bien plus vite qu'un utilisateur
+        with override_settings(CHAT_MESSAGES_INTERVALLE=0):
+            for vague in range(0, nombre_messages, len(paires)):
+                await asyncio.gather(*(envoyer(i) for i in range(vague, min(vague + len(paires), nombre_messages))))
+        duree = time.perf_counter() - debut
+        cpu = time.process_time() - cpu_avant
+        latences.sort()
+        self.stdout.write(
+            f"{nombre_messages} messages livrés en {duree:.2f} s ({nombre_messages / duree:.0f}/s, "
+            f"{cpu * 1e6 / nombre_messages:.0f} µs CPU chacun) ; latence médiane "
+            f"{statistics.median(latences):.2f} ms, p99 {latences[int(len(latences) * 0.99) - 1]:.2f} ms."
+        )
+
+        tampon = get_tampon()
+        await tampon.vider()
+        enregistres = await sync_to_async(Message.objects.count)() - messages_avant
+        if enregistres != nombre_messages:
+            raise CommandError(f"{enregistres} message(s) enregistré(s) sur {nombre_messages}.")
+        self.stdout.write(f"{enregistres} messages enregistrés en {tampon.lots} lot(s) "
+                          f"(~{enregistres / max(tampon.lots, 1):.0f} par lot).")
+
+        await asyncio.gather(*(client.fermer() for client in clients))
+        restants = sum(len(abonnes) for abonnes in getattr(get_diffusion(), 'abonnes', {}).values())
+        if restants:
+            raise CommandError(f"{restants} abonnement(s) non libéré(s) après déconnexion.")
+        self.stdout.write(self.style.SUCCESS("Toutes les connexions ont été libérées."))
@@ -0,0 +1,81 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks.donnees import base_de_test, creer_jeu_de_donnees
+from le_djassa.compression import ENCODAGES
+
+NIVEAUX = {'gzip': (1, 4, 6, 9), 'br': (1, 4, 6, 9, 11)}
+
+
+def _reponses(jeu):
+    """Corps JSON non compressés des listes les plus volumineuses, tels que servis par l'API."""
+    client = Client()
+    vendeur = {'HTTP_AUTHORIZATION': f"Bearer {jeu.jeton_d_acces('vendeur')}"}
+    acheteur = {'HTTP_AUTHORIZATION': f"Bearer {jeu.jeton_d_acces('acheteur')}"}
+    urls = {
+        'produits_24': (reverse('produit-list'), {}),
+        'produits_100': (reverse('produit-list') + '?page_size=100', {}),
+        'commandes_vendeur_100': (reverse('commandes-vendeur') + '?page_size=100', vendeur),
+        'historique_commandes': (reverse('historique-commandes'), acheteur),
+    }
+    return {nom: client.get(url, HTTP_ACCEPT_ENCODING='identity', **extra).content
+            for nom, (url, extra) in urls.items()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure, pour chaque encodage et niveau de compression, le temps CPU et les octets économisés "
+        "sur des réponses réelles de l'API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repetitions', type=int, default=20)
+        parser.add_argument('--graine', type=int, default=42, help="Graine du générateur de données.")
+        parser.add_argument('--sortie', help="Fichier JSON des résultats.")
+
+    def handle(self, *args, **options):
+        with base_de_test():
+            jeu = creer_jeu_de_donnees(produits=300, vendeurs=2, acheteurs=10, commandes=1000,
+                                       graine=options['graine'])
+            corps = _reponses(jeu)
+
+        if 'br' not in ENCODAGES:
+            self.stdout.write("brotli n'est pas installé : seul gzip est mesuré.")
+        resultats = []
+        for nom, contenu in corps.items():
+            for encodage, (compresser, _) in ENCODAGES.items():
+                for niveau in NIVEAUX[encodage]:
+                    durees = []
+                    for _ in range(options['repetitions']):
+                        debut = time.perf_counter()
+                        compresse = compresser(contenu, niveau)
+                        durees.append((time.perf_counter() - debut) * 1000)
+                    duree = statistics.median(durees)
+                    resultats.append({
+                        'reponse': nom,
+                        'encodage': encodage,
+                        'niveau': niveau,
+                        'octets': len(contenu),
+                        'octets_compresses': len(compresse),
+                        'economie_pourcent': round(100 * (1 - len(compresse) / len(contenu)), 1),
+                        'duree_ms': round(duree, 3),
+                        # Coût CPU rapporté au volume économisé
+                        'us_par_ko_economise': round(duree * 1000 / max((len(contenu) - len(compresse)) / 1024, 1e-9), 2),
+                    })
+                    resultat = resultats[-1]
+                    self.stdout.write(
+                        f"{nom:<22} {encodage:<4} {niveau:>2}   {resultat['octets']:>8} → "
+                        f"{resultat['octets_compresses']:>7} o (-{resultat['economie_pourcent']:>4} %)   "
+                        f"{resultat['duree_ms']:>7.3f} ms   {resultat['us_par_ko_economise']:>6} µs/Ko économisé"
+                    )
+
+        if options['sortie']:
+            with open(options['sortie'], 'w', encoding='utf-8') as fichier:
+                json.dump({'repetitions': options['repetitions'], 'resultats': resultats},
+                          fichier, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS("Mesure terminée."))
@@ -0,0 +1,109 @@
+import json
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from products.models import Produit
+
+# Réglages de connexion comparés, appliqués tour à tour à la base mesurée
+MODES = {
+    'sans_persistance': {'CONN_MAX_AGE': 0},
+    'persistante': {'CONN_MAX_AGE': 600},
+    'pool': {'CONN_MAX_AGE': 0, 'pool': {'min_size': 1, 'max_size': 4}},
+}
+
+
+def _pool_disponible(connexion):
+    if connexion.vendor != 'postgresql':
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la latence par requête HTTP sans connexion persistante, avec connexion persistante "
+        "et avec le pool psycopg 3, sur la base configurée (lecture seule)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requetes', type=int, default=500, help="Requêtes simulées par mode.")
+        parser.add_argument('--base', default=DEFAULT_DB_ALIAS, help="Alias de la base mesurée.")
+        parser.add_argument('--sortie', help="Fichier JSON des résultats.")
+
+    def handle(self, *args, **options):
+        if options['base'] not in connections:
+            raise CommandError(f"Base inconnue : {options['base']}.")
+        connexion = connections[options['base']]
+        reglages_origine = {
+            'CONN_MAX_AGE': connexion.settings_dict['CONN_MAX_AGE'],
+            'OPTIONS': dict(connexion.settings_dict['OPTIONS']),
+        }
+
+        resultats = {}
+        try:
+            for mode, reglages in MODES.items():
+                if 'pool' in reglages and not _pool_disponible(connexion):
+                    self.stdout.write(f"{mode:<18} ignoré (PostgreSQL et psycopg[pool] requis)")
+                    continue
+                self.configurer(connexion, reglages)
+                resultats[mode] = self.mesurer(connexion, options['base'], options['requetes'])
+                self.stdout.write(
+                    f"{mode:<18} médiane {resultats[mode]['mediane_ms']:>7.3f} ms   "
+                    f"p95 {resultats[mode]['p95_ms']:>7.3f} ms   connexions ouvertes {resultats[mode]['connexions']}"
+                )
+        finally:
+            self.configurer(connexion, reglages_origine)
+
+        if 'sans_persistance' in resultats:
+            reference = resultats['sans_persistance']['mediane_ms']
+            for mode, resultat in resultats.items():
+                resultat['gain_ms'] = round(reference - resultat['mediane_ms'], 3)
+
+        if options['sortie']:
+            with open(options['sortie'], 'w', encoding='utf-8') as fichier:
+                json.dump({'base': connexion.vendor, 'requetes': options['requetes'], 'modes': resultats},
+                          fichier, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS("Mesure terminée."))
+
+    def configurer(self, connexion, reglages):
+        connexion.close()
+        if hasattr(connexion, 'close_pool'):
+            connexion.close_pool()
+        options = {cle: valeur for cle, valeur in connexion.settings_dict['OPTIONS'].items() if cle != 'pool'}
+        if 'pool' in reglages:
+            options['pool'] = reglages['pool']
+        connexion.settings_dict['OPTIONS'] = reglages.get('OPTIONS', options)
+        connexion.settings_dict['CONN_MAX_AGE'] = reglages['CONN_MAX_AGE']
+
+    def mesurer(self, connexion, alias, nombre):
+        """
+        Rejoue le cycle d'une requête HTTP : signal de début, lecture d'une page
+        du catalogue, signal de fin (qui ferme ou conserve la connexion).
+        """
+        durees, connexions = [], 0
+        for i in range(nombre + 1):
+            debut = time.perf_counter()
+            request_started.send(sender=WSGIHandler)
+            nouvelle = connexion.connection is None
+            list(Produit.objects.using(alias).order_by('-cree_le', '-id').values_list('id', flat=True)[:24])
+            request_finished.send(sender=WSGIHandler)
+            if i:  # la première requête ouvre la connexion ou le pool dans tous les modes
+                durees.append((time.perf_counter() - debut) * 1000)
+                connexions += nouvelle
+        if connexion.settings_dict['OPTIONS'].get('pool'):
+            # Les emprunts au pool ne sont pas des ouvertures : on compte les connexions réelles
+            connexions = connexion.pool.get_stats().get('connections_num', 0)
+        durees.sort()
+        return {
+            'mediane_ms': round(statistics.median(durees), 3),
+            'p95_ms': round(durees[int(len(durees) * 0.95) - 1], 3),
+            'connexions': connexions,
+        }
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.diffusion import canal_utilisateur, get_diffusion
+
+
+class ConnexionSSE:
+    """Client HTTP minimal branché directement sur l'application ASGI (sans réseau)."""
+
+    def __init__(self, application, chemin, entetes):
+        self.messages = asyncio.Queue()
+        self.fermeture = asyncio.Event()
+        self.corps = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': chemin, 'raw_path': chemin.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver')] + [(cle.encode(), valeur.encode()) for cle, valeur in entetes],
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        self.tache = asyncio.create_task(application(scope, self.recevoir, self.messages.put))
+
+    async def recevoir(self):
+        if self.corps:
+            return self.corps.pop()
+        await self.fermeture.wait()
+        return {'type': 'http.disconnect'}
+
+    async def ouvrir(self):
+        debut = await self.messages.get()
+        if debut['status'] != 200:
+            raise CommandError(f"Flux refusé : statut {debut['status']}.")
+        await self.messages.get()  # directive retry
+
+    async def evenement(self):
+        while True:
+            message = await self.messages.get()
+            if not message['body'].startswith(b':'):
+                return message['body']
+
+    async def fermer(self):
+        self.fermeture.set()
+        await self.tache
+
+
+class Command(BaseCommand):
+    help = (
+        "Ouvre de nombreux flux d'évènements SSE inactifs sur l'application ASGI, dans un seul processus, "
+        "et mesure la mémoire par connexion et la latence de diffusion d'un évènement à tous."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connexions', type=int, default=2000)
+        parser.add_argument('--diffusions', type=int, default=5, help="Évènements envoyés à toutes les connexions.")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.mesurer(options['connexions'], options['diffusions']))
+
+    async def mesurer(self, nombre, diffusions):
+        application = get_asgi_application()
+        chemin = reverse('flux-evenements')
+        # Jetons construits sans base : le flux ne lit que l'identifiant qu'ils contiennent
+        jetons = []
+        for utilisateur_id in range(1, nombre + 1):
+            jeton = AccessToken()
+            jeton[jwt_settings.USER_ID_CLAIM] = utilisateur_id
+            jetons.append(str(jeton))
+
+        tracemalloc.start()
+        memoire_avant = tracemalloc.get_traced_memory()[0]
+        debut = time.perf_counter()
+        connexions = [ConnexionSSE(application, chemin, [('authorization', f'Bearer {jeton}')]) for jeton in jetons]
+        await asyncio.gather(*(connexion.ouvrir() for connexion in connexions))
+        ouverture = time.perf_counter() - debut
+        par_connexion = (tracemalloc.get_traced_memory()[0] - memoire_avant) / nombre
+        tracemalloc.stop()
+        self.stdout.write(f"{nombre} connexions ouvertes en {ouverture:.2f} s, ~{par_connexion / 1024:.1f} Kio chacune.")
+
+        diffusion = get_diffusion()
+        latences = []
+        for i in range(diffusions):
+            debut = time.perf_counter()
+            for utilisateur_id in range(1, nombre + 1):
+                diffusion.publier(canal_utilisateur(utilisateur_id), {'evenement': 'statut_commande',
+                                                                      'donnees': {'id': i, 'statut': 'livree'}})
+            corps = await asyncio.gather(*(connexion.evenement() for connexion in connexions))
+            latences.append((time.perf_counter() - debut) * 1000)
+            if any(json.loads(c.split(b'data: ', 1)[1])['id'] != i for c in corps):
+                raise CommandError("Évènement reçu dans le désordre.")
+        self.stdout.write(
+            f"Diffusion à toutes les connexions : médiane {statistics.median(latences):.1f} ms, "
+            f"max {max(latences):.1f} ms ({statistics.median(latences) * 1000 / nombre:.1f} µs par connexion)."
+        )
+
+        await asyncio.gather(*(connexion.fermer() for connexion in connexions))
+        restants = sum(len(abonnes) for abonnes in getattr(diffusion, 'abonnes', {}).values())
+        if restants:
+            raise CommandError(f"{restants} abonnement(s) non libéré(s) après déconnexion.")
+        self.stdout.write(self.style.SUCCESS("Toutes les connexions ont été libérées."))
@@ -0,0 +1,162 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from benchmarks.donnees import base_de_test, creer_jeu_de_donnees
+from benchmarks.scenarios import SCENARIOS
+
+BUDGETS_PAR_DEFAUT = Path(__file__).resolve().parents[2] / 'budgets.json'
+
+
+def _version_du_code():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure chaque endpoint (temps, requêtes SQL, taille de réponse) sur une base de test "
+        "remplie d'un jeu de données réaliste, et échoue si un budget est dépassé."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repetitions', type=int, default=5, help="Mesures par endpoint, après échauffement ; cache vidé avant chacune.")
+        parser.add_argument('--produits', type=int, default=2000)
+        parser.add_argument('--vendeurs', type=int, default=20)
+        parser.add_argument('--acheteurs', type=int, default=200)
+        parser.add_argument('--commandes', type=int, default=3000)
+        parser.add_argument('--conversations', type=int, default=1000)
+        parser.add_argument('--graine', type=int, default=42, help="Graine du générateur de données.")
+        parser.add_argument('--budgets', default=str(BUDGETS_PAR_DEFAUT), help="Fichier JSON des budgets.")
+        parser.add_argument('--tolerance', type=float, default=1.0,
+                            help="Multiplicateur appliqué aux budgets de durée (machines lentes, CI).")
+        parser.add_argument('--sortie', default='benchmark_resultats.json', help="Fichier JSON des résultats.")
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help="Ne mesure que ce scénario (option répétable).")
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options['scenarios']:
+            scenarios = [s for s in SCENARIOS if s.nom in options['scenarios']]
+            inconnus = set(options['scenarios']) - {s.nom for s in scenarios}
+            if inconnus:
+                raise CommandError(f"Scénario inconnu : {', '.join(sorted(inconnus))}.")
+
+        with open(options['budgets'], encoding='utf-8') as fichier:
+            budgets = json.load(fichier)
+
+        with base_de_test():
+            debut = time.perf_counter()
+            jeu = creer_jeu_de_donnees(
+                produits=options['produits'], vendeurs=options['vendeurs'],
+                acheteurs=options['acheteurs'], commandes=options['commandes'],
+                conversations=options['conversations'], graine=options['graine'],
+            )
+            self.stdout.write(f"Jeu de données créé en {time.perf_counter() - debut:.1f} s.")
+            resultats = [self.mesurer(scenario, jeu, options['repetitions']) for scenario in scenarios]
+
+        depassements = []
+        for resultat in resultats:
+            budget = {**budgets['defaut'], **budgets['scenarios'].get(resultat['scenario'], {})}
+            budget.pop('note', None)
+            resultat['budget'] = budget
+            resultat['depassements'] = []
+            if resultat['requetes'] > budget['requetes']:
+                resultat['depassements'].append(f"{resultat['requetes']} requêtes > {budget['requetes']}")
+            if resultat['duree_mediane_ms'] > budget['duree_ms'] * options['tolerance']:
+                resultat['depassements'].append(
+                    f"{resultat['duree_mediane_ms']} ms > {budget['duree_ms'] * options['tolerance']:g} ms"
+                )
+            if resultat['depassements']:
+                depassements.append(f"{resultat['scenario']} : {', '.join(resultat['depassements'])}")
+            self.afficher(resultat)
+
+        rapport = {
+            'date': timezone.now().isoformat(),
+            'commit': _version_du_code(),
+            'base': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'repetitions': options['repetitions'],
+            'jeu_de_donnees': {cle: options[cle] for cle in ('produits', 'vendeurs', 'acheteurs', 'commandes', 'graine')},
+            'resultats': resultats,
+        }
+        with open(options['sortie'], 'w', encoding='utf-8') as fichier:
+            json.dump(rapport, fichier, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Résultats écrits dans {options['sortie']}.")
+
+        if depassements:
+            raise CommandError("Budgets dépassés :\n  " + "\n  ".join(depassements))
+        self.stdout.write(self.style.SUCCESS(f"{len(resultats)} endpoint(s) dans leur budget."))
+
+    def mesurer(self, scenario, jeu, repetitions):
+        client = Client()
+        durees, requetes = [], []
+        # Les appels d'échauffement (connexions, caches internes de Django) ne sont pas comptés.
+        # Le cache est vidé avant chaque appel, sauf pour un scénario cache_chaud : son second
+        # échauffement y range la réponse (le premier n'y pose que les versions des étiquettes).
+        echauffements = 2 if scenario.cache_chaud else 1
+        for i in range(repetitions + echauffements):
+            url = scenario.url(jeu, i)
+            donnees = scenario.donnees(jeu, i) if scenario.donnees else None
+            extra = {}
+            if scenario.utilisateur:
+                extra['HTTP_AUTHORIZATION'] = f'Bearer {jeu.jeton_d_acces(scenario.utilisateur)}'
+            if donnees is not None and scenario.format == 'json':
+                extra['content_type'] = 'application/json'
+            appel = getattr(client, scenario.methode)
+            if not scenario.cache_chaud:
+                cache.clear()
+
+            with ExitStack() as pile:
+                captures = [pile.enter_context(CaptureQueriesContext(base)) for base in connections.all()]
+                debut = time.perf_counter()
+                reponse = appel(url, donnees, **extra) if donnees is not None else appel(url, **extra)
+                duree = time.perf_counter() - debut
+
+            if reponse.status_code != scenario.statut:
+                raise CommandError(
+                    f"{scenario.nom} : statut {reponse.status_code} au lieu de {scenario.statut} "
+                    f"({reponse.content[:300]!r})"
+                )
+            if i >= echauffements:
+                durees.append(duree * 1000)
+                requetes.append(sum(len(capture) for capture in captures))
+
+        durees.sort()
+        return {
+            'scenario': scenario.nom,
+            'methode': scenario.methode.upper(),
+            'url': url,
+            'statut': reponse.status_code,
+            'requetes': max(requetes),
+            'duree_mediane_ms': round(statistics.median(durees), 2),
+            'duree_max_ms': round(durees[-1], 2),
+            'taille_octets': len(reponse.content),
+        }
+
+    def afficher(self, resultat):
+        ligne = (
+            f"{resultat['scenario']:<30} {resultat['methode']:<5} {resultat['requetes']:>4} req "
+            f"{resultat['duree_mediane_ms']:>9.2f} ms {resultat['taille_octets']:>9} o"
+        )
+        if resultat['depassements']:
+            self.stdout.write(self.style.ERROR(f"{ligne}  {', '.join(resultat['depassements'])}"))
+        else:
+            self.stdout.write(ligne)
@@ -0,0 +1,105 @@
+import io
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.donnees import base_de_test, creer_jeu_de_donnees
+from le_djassa.parsers import ORJSONParser
+from le_djassa.renderers import ORJSONRenderer, orjson
+from orders.models import Commande
+from orders.serializers import CommandeVendeurSerializer
+from products.serializers import ProduitSerializer
+from products.models import Produit
+
+
+def _page(resultats):
+    """Enveloppe d'une page paginée par curseur, comme la renvoient les vues."""
+    return {'next': 'http://testserver/api/produits/?cursor=cD0yMDI0', 'previous': None, 'results': resultats}
+
+
+def _chronometrer(fonction, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return round(statistics.median(durees), 3)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le rendu et la lecture JSON de DRF à ceux d'orjson sur des pages du catalogue "
+        "(ProduitList) et du flux vendeur (CommandesVendeurView), et vérifie que les sorties sont identiques."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailles', type=int, nargs='+', default=[24, 100, 1000],
+                            help="Nombre d'éléments par page mesurée.")
+        parser.add_argument('--repetitions', type=int, default=50)
+        parser.add_argument('--graine', type=int, default=42, help="Graine du générateur de données.")
+        parser.add_argument('--sortie', help="Fichier JSON des résultats.")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson n'est pas installé : ORJSONRenderer se replie sur le rendu de DRF.")
+
+        taille_max = max(options['tailles'])
+        resultats = []
+        with base_de_test():
+            jeu = creer_jeu_de_donnees(produits=taille_max, vendeurs=1, acheteurs=50, commandes=taille_max,
+                                       graine=options['graine'])
+            request = APIRequestFactory().get('/api/produits/')
+            produits = list(Produit.objects.order_by('-cree_le', '-id')[:taille_max])
+            commandes = list(Commande.objects.filter(vendeur=jeu.vendeur).select_related('acheteur', 'produit')
+                             .order_by('-cree_le', '-id')[:taille_max])
+
+            for taille in sorted(options['tailles']):
+                charges = {
+                    'produits': _page(ProduitSerializer(produits[:taille], many=True,
+                                                        context={'request': request}).data),
+                    'commandes_vendeur': _page(CommandeVendeurSerializer(commandes[:taille], many=True).data),
+                }
+                for nom, donnees in charges.items():
+                    resultats.append(self.mesurer(nom, taille, donnees, options['repetitions']))
+
+        for resultat in resultats:
+            self.stdout.write(
+                f"{resultat['charge']:<18} {resultat['elements']:>5} él. {resultat['octets']:>9} o   "
+                f"rendu {resultat['rendu_drf_ms']:>8.3f} → {resultat['rendu_orjson_ms']:>7.3f} ms "
+                f"(x{resultat['gain_rendu']:<5})   lecture {resultat['lecture_drf_ms']:>8.3f} → "
+                f"{resultat['lecture_orjson_ms']:>7.3f} ms (x{resultat['gain_lecture']})"
+            )
+
+        if options['sortie']:
+            with open(options['sortie'], 'w', encoding='utf-8') as fichier:
+                json.dump({'orjson': orjson.__version__, 'repetitions': options['repetitions'],
+                           'resultats': resultats}, fichier, ensure_ascii=False, indent=2)
+
+        differences = [f"{r['charge']} ({r['elements']})" for r in resultats if not r['identique']]
+        if differences:
+            raise CommandError(f"Sorties différentes du rendu de DRF : {', '.join(differences)}.")
+        self.stdout.write(self.style.SUCCESS("Sorties identiques au rendu de DRF."))
+
+    def mesurer(self, nom, taille, donnees, repetitions):
+        drf, rapide = JSONRenderer(), ORJSONRenderer()
+        contenu = drf.render(donnees)
+        contexte = {'encoding': 'utf-8'}
+        return {
+            'charge': nom,
+            'elements': taille,
+            'octets': len(contenu),
+            'identique': rapide.render(donnees) == contenu,
+            'rendu_drf_ms': (rendu_drf := _chronometrer(lambda: drf.render(donnees), repetitions)),
+            'rendu_orjson_ms': (rendu_orjson := _chronometrer(lambda: rapide.render(donnees), repetitions)),
+            'gain_rendu': round(rendu_drf / rendu_orjson, 1),
+            'lecture_drf_ms': (lecture_drf := _chronometrer(
+                lambda: JSONParser().parse(io.BytesIO(contenu), parser_context=contexte), repetitions)),
+            'lecture_orjson_ms': (lecture_orjson := _chronometrer(
+                lambda: ORJSONParser().parse(io.BytesIO(contenu), parser_context=contexte), repetitions)),
+            'gain_lecture': round(lecture_drf / lecture_orjson, 1),
+        }
@@ -0,0 +1,92 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.donnees import base_de_test, creer_jeu_de_donnees
+from orders.models import Commande
+from orders.serializers import HistoriqueCommandeSerializer, HistoriqueCommandeValeursSerializer
+from products.models import Produit
+from products.serializers import ProduitSerializer, ProduitValeursSerializer
+
+ORDRE = ('-cree_le', '-id')
+
+
+def _cas(taille, request):
+    """(nom, serializer d'origine et son queryset, serializer de lecture et son queryset, contexte)."""
+    produits = Produit.objects.order_by(*ORDRE)[:taille]
+    commandes = Commande.objects.order_by(*ORDRE)[:taille]
+    contexte = {'request': request}
+    return [
+        ('produits', ProduitSerializer, produits,
+         ProduitValeursSerializer, ProduitValeursSerializer.preparer(produits), contexte),
+        ('historique', HistoriqueCommandeSerializer, commandes.select_related('produit'),
+         HistoriqueCommandeValeursSerializer, HistoriqueCommandeValeursSerializer.preparer(commandes), {}),
+    ]
+
+
+def _chronometrer(fonction, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return round(statistics.median(durees), 2)
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie que les serializers de lecture (.values()) produisent exactement le JSON des serializers "
+        "d'origine, et compare leurs temps sur des pages de liste, requêtes SQL comprises."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailles', type=int, nargs='+', default=[24, 1000],
+                            help="Nombre de lignes par page mesurée.")
+        parser.add_argument('--repetitions', type=int, default=10)
+        parser.add_argument('--graine', type=int, default=42, help="Graine du générateur de données.")
+        parser.add_argument('--sortie', help="Fichier JSON des résultats.")
+
+    def handle(self, *args, **options):
+        taille_max = max(options['tailles'])
+        request = APIRequestFactory().get('/api/produits/')
+        resultats = []
+        with base_de_test():
+            creer_jeu_de_donnees(produits=taille_max, vendeurs=10, acheteurs=50, commandes=taille_max,
+                                 graine=options['graine'])
+            for taille in sorted(options['tailles']):
+                for nom, origine, queryset, lecture, valeurs, contexte in _cas(taille, request):
+                    resultats.append(self.mesurer(nom, taille, options['repetitions'],
+                                                  lambda: origine(queryset.all(), many=True, context=contexte).data,
+                                                  lambda: lecture(valeurs.all(), many=True, context=contexte).data))
+
+        for resultat in resultats:
+            self.stdout.write(
+                f"{resultat['cas']:<18} {resultat['lignes']:>5} lignes   "
+                f"{resultat['origine_ms']:>9.2f} → {resultat['lecture_ms']:>8.2f} ms   x{resultat['gain']}"
+                + ("" if resultat['identique'] else "   SORTIE DIFFÉRENTE")
+            )
+
+        if options['sortie']:
+            with open(options['sortie'], 'w', encoding='utf-8') as fichier:
+                json.dump({'repetitions': options['repetitions'], 'resultats': resultats},
+                          fichier, ensure_ascii=False, indent=2)
+
+        differences = [f"{r['cas']} ({r['lignes']})" for r in resultats if not r['identique']]
+        if differences:
+            raise CommandError(f"Sorties différentes des serializers d'origine : {', '.join(differences)}.")
+        self.stdout.write(self.style.SUCCESS("Sorties identiques aux serializers d'origine."))
+
+    def mesurer(self, nom, taille, repetitions, origine, lecture):
+        rendu = JSONRenderer()
+        return {
+            'cas': nom,
+            'lignes': taille,
+            'identique': rendu.render(origine()) == rendu.render(lecture()),
+            'origine_ms': (origine_ms := _chronometrer(origine, repetitions)),
+            'lecture_ms': (lecture_ms := _chronometrer(lecture, repetitions)),
+            'gain': round(origine_ms / lecture_ms, 1),
+        }
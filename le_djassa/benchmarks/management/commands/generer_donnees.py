@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.generateur import MOT_DE_PASSE, GenerateurMarche
+from le_djassa.routage import sur_primaire
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un marché synthétique (utilisateurs, produits, images, commandes et historique des "
+        "statuts) de façon déterministe à partir d'une graine. Réservé aux bases de test de charge."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--utilisateurs', type=int, default=200000)
+        parser.add_argument('--part-vendeurs', type=float, default=0.05,
+                            help="Proportion de vendeurs parmi les utilisateurs.")
+        parser.add_argument('--produits', type=int, default=1000000)
+        parser.add_argument('--images-par-produit', type=int, default=3, help="Maximum d'images par produit.")
+        parser.add_argument('--commandes', type=int, default=500000)
+        parser.add_argument('--jours', type=int, default=365, help="Période couverte par les dates générées.")
+        parser.add_argument('--graine', type=int, default=1)
+        parser.add_argument('--lot', type=int, default=10000, help="Lignes par insertion (COPY ou INSERT).")
+        parser.add_argument('--oui', action='store_true', help="Ne pas demander de confirmation.")
+
+    def handle(self, *args, **options):
+        if not 0 < options['part_vendeurs'] < 1:
+            raise CommandError("--part-vendeurs doit être compris entre 0 et 1.")
+        if options['images_par_produit'] < 1:
+            raise CommandError("--images-par-produit doit valoir au moins 1.")
+
+        base = connection.settings_dict['NAME']
+        if not options['oui']:
+            reponse = input(f"Ajouter des données synthétiques à la base « {base} » ? [o/N] ")
+            if reponse.strip().lower() not in ('o', 'oui'):
+                raise CommandError("Génération annulée.")
+
+        generateur = GenerateurMarche(
+            graine=options['graine'], taille_lot=options['lot'], jours=options['jours'],
+            rapport=self.stdout.write,
+        )
+        # Les id de départ sont lus sur la base principale, jamais sur un réplica en retard
+        with sur_primaire():
+            generateur.generer(
+                utilisateurs=options['utilisateurs'],
+                part_vendeurs=options['part_vendeurs'],
+                produits=options['produits'],
+                images_par_produit=options['images_par_produit'],
+                commandes=options['commandes'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(generateur.vendeurs)} vendeur(s), {len(generateur.acheteurs)} acheteur(s), "
+            f"{len(generateur.produits)} produit(s), {generateur.commandes} commande(s) générés "
+            f"(mot de passe commun : {MOT_DE_PASSE})."
+        ))
@@ -0,0 +1,144 @@
+"""
+Scénarios du benchmark : une requête représentative par route de
+products.urls, orders.urls et users.urls.
+
+Chaque scénario construit son URL et son corps à partir du jeu de données et
+du numéro de répétition, ce qui permet de rejouer les écritures (nouvelle
+commande à traiter, nouvel utilisateur à inscrire...) sans conflit.
+
+Le cache est vidé avant chaque mesure, pour compter les requêtes de la vue
+elle-même ; les scénarios ``cache_chaud`` mesurent au contraire la réponse
+servie par le cache du catalogue (products.cache).
+"""
+import io
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+from orders.compteurs import ajouter_commandes
+from orders.models import Commande, Conversation
+from users.models import PasswordResetCode
+
+
+@dataclass
+class Scenario:
+    nom: str
+    methode: str
+    url: Callable
+    utilisateur: Optional[str] = None  # 'vendeur', 'acheteur' ou None (anonyme)
+    donnees: Optional[Callable] = None
+    format: str = 'json'
+    statut: int = 200
+    cache_chaud: bool = False
+
+
+def _image_jpeg():
+    tampon = io.BytesIO()
+    Image.new('RGB', (800, 600), (200, 120, 40)).save(tampon, 'JPEG')
+    return SimpleUploadedFile('benchmark.jpg', tampon.getvalue(), content_type='image/jpeg')
+
+
+def _commande_a_traiter(jeu, i):
+    commande = Commande.objects.create(
+        acheteur=jeu.acheteur, produit=jeu.produit, vendeur=jeu.vendeur, quantite=1,
+        montant_total=jeu.produit.prix, statut='en_attente', methode_paiement='espece_sur_place',
+    )
+    ajouter_commandes([commande])
+    return reverse('traiter-commande', args=[commande.pk])
+
+
+def _commande_de_l_acheteur(jeu):
+    return Commande.objects.filter(acheteur=jeu.acheteur, vendeur=jeu.vendeur).order_by('pk').first()
+
+
+def _conversation_de_test(jeu):
+    conversation, _ = Conversation.objects.get_or_create(acheteur=jeu.acheteur, produit=jeu.produit,
+                                                         defaults={'vendeur': jeu.vendeur})
+    return conversation.pk
+
+
+def _code_de_reinitialisation(jeu):
+    return PasswordResetCode.objects.create(user=jeu.acheteur).code
+
+
+SCENARIOS = [
+    # products.urls
+    Scenario('produit-list', 'get', lambda jeu, i: reverse('produit-list')),
+    Scenario('produit-list-page-max', 'get', lambda jeu, i: reverse('produit-list') + '?page_size=100'),
+    Scenario('produit-list-cache', 'get', lambda jeu, i: reverse('produit-list'), cache_chaud=True),
+    Scenario('produit-list-owner', 'get', lambda jeu, i: reverse('produit-list-owner'), 'vendeur'),
+    Scenario('produit-list-owner-recherche', 'get',
+             lambda jeu, i: reverse('produit-list-owner') + f'?q={jeu.produit.nom.split()[0]}', 'vendeur'),
+    Scenario('produit-create', 'post', lambda jeu, i: reverse('produit-create'), 'vendeur',
+             lambda jeu, i: {
+                 'nom': f'Produit benchmark {i}', 'description': 'Créé par le benchmark', 'prix': '15000',
+                 'etat': 'neuf', 'localisation': 'Abidjan', 'categorie': jeu.categorie.pk, 'qte_stock': 3,
+                 'uploaded_images': [_image_jpeg()],
+             }, format='multipart', statut=201),
+    Scenario('produit-detail', 'get', lambda jeu, i: reverse('produit-detail', args=[jeu.produit.pk])),
+    Scenario('produit-detail-cache', 'get', lambda jeu, i: reverse('produit-detail', args=[jeu.produit.pk]),
+             cache_chaud=True),
+    Scenario('etats', 'get', lambda jeu, i: reverse('etats'), 'vendeur'),
+    Scenario('categorie-list', 'get', lambda jeu, i: reverse('categorie-list')),
+    Scenario('search_products', 'get', lambda jeu, i: reverse('search_products') + '?q=samsung'),
+    Scenario('search_products-filtres', 'get',
+             lambda jeu, i: reverse('search_products') + f'?q=samsung&category_id={jeu.categorie.pk}'
+                                                         f'&etat=neuf,usage&prix_max=500000'),
+    Scenario('produits-count', 'get', lambda jeu, i: reverse('produits-count'), 'vendeur'),
+
+    # orders.urls
+    Scenario('create-commande', 'post', lambda jeu, i: reverse('create-commande'), 'acheteur',
+             lambda jeu, i: [
+                 {'produit': jeu.produit.pk, 'quantity': 1, 'montant_total': str(jeu.produit.prix),
+                  'adresse_livraison': 'Cocody, Abidjan'},
+             ] * 3, statut=201),
+    Scenario('commandes-vendeur', 'get', lambda jeu, i: reverse('commandes-vendeur'), 'vendeur'),
+    Scenario('commandes-vendeur-filtres', 'get',
+             lambda jeu, i: reverse('commandes-vendeur') + '?statut=en_attente,en_traitement', 'vendeur'),
+    Scenario('traiter-commande', 'post', _commande_a_traiter, 'vendeur',
+             lambda jeu, i: {'action': 'en_traitement'}),
+    Scenario('statut-commande', 'get',
+             lambda jeu, i: reverse('statut-commande', args=[_commande_de_l_acheteur(jeu).pk]), 'vendeur'),
+    Scenario('commande-detail-client', 'get',
+             lambda jeu, i: reverse('commande-detail-client', args=[_commande_de_l_acheteur(jeu).pk]), 'acheteur'),
+    Scenario('commandes-en-attente-count', 'get', lambda jeu, i: reverse('commandes-en-attente-count'), 'vendeur'),
+    Scenario('historique-commandes', 'get', lambda jeu, i: reverse('historique-commandes'), 'acheteur'),
+    Scenario('conversations', 'get', lambda jeu, i: reverse('conversations'), 'acheteur'),
+    Scenario('conversations-page-max', 'get', lambda jeu, i: reverse('conversations') + '?page_size=100', 'acheteur'),
+    Scenario('conversations-vendeur', 'get', lambda jeu, i: reverse('conversations') + '?role=vendeur', 'vendeur'),
+    Scenario('message-envoi', 'post', lambda jeu, i: reverse('messages-conversation', args=[_conversation_de_test(jeu)]),
+             'vendeur', lambda jeu, i: {'contenu': f'Oui, toujours disponible ({i}).'}, statut=201),
+    Scenario('messages-conversation', 'get',
+             lambda jeu, i: reverse('messages-conversation', args=[_conversation_de_test(jeu)]), 'acheteur'),
+    Scenario('conversation-lue', 'post', lambda jeu, i: reverse('conversation-lue', args=[_conversation_de_test(jeu)]),
+             'acheteur', lambda jeu, i: {}),
+
+    # users.urls
+    Scenario('user-register', 'post', lambda jeu, i: reverse('user-register'), None,
+             lambda jeu, i: {
+                 'username': f'inscrit{i}', 'email': f'inscrit{i}@ledjassa.test',
+                 'password': jeu.mot_de_passe, 'password2': jeu.mot_de_passe, 'adresse': 'Abidjan',
+             }, statut=201),
+    Scenario('token_obtain_pair', 'post', lambda jeu, i: reverse('token_obtain_pair'), None,
+             lambda jeu, i: {'username': jeu.acheteur.username, 'password': jeu.mot_de_passe}),
+    Scenario('token_refresh', 'post', lambda jeu, i: reverse('token_refresh'), None,
+             lambda jeu, i: {'refresh': jeu.jeton_de_rafraichissement()}),
+    Scenario('user-profile', 'get', lambda jeu, i: reverse('user-profile'), 'vendeur'),
+    Scenario('user-detail-update_buyer', 'get', lambda jeu, i: reverse('user-detail-update_buyer'), 'acheteur'),
+    Scenario('user-role', 'get', lambda jeu, i: reverse('user-role'), 'acheteur'),
+    Scenario('check-access', 'get', lambda jeu, i: reverse('check-access', args=['vendeur']), 'vendeur'),
+    Scenario('user-initial', 'get', lambda jeu, i: reverse('user-initial'), 'acheteur'),
+    Scenario('request-reset-password', 'post', lambda jeu, i: reverse('request-reset-password'), None,
+             lambda jeu, i: {'email': jeu.acheteur.email}),
+    Scenario('reset-password-in-profile', 'put', lambda jeu, i: reverse('reset-password-in-profile'), 'acheteur',
+             lambda jeu, i: {'current_password': jeu.mot_de_passe, 'new_password': jeu.mot_de_passe,
+                             'confirm_password': jeu.mot_de_passe}),
+    Scenario('password-reset-confirm', 'post', lambda jeu, i: reverse('password-reset-confirm'), None,
+             lambda jeu, i: {'email': jeu.acheteur.email, 'code': str(_code_de_reinitialisation(jeu)),
+                             'newPassword': jeu.mot_de_passe}),
+    Scenario('reset-password', 'post', lambda jeu, i: reverse('reset-password'), None,
+             lambda jeu, i: {'code': str(_code_de_reinitialisation(jeu)), 'new_password': jeu.mot_de_passe}),
+]
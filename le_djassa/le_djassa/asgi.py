@@ -12,5 +12,40 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'le_djassa.settings')
+# Les settings désactivent les connexions persistantes sous ASGI (voir DB_POOL)
+os.environ.setdefault('SERVEUR_ASGI', 'True')
 
-application = get_asgi_application()
+application_django = get_asgi_application()
+
+# Importé une fois les applications chargées
+from orders.chat import application_chat, vider_tampon  # noqa: E402
+
+ROUTES_WEBSOCKET = {
+    '/ws/chat/': application_chat,
+}
+
+
+async def cycle_de_vie(receive, send):
+    """Démarrage et arrêt du serveur : à l'arrêt, les messages du chat en attente sont écrits."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await vider_tampon()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """HTTP par Django ; WebSocket par les routes ci-dessus."""
+    if scope['type'] == 'websocket':
+        route = ROUTES_WEBSOCKET.get(scope['path'])
+        if route is None:
+            await receive()
+            await send({'type': 'websocket.close'})
+            return
+        return await route(scope, receive, send)
+    if scope['type'] == 'lifespan':
+        return await cycle_de_vie(receive, send)
+    return await application_django(scope, receive, send)
@@ -0,0 +1,139 @@
+"""
+Compression des réponses (brotli si le module est installé, sinon gzip).
+
+Seules les réponses textuelles (JSON, HTML, texte...) d'au moins
+COMPRESSION_TAILLE_MIN octets sont compressées : les médias, les fichiers
+statiques et les contenus déjà compressés (images, archives, PDF, réponse
+portant déjà un Content-Encoding) passent tels quels. Les réponses en flux
+sont compressées bloc par bloc, chaque bloc étant envoyé sans attendre le
+suivant (flux d'événements...).
+"""
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TYPES_COMPRESSIBLES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+SUFFIXES_COMPRESSIBLES = ('+json', '+xml')
+
+
+def _gzip(contenu, niveau):
+    return gzip.compress(contenu, compresslevel=niveau, mtime=0)
+
+
+def _flux_gzip(niveau):
+    compresseur = zlib.compressobj(niveau, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # en-tête gzip
+    return (lambda bloc: compresseur.compress(bloc) + compresseur.flush(zlib.Z_SYNC_FLUSH)), compresseur.flush
+
+
+def _brotli(contenu, niveau):
+    return brotli.compress(contenu, quality=niveau)
+
+
+def _flux_brotli(niveau):
+    compresseur = brotli.Compressor(quality=niveau)
+    return (lambda bloc: compresseur.process(bloc) + compresseur.flush()), compresseur.finish
+
+
+# Par ordre de préférence à qualité égale : (compression d'un contenu, compresseur de flux)
+ENCODAGES = {'br': (_brotli, _flux_brotli)} if brotli is not None else {}
+ENCODAGES['gzip'] = (_gzip, _flux_gzip)
+
+
+def encodage_accepte(accept_encoding, disponibles=ENCODAGES):
+    """Encodage de `disponibles` préféré par le client d'après Accept-Encoding, ou None."""
+    qualites = {}
+    for element in accept_encoding.split(','):
+        nom, _, parametres = element.partition(';')
+        qualite = 1.0
+        parametres = parametres.strip()
+        if parametres.startswith('q='):
+            try:
+                qualite = float(parametres[2:])
+            except ValueError:
+                qualite = 0.0
+        qualites[nom.strip().lower()] = qualite
+
+    choix, meilleure = None, 0.0
+    for encodage in disponibles:
+        qualite = qualites.get(encodage, qualites.get('*', 0.0))
+        if qualite > meilleure:
+            choix, meilleure = encodage, qualite
+    return choix
+
+
+def compressible(content_type):
+    type_ = content_type.split(';', 1)[0].strip().lower()
+    return type_.startswith(TYPES_COMPRESSIBLES) or type_.endswith(SUFFIXES_COMPRESSIBLES)
+
+
+class CompressionMiddleware:
+    """À placer avant tout middleware qui lit ou modifie le corps des réponses."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.taille_min = settings.COMPRESSION_TAILLE_MIN
+        self.niveaux = {'br': settings.COMPRESSION_NIVEAU_BROTLI, 'gzip': settings.COMPRESSION_NIVEAU_GZIP}
+        self.chemins_exclus = tuple(url for url in (settings.MEDIA_URL, settings.STATIC_URL)
+                                    if url and url.startswith('/'))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            response.has_header('Content-Encoding')
+            or not compressible(response.get('Content-Type', ''))
+            or request.path.startswith(self.chemins_exclus)
+            or (not response.streaming and len(response.content) < self.taille_min)
+        ):
+            return response
+
+        # La réponse dépend désormais d'Accept-Encoding, même pour un client qui ne compresse pas
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodage = encodage_accepte(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encodage is None:
+            return response
+
+        compresser, flux = ENCODAGES[encodage]
+        niveau = self.niveaux[encodage]
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compresser_flux_async(response.streaming_content, flux(niveau))
+            else:
+                response.streaming_content = self._compresser_flux(response.streaming_content, flux(niveau))
+            del response.headers['Content-Length']
+        else:
+            contenu = compresser(response.content, niveau)
+            if len(contenu) >= len(response.content):
+                return response
+            response.content = contenu
+            response.headers['Content-Length'] = str(len(contenu))
+
+        # Le corps n'est plus identique octet pour octet : l'ETag devient faible, comme avec GZipMiddleware
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encodage
+        return response
+
+    @staticmethod
+    def _compresser_flux(blocs, compresseur):
+        compresser_bloc, terminer = compresseur
+        for bloc in blocs:
+            if bloc:
+                yield compresser_bloc(bloc)
+        yield terminer()
+
+    @staticmethod
+    async def _compresser_flux_async(blocs, compresseur):
+        compresser_bloc, terminer = compresseur
+        async for bloc in blocs:
+            if bloc:
+                yield compresser_bloc(bloc)
+        yield terminer()
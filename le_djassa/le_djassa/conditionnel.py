@@ -0,0 +1,44 @@
+"""
+GET conditionnels (ETag / Last-Modified) pour les vues DRF.
+
+Le validateur est lu par une requête SQL minimale (une date de modification)
+avant tout chargement ou sérialisation : si le client a déjà la bonne version,
+la vue répond 304 sans corps.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def reponse_conditionnelle(derniere_modification):
+    """
+    Décore la méthode get() d'une vue DRF.
+
+    `derniere_modification(vue, request, *args, **kwargs)` retourne la date de
+    dernière modification de la ressource, ou None si elle est introuvable (la
+    vue répond alors normalement, en 404 en général). Les permissions de la vue
+    ont déjà été vérifiées à ce stade.
+    """
+    def decorateur(methode):
+        @wraps(methode)
+        def enveloppe(vue, request, *args, **kwargs):
+            modifie_le = derniere_modification(vue, request, *args, **kwargs)
+            if modifie_le is None:
+                return methode(vue, request, *args, **kwargs)
+
+            # Les URL d'images sont absolues et le format dépend de Accept : ils entrent dans l'ETag
+            brut = '|'.join([modifie_le.isoformat(), request.get_host(), request.META.get('HTTP_ACCEPT', '')])
+            etag = quote_etag(hashlib.md5(brut.encode()).hexdigest())
+            horodatage = int(modifie_le.timestamp())
+
+            response = get_conditional_response(request, etag=etag, last_modified=horodatage)
+            if response is None:
+                response = methode(vue, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(horodatage)
+            return response
+        return enveloppe
+    return decorateur
@@ -0,0 +1,216 @@
+"""
+Instrumentation des requêtes : latence, nombre et durée des requêtes SQL par
+route, détection des N+1, exposition au format texte Prometheus.
+
+Activée par ``INSTRUMENTATION_ACTIVE`` ; désactivée, le middleware se retire
+de la chaîne au démarrage (MiddlewareNotUsed) et ne coûte rien. Les mesures
+sont tenues par processus : chaque worker expose les siennes.
+"""
+import hmac
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+BORNES_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BORNES_SQL = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Empreinte d'une requête SQL : littéraux et listes de paramètres neutralisés
+_LITTERAUX = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTES = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+_ESPACES = re.compile(r'\s+')
+
+
+def empreinte_sql(sql):
+    sql = _LITTERAUX.sub('?', sql.replace('%s', '?'))
+    sql = _LISTES.sub('(?)', sql)
+    return _ESPACES.sub(' ', sql).strip()
+
+
+class Histogramme:
+    def __init__(self, bornes):
+        self.bornes = bornes
+        self.comptes = [0] * len(bornes)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, valeur):
+        for i, borne in enumerate(self.bornes):
+            if valeur <= borne:
+                self.comptes[i] += 1
+                break
+        self.somme += valeur
+        self.nombre += 1
+
+
+class Registre:
+    """Mesures agrégées par (route, méthode), et compteurs libres des autres modules."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        self.durees = defaultdict(lambda: Histogramme(BORNES_DUREE))
+        self.requetes_sql = defaultdict(lambda: Histogramme(BORNES_SQL))
+        self.duree_sql = defaultdict(float)
+        self.reponses = Counter()
+        self.n_plus_un = Counter()
+        self.compteurs = Counter()
+        self.aides = {}
+
+    def incrementer(self, nom, aide, **labels):
+        """Incrémente un compteur exposé tel quel, par ex. les succès du cache du catalogue."""
+        with self._lock:
+            self.aides[nom] = aide
+            self.compteurs[(nom, tuple(sorted(labels.items())))] += 1
+
+    def enregistrer(self, route, methode, statut, duree, mesure):
+        cle = (route, methode)
+        with self._lock:
+            self.durees[cle].observer(duree)
+            self.requetes_sql[cle].observer(mesure.nombre)
+            self.duree_sql[cle] += mesure.duree
+            self.reponses[(route, methode, str(statut))] += 1
+            if mesure.n_plus_un:
+                self.n_plus_un[cle] += 1
+
+    def exposer(self):
+        """Texte au format d'exposition Prometheus 0.0.4."""
+        with self._lock:
+            lignes = []
+            self._histogrammes(lignes, 'le_djassa_requete_duree_secondes',
+                               'Durée de traitement des requêtes HTTP.', self.durees)
+            self._histogrammes(lignes, 'le_djassa_requete_sql_nombre',
+                               'Nombre de requêtes SQL par requête HTTP.', self.requetes_sql)
+            lignes.append('# HELP le_djassa_requete_sql_duree_secondes_total Temps SQL cumulé.')
+            lignes.append('# TYPE le_djassa_requete_sql_duree_secondes_total counter')
+            for (route, methode), valeur in sorted(self.duree_sql.items()):
+                lignes.append(f'le_djassa_requete_sql_duree_secondes_total{_labels(route=route, methode=methode)} {valeur:.6f}')
+            lignes.append('# HELP le_djassa_reponses_total Réponses HTTP par code de statut.')
+            lignes.append('# TYPE le_djassa_reponses_total counter')
+            for (route, methode, statut), valeur in sorted(self.reponses.items()):
+                lignes.append(f'le_djassa_reponses_total{_labels(route=route, methode=methode, statut=statut)} {valeur}')
+            lignes.append('# HELP le_djassa_n_plus_un_suspects_total Requêtes HTTP répétant une même requête SQL.')
+            lignes.append('# TYPE le_djassa_n_plus_un_suspects_total counter')
+            for (route, methode), valeur in sorted(self.n_plus_un.items()):
+                lignes.append(f'le_djassa_n_plus_un_suspects_total{_labels(route=route, methode=methode)} {valeur}')
+            for nom, aide in sorted(self.aides.items()):
+                lignes.append(f'# HELP {nom} {aide}')
+                lignes.append(f'# TYPE {nom} counter')
+                for (nom_compteur, labels), valeur in sorted(self.compteurs.items()):
+                    if nom_compteur == nom:
+                        lignes.append(f'{nom}{_labels(**dict(labels))} {valeur}')
+            return '\n'.join(lignes) + '\n'
+
+    def _histogrammes(self, lignes, nom, aide, histogrammes):
+        lignes.append(f'# HELP {nom} {aide}')
+        lignes.append(f'# TYPE {nom} histogram')
+        for (route, methode), histo in sorted(histogrammes.items()):
+            cumul = 0
+            for borne, compte in zip(histo.bornes, histo.comptes):
+                cumul += compte
+                lignes.append(f'{nom}_bucket{_labels(route=route, methode=methode, le=_nombre(borne))} {cumul}')
+            lignes.append(f'{nom}_bucket{_labels(route=route, methode=methode, le="+Inf")} {histo.nombre}')
+            lignes.append(f'{nom}_sum{_labels(route=route, methode=methode)} {histo.somme:.6f}')
+            lignes.append(f'{nom}_count{_labels(route=route, methode=methode)} {histo.nombre}')
+
+
+def _nombre(valeur):
+    return str(int(valeur)) if float(valeur).is_integer() else str(valeur)
+
+
+def _labels(**labels):
+    def echapper(valeur):
+        return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{cle}="{echapper(valeur)}"' for cle, valeur in labels.items()) + '}'
+
+
+registre = Registre()
+
+
+class MesureSQL:
+    """Wrapper d'exécution installé sur chaque connexion le temps d'une requête HTTP."""
+
+    def __init__(self):
+        self.nombre = 0
+        self.duree = 0.0
+        self.empreintes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duree += time.perf_counter() - debut
+            self.nombre += 1
+            self.empreintes[empreinte_sql(sql)] += 1
+
+    @property
+    def n_plus_un(self):
+        """Empreintes répétées au moins INSTRUMENTATION_SEUIL_N_PLUS_UN fois."""
+        seuil = settings.INSTRUMENTATION_SEUIL_N_PLUS_UN
+        return {sql: nombre for sql, nombre in self.empreintes.items() if nombre >= seuil}
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ACTIVE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mesure = MesureSQL()
+        debut = time.perf_counter()
+        wrappers = [connection.execute_wrapper(mesure) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            response = self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+        duree = time.perf_counter() - debut
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'non_resolue'
+        suspects = mesure.n_plus_un
+        if suspects:
+            sql, nombre = max(suspects.items(), key=lambda item: item[1])
+            logger.warning("N+1 suspecté sur %s %s : %d fois « %s »", request.method, route, nombre, sql[:200])
+        registre.enregistrer(route, request.method, response.status_code, duree, mesure)
+
+        # Disponible pour les tests via response.wsgi_request.instrumentation
+        request.instrumentation = {
+            'route': route,
+            'duree': duree,
+            'requetes_sql': mesure.nombre,
+            'duree_sql': mesure.duree,
+            'n_plus_un': suspects,
+        }
+        response['Server-Timing'] = (
+            f'app;dur={duree * 1000:.1f}, db;dur={mesure.duree * 1000:.1f};desc="{mesure.nombre} requetes"'
+        )
+        return response
+
+
+def _jeton_valide(request):
+    attendu = settings.INSTRUMENTATION_JETON
+    type_jeton, _, jeton = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(attendu) and type_jeton == 'Bearer' and hmac.compare_digest(jeton.encode(), attendu.encode())
+
+
+def metriques(request):
+    """Point d'accès interne : réservé au personnel et au collecteur muni de INSTRUMENTATION_JETON."""
+    utilisateur = getattr(request, 'user', None)
+    if not (utilisateur and utilisateur.is_staff) and not _jeton_valide(request):
+        raise Http404
+    return HttpResponse(registre.exposer(), content_type='text/plain; version=0.0.4; charset=utf-8')
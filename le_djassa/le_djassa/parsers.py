@@ -0,0 +1,19 @@
+"""Lecture JSON rapide avec orjson, si installé (voir le_djassa.renderers)."""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encodage = (parser_context or {}).get('encoding', 'utf-8')
+        # orjson ne lit que l'UTF-8 ; les autres encodages passent par DRF
+        if orjson is None or encodage.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,37 @@
+"""
+Rendu JSON rapide avec orjson, si installé.
+
+Sortie identique au JSONRenderer de DRF pour nos réponses : dates en ISO 8601
+avec « Z » pour UTC, Decimal bruts en nombres (les serializers les
+convertissent déjà en chaînes), chaînes traduites paresseuses forcées en str.
+Tout type qu'orjson ne connaît pas passe par l'encodeur de DRF. Sans orjson,
+ou pour une sortie indentée (API navigable), le rendu de DRF est utilisé.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encodeur_drf = JSONEncoder()
+
+OPTIONS_ORJSON = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            contenu = orjson.dumps(data, default=_encodeur_drf.default, option=OPTIONS_ORJSON)
+        except orjson.JSONEncodeError:
+            # Entiers hors 64 bits, NaN en mode strict... : laissé au comportement de DRF
+            return super().render(data, accepted_media_type, renderer_context)
+        # Comme DRF : U+2028 et U+2029 échappés pour rester un sous-ensemble strict de JavaScript
+        if b'\xe2\x80\xa8' in contenu or b'\xe2\x80\xa9' in contenu:
+            contenu = contenu.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return contenu
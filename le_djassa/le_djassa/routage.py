@@ -0,0 +1,115 @@
+"""
+Routage des lectures vers les réplicas PostgreSQL.
+
+Une réplique est une base de DATABASES déclarée miroir de ``default``
+(voir DB_REPLICAS dans les settings). Les écritures vont toujours sur la base
+principale ; les lectures aussi lorsqu'elles ont lieu :
+
+- dans une transaction ouverte sur ``default`` (verrous, lecture puis écriture) ;
+- pendant une requête HTTP d'écriture (POST, PUT, PATCH, DELETE) ;
+- pour calculer une réponse mise en cache (products.cache), qui survit à
+  l'invalidation et ne doit pas venir d'un réplica en retard ;
+- pour un utilisateur ayant écrit il y a moins de DB_PRIMAIRE_APRES_ECRITURE
+  secondes, qui relit ainsi ses propres écritures malgré le retard des réplicas.
+
+Ce dernier état est gardé dans le cache Django : il n'est partagé entre
+workers que si le cache l'est lui-même (Redis...).
+"""
+import random
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Vrai tant que les lectures doivent aller sur la base principale (suit threads et tâches asyncio)
+_primaire = ContextVar('routage_primaire', default=False)
+
+
+def replicas():
+    return [
+        alias for alias, base in settings.DATABASES.items()
+        if base.get('TEST', {}).get('MIRROR') == DEFAULT_DB_ALIAS
+    ]
+
+
+@contextmanager
+def sur_primaire():
+    """Force les lectures du bloc sur la base principale."""
+    jeton = _primaire.set(True)
+    try:
+        yield
+    finally:
+        _primaire.reset(jeton)
+
+
+class RoutageReplicas:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or _primaire.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        # Les objets liés se lisent sur la base d'où vient l'instance
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les réplicas contiennent les mêmes données que la base principale
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _cle(utilisateur_id):
+    return f'routage:primaire:{utilisateur_id}'
+
+
+def _utilisateur_id(request):
+    """Identifiant de l'utilisateur, lu dans le jeton JWT (sans requête SQL) ou la session."""
+    type_jeton, _, jeton = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if jeton and type_jeton in jwt_settings.AUTH_HEADER_TYPES:
+        try:
+            return AccessToken(jeton)[jwt_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            return None
+    session = getattr(request, 'session', None)
+    return session.get(SESSION_KEY) if session is not None else None
+
+
+class RoutageMiddleware:
+    """Décide, pour chaque requête HTTP, si ses lectures doivent rester sur la base principale."""
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        ecriture = request.method not in SAFE_METHODS
+        if ecriture:
+            primaire = True
+        else:
+            utilisateur_id = _utilisateur_id(request)
+            primaire = utilisateur_id is not None and cache.get(_cle(utilisateur_id), False)
+
+        with sur_primaire() if primaire else nullcontext():
+            response = self.get_response(request)
+
+        if ecriture and response.status_code < 400:
+            # DRF reporte sur la requête Django l'utilisateur authentifié par la vue
+            utilisateur = getattr(request, 'user', None)
+            if utilisateur is not None and utilisateur.is_authenticated:
+                cache.set(_cle(utilisateur.pk), True, settings.DB_PRIMAIRE_APRES_ECRITURE)
+        return response
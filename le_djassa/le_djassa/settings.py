@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'rest_framework_simplejwt',  # JWT (JSON Web Tokens)
@@ -36,19 +37,36 @@ INSTALLED_APPS = [
     'users',
     'products',
     'orders',
+    'notifications',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'le_djassa.instrumentation.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'le_djassa.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'le_djassa.routage.RoutageMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Mesures par route exposées sur /metrics/ (le_djassa.instrumentation)
+INSTRUMENTATION_ACTIVE = config('INSTRUMENTATION_ACTIVE', default=False, cast=bool)
+INSTRUMENTATION_SEUIL_N_PLUS_UN = config('INSTRUMENTATION_SEUIL_N_PLUS_UN', default=5, cast=int)
+# Jeton du collecteur (en-tête « Authorization: Bearer <jeton> ») ; vide, seul le personnel y accède.
+# L'adresse IP ne suffit pas : derrière un proxy local, toutes les requêtes viennent de 127.0.0.1.
+INSTRUMENTATION_JETON = config('INSTRUMENTATION_JETON', default='')
+
+# Compression des réponses (le_djassa.compression) ; brotli utilisé si le module est installé
+COMPRESSION_TAILLE_MIN = config('COMPRESSION_TAILLE_MIN', default=1024, cast=int)
+COMPRESSION_NIVEAU_GZIP = config('COMPRESSION_NIVEAU_GZIP', default=6, cast=int)
+COMPRESSION_NIVEAU_BROTLI = config('COMPRESSION_NIVEAU_BROTLI', default=4, cast=int)
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',  # S'assurer que l'URL correspond à celle du frontend
     'http://192.168.71.78:3000',
@@ -80,6 +98,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 ROOT_URLCONF = 'le_djassa.urls'
@@ -105,21 +124,65 @@ WSGI_APPLICATION = 'le_djassa.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# PostgreSQL par défaut ; DB_ENGINE=django.db.backends.sqlite3 pour travailler sur SQLite
+DB_ENGINE = config('DB_ENGINE', default='django.db.backends.postgresql')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'ledjassa',
-        'USER': 'postgres',
-        'PASSWORD': 'Coul204',
-        'HOST': 'localhost',
-        'PORT': '5433',
-        'OPTIONS': {
-    'client_encoding': 'utf-8',
-},
-
+        'ENGINE': DB_ENGINE,
+        'NAME': config('DB_NAME', default='ledjassa'),
+        'USER': config('DB_USER', default='postgres'),
+        'PASSWORD': config('DB_PASSWORD', default='Coul204'),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='5433'),
     }
 }
 
+if DB_ENGINE == 'django.db.backends.postgresql':
+    DATABASES['default']['OPTIONS'] = {
+        'client_encoding': 'utf-8',
+    }
+
+# Connexions : persistantes (réutilisées DB_CONN_MAX_AGE secondes par thread) ou, avec DB_POOL,
+# tirées d'un pool psycopg 3 borné par worker. Sous ASGI (SERVEUR_ASGI, posé par asgi.py), les
+# connexions persistantes ne sont pas réutilisées d'une requête à l'autre : seul le pool est actif.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+SERVEUR_ASGI = config('SERVEUR_ASGI', default=False, cast=bool)
+
+DATABASES['default']['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+if DB_POOL and DB_ENGINE == 'django.db.backends.postgresql':
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # incompatible avec le pool
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),  # attente d'une connexion libre (s)
+        'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = 0 if SERVEUR_ASGI else DB_CONN_MAX_AGE
+
+# Réplicas en lecture (le_djassa.routage) : DB_REPLICAS=hote[:port][/base],... sur PostgreSQL,
+# chemins de fichiers sur SQLite. Mêmes identifiants que la base principale.
+DB_REPLICAS = config('DB_REPLICAS', default='',
+                     cast=lambda v: [replica.strip() for replica in v.split(',') if replica.strip()])
+
+for numero, replica in enumerate(DB_REPLICAS, 1):
+    base = {**DATABASES['default'], 'OPTIONS': {**DATABASES['default'].get('OPTIONS', {})},
+            'TEST': {'MIRROR': 'default'}}
+    if DB_ENGINE == 'django.db.backends.sqlite3':
+        base['NAME'] = replica
+    else:
+        hote, _, nom = replica.partition('/')
+        hote, _, port = hote.partition(':')
+        base.update(HOST=hote, PORT=port or base['PORT'], NAME=nom or base['NAME'])
+    DATABASES[f'replica{numero}'] = base
+
+DATABASE_ROUTERS = ['le_djassa.routage.RoutageReplicas']
+# Après une écriture, un utilisateur lit sur la base principale pendant cette durée (secondes)
+DB_PRIMAIRE_APRES_ECRITURE = config('DB_PRIMAIRE_APRES_ECRITURE', default=10, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -174,9 +237,68 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+
+    # JSON via orjson quand il est installé (sortie identique, repli automatique sur DRF sinon)
+    'DEFAULT_RENDERER_CLASSES': [
+        'le_djassa.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'le_djassa.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Pagination par curseur du catalogue (products.pagination.ProduitPagination)
+PRODUITS_PAGE_SIZE = config('PRODUITS_PAGE_SIZE', default=24, cast=int)
+PRODUITS_MAX_PAGE_SIZE = config('PRODUITS_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Flux des commandes du vendeur (orders.pagination.CommandePagination)
+COMMANDES_PAGE_SIZE = config('COMMANDES_PAGE_SIZE', default=20, cast=int)
+COMMANDES_MAX_PAGE_SIZE = config('COMMANDES_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Messagerie : boîte de réception et fil des conversations (orders.pagination)
+CONVERSATIONS_PAGE_SIZE = config('CONVERSATIONS_PAGE_SIZE', default=20, cast=int)
+CONVERSATIONS_MAX_PAGE_SIZE = config('CONVERSATIONS_MAX_PAGE_SIZE', default=100, cast=int)
+MESSAGES_PAGE_SIZE = config('MESSAGES_PAGE_SIZE', default=30, cast=int)
+MESSAGES_MAX_PAGE_SIZE = config('MESSAGES_MAX_PAGE_SIZE', default=100, cast=int)
+MESSAGE_LONGUEUR_MAX = config('MESSAGE_LONGUEUR_MAX', default=5000, cast=int)
+
+# Chat WebSocket (orders.chat) : écriture différée des messages, par lots d'au plus
+# CHAT_TAMPON_TAILLE messages, au plus CHAT_TAMPON_DELAI secondes après leur envoi
+CHAT_TAMPON_TAILLE = config('CHAT_TAMPON_TAILLE', default=200, cast=int)
+CHAT_TAMPON_DELAI = config('CHAT_TAMPON_DELAI', default=0.2, cast=float)
+CHAT_ABONNEMENTS_MAX = config('CHAT_ABONNEMENTS_MAX', default=50, cast=int)
+# Intervalle minimal (secondes) entre deux signaux « en train d'écrire » d'une connexion
+CHAT_FRAPPE_INTERVALLE = config('CHAT_FRAPPE_INTERVALLE', default=1.0, cast=float)
+# Intervalle minimal (secondes) entre deux messages d'une connexion ; 0 pour ne pas limiter
+CHAT_MESSAGES_INTERVALLE = config('CHAT_MESSAGES_INTERVALLE', default=0.2, cast=float)
+
+# Recherche de produits (products.search)
+RECHERCHE_PAGE_SIZE = config('RECHERCHE_PAGE_SIZE', default=20, cast=int)
+RECHERCHE_MAX_PAGES = config('RECHERCHE_MAX_PAGES', default=10, cast=int)
+
+# Cache partagé : Redis (ou compatible) si REDIS_URL est défini, mémoire locale du processus sinon.
+# Sert au cache du catalogue (products.cache) et au routage des lectures (le_djassa.routage).
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTREES', default=10000, cast=int)},
+        }
+    }
+CACHE_CATALOGUE_DUREE = config('CACHE_CATALOGUE_DUREE', default=300, cast=int)  # secondes
+
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -188,6 +310,26 @@ TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN')
 TWILIO_SMS_FROM = config('TWILIO_SMS_FROM')
 
+# Outbox des notifications (notifications.outbox), vidée par `manage.py envoyer_notifications`.
+# Backends SMS : TwilioSmsBackend, ConsoleSmsBackend, FichierSmsBackend, MemoireSmsBackend
+SMS_BACKEND = config('SMS_BACKEND', default='notifications.sms.TwilioSmsBackend')
+SMS_FILE_PATH = config('SMS_FILE_PATH', default=os.path.join(BASE_DIR, 'sms.log'))
+NOTIFICATIONS_MAX_TENTATIVES = config('NOTIFICATIONS_MAX_TENTATIVES', default=5, cast=int)
+NOTIFICATIONS_DELAI_BASE = config('NOTIFICATIONS_DELAI_BASE', default=30, cast=int)  # secondes
+NOTIFICATIONS_DELAI_MAX = config('NOTIFICATIONS_DELAI_MAX', default=3600, cast=int)
+
+# Évènements en temps réel (notifications.diffusion), servis en SSE par le serveur ASGI.
+# Backends : MemoireDiffusion (un seul serveur), RedisDiffusion (plusieurs, via REDIS_URL). Avec
+# RedisDiffusion, le cache doit aussi être partagé (REDIS_URL) pour les tickets de connexion.
+DIFFUSION_BACKEND = config('DIFFUSION_BACKEND', default='notifications.diffusion.MemoireDiffusion')
+DIFFUSION_FILE_MAX = config('DIFFUSION_FILE_MAX', default=100, cast=int)  # messages en attente par connexion
+DIFFUSION_PING = config('DIFFUSION_PING', default=25, cast=int)  # secondes
+DIFFUSION_RECONNEXION_MS = config('DIFFUSION_RECONNEXION_MS', default=5000, cast=int)
+DIFFUSION_TICKET_DUREE = config('DIFFUSION_TICKET_DUREE', default=60, cast=int)  # secondes
+
+# Durée de conservation des clés d'idempotence des commandes (orders.idempotence)
+IDEMPOTENCE_DUREE = timedelta(hours=config('IDEMPOTENCE_DUREE_HEURES', default=24, cast=int))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
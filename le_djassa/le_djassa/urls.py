@@ -2,12 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .instrumentation import metriques
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/utilisateur/', include('users.urls')),
     path('api/produit/', include('products.urls')),
     path('api/orders/', include('orders.urls')),
+    path('api/notifications/', include('notifications.urls')),
+    path('metrics/', metriques, name='metriques'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,109 @@
+"""
+Sérialisation en lecture seule à partir de QuerySet.values().
+
+Un ModelSerializer instancie des objets modèle puis appelle, pour chaque
+ligne, chacun de ses champs DRF. Sur les pages de liste, ce travail domine
+le temps de réponse. Un ValeursSerializer produit le même JSON directement
+à partir des dictionnaires de .values() : les conversions sont écrites une
+fois pour toutes dans representer(), et les objets liés sont chargés en lot
+dans charger(), comme le ferait prefetch_related.
+
+Il remplace le serializer d'une vue de liste (mêmes arguments, même attribut
+``data``) à condition que la vue lise son queryset par ``preparer()``. La
+parité avec le serializer d'origine est vérifiée par les tests des
+applications et mesurée par la commande benchmark_serialisation.
+"""
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+
+CENTIMES = 2
+
+
+def texte_decimal(valeur, decimales=CENTIMES):
+    """Comme DecimalField de DRF : chaîne à nombre fixe de décimales."""
+    if valeur is None:
+        return ''
+    return f'{round(valeur, decimales):f}'
+
+
+class Dates:
+    """Formatage des dates comme DateTimeField de DRF, dans le fuseau courant."""
+
+    def __init__(self):
+        self.fuseau = timezone.get_current_timezone()
+
+    def iso(self, valeur):
+        if not valeur:
+            return None
+        texte = valeur.astimezone(self.fuseau).isoformat()
+        return texte[:-6] + 'Z' if texte.endswith('+00:00') else texte
+
+    def format(self, valeur, format_):
+        if not valeur:
+            return None
+        return valeur.astimezone(self.fuseau).strftime(format_)
+
+
+class UrlsFichiers:
+    """
+    URL des fichiers d'un champ FileField, comme le FileField de DRF :
+    absolues si une requête est fournie, relatives sinon.
+    """
+
+    def __init__(self, champ, request=None):
+        self.stockage = champ.storage
+        self.request = request
+        # Stockage local servi sous MEDIA_URL : storage.url() se réduit à une concaténation,
+        # sans urljoin() par fichier
+        self.prefixe = None
+        if isinstance(self.stockage, FileSystemStorage):
+            base = self.stockage.base_url
+            if base.startswith('/') and not base.startswith('//'):
+                prefixe = request.build_absolute_uri(base) if request is not None else base
+                # Préfixe retenu seulement s'il n'a été ni normalisé ni réencodé
+                if prefixe.endswith(base):
+                    self.prefixe = prefixe
+
+    def __call__(self, nom):
+        if not nom:
+            return None
+        if self.prefixe is not None and './' not in nom and not nom.endswith('.'):
+            return self.prefixe + filepath_to_uri(nom).lstrip('/')
+        url = self.stockage.url(nom)
+        if self.request is None:
+            return url
+        return self.request.build_absolute_uri(url)
+
+
+class ValeursSerializer:
+    """
+    Base des serializers de lecture. Définir ``colonnes`` (ou surcharger
+    preparer()) et representer(ligne) ; charger(lignes) pour les objets liés.
+    """
+    colonnes = ()
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def preparer(cls, queryset):
+        """Queryset de dictionnaires attendu par representer()."""
+        return queryset.values(*cls.colonnes)
+
+    def charger(self, lignes):
+        """Charge en lot ce dont representer() a besoin en plus des lignes."""
+
+    def representer(self, ligne):
+        raise NotImplementedError
+
+    @property
+    def data(self):
+        if not hasattr(self, '_data'):
+            lignes = list(self.instance) if self.many else [self.instance]
+            self.charger(lignes)
+            donnees = [self.representer(ligne) for ligne in lignes]
+            self._data = donnees if self.many else donnees[0]
+        return self._data
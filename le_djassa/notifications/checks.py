@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Caches propres à chaque processus : un ticket émis par un worker y est inconnu des autres
+CACHES_LOCAUX = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def verifier_cache_des_tickets(app_configs, **kwargs):
+    """Avec plusieurs serveurs (RedisDiffusion), les tickets de connexion exigent un cache partagé."""
+    if not settings.DIFFUSION_BACKEND.endswith('RedisDiffusion'):
+        return []
+    if settings.CACHES['default']['BACKEND'] not in CACHES_LOCAUX:
+        return []
+    return [Error(
+        "DIFFUSION_BACKEND répartit les connexions entre plusieurs serveurs, mais le cache par défaut "
+        "est local au processus : un ticket de connexion ne serait utilisable que par le worker qui l'a émis.",
+        hint="Définir REDIS_URL pour partager le cache (notifications.tickets).",
+        id='notifications.E001',
+    )]
@@ -0,0 +1,190 @@
+"""
+Diffusion d'évènements en temps réel aux utilisateurs connectés.
+
+Les vues publient, après validation de leur transaction, un évènement sur le
+canal de chaque utilisateur concerné (``diffuser``) ; le flux SSE de
+notifications.views le transmet aux navigateurs abonnés. Le chat
+(orders.chat) s'en sert aussi, avec un canal par conversation. Chaque abonné
+est une simple file asyncio, qui peut suivre plusieurs canaux : une connexion
+inactive ne coûte ni thread ni connexion à la base.
+
+Le backend se choisit comme les backends SMS (DIFFUSION_BACKEND) :
+
+- MemoireDiffusion : abonnés du processus uniquement, pour un seul serveur ;
+- RedisDiffusion : publication via Redis (pub/sub), chaque processus ne
+  gardant qu'une connexion d'écoute pour tous ses abonnés.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+def canal_utilisateur(utilisateur_id):
+    return f'utilisateur:{utilisateur_id}'
+
+
+class Abonnement:
+    """File des messages d'un abonné, alimentée depuis n'importe quel thread."""
+
+    def __init__(self, taille_max):
+        self.boucle = asyncio.get_running_loop()
+        self.file = asyncio.Queue(maxsize=taille_max)
+        # Vrai si des messages ont été perdus (abonné trop lent) : le client doit se resynchroniser
+        self.debordement = False
+
+    def deposer(self, message):
+        try:
+            self.boucle.call_soon_threadsafe(self._ajouter, message)
+        except RuntimeError:
+            # Boucle fermée : le serveur s'arrête, l'abonné va être retiré
+            pass
+
+    def _ajouter(self, message):
+        try:
+            self.file.put_nowait(message)
+        except asyncio.QueueFull:
+            self.debordement = True
+
+    async def recevoir(self, delai):
+        """Prochain message, ou None au bout de `delai` secondes sans message."""
+        try:
+            return await asyncio.wait_for(self.file.get(), delai)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BaseDiffusion:
+    """
+    Interface des backends : ``publier()`` est synchrone (appelé depuis les
+    vues), ``apublier()`` sa variante pour la boucle asyncio ; ``abonner()``
+    et ``desabonner()`` sont appelés par le flux SSE et le chat. Passer un
+    abonnement existant à ``abonner()`` lui ajoute un canal.
+    """
+
+    def publier(self, canal, message):
+        raise NotImplementedError
+
+    async def apublier(self, canal, message):
+        self.publier(canal, message)
+
+    async def abonner(self, canal, abonnement=None):
+        raise NotImplementedError
+
+    async def desabonner(self, canal, abonnement):
+        raise NotImplementedError
+
+
+class MemoireDiffusion(BaseDiffusion):
+    def __init__(self):
+        self.abonnes = defaultdict(set)
+        self._verrou = threading.Lock()
+
+    def publier(self, canal, message):
+        with self._verrou:
+            abonnes = list(self.abonnes.get(canal, ()))
+        for abonnement in abonnes:
+            abonnement.deposer(message)
+
+    async def abonner(self, canal, abonnement=None):
+        abonnement = abonnement or Abonnement(settings.DIFFUSION_FILE_MAX)
+        with self._verrou:
+            self.abonnes[canal].add(abonnement)
+        return abonnement
+
+    async def desabonner(self, canal, abonnement):
+        with self._verrou:
+            self._retirer(canal, abonnement)
+
+    def _retirer(self, canal, abonnement):
+        """Retire l'abonné ; vrai si le canal n'a plus d'abonné dans ce processus."""
+        abonnes = self.abonnes.get(canal)
+        if abonnes is None:
+            return False
+        abonnes.discard(abonnement)
+        if not abonnes:
+            del self.abonnes[canal]
+            return True
+        return False
+
+
+class RedisDiffusion(MemoireDiffusion):
+    """
+    Publication sur Redis ; la réception passe par une seule connexion pub/sub
+    par processus, qui redistribue aux abonnés locaux.
+    """
+    prefixe = 'diffusion:'
+
+    def __init__(self, url=None):
+        super().__init__()
+        # Import local : redis n'est nécessaire que pour ce backend
+        import redis
+        self.url = url or settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.client_asynchrone = None
+        self.pubsub = None
+        self.ecoute = None
+
+    def publier(self, canal, message):
+        self.client.publish(self.prefixe + canal, json.dumps(message, cls=DjangoJSONEncoder))
+
+    async def apublier(self, canal, message):
+        import redis.asyncio
+        if self.client_asynchrone is None:
+            self.client_asynchrone = redis.asyncio.Redis.from_url(self.url)
+        await self.client_asynchrone.publish(self.prefixe + canal, json.dumps(message, cls=DjangoJSONEncoder))
+
+    async def abonner(self, canal, abonnement=None):
+        import redis.asyncio
+        abonnement = await super().abonner(canal, abonnement)
+        if self.pubsub is None:
+            self.pubsub = redis.asyncio.Redis.from_url(self.url).pubsub()
+        await self.pubsub.subscribe(self.prefixe + canal)
+        if self.ecoute is None or self.ecoute.done():
+            self.ecoute = asyncio.create_task(self._ecouter())
+        return abonnement
+
+    async def desabonner(self, canal, abonnement):
+        with self._verrou:
+            dernier = self._retirer(canal, abonnement)
+        if dernier:
+            await self.pubsub.unsubscribe(self.prefixe + canal)
+
+    async def _ecouter(self):
+        async for message in self.pubsub.listen():
+            if message['type'] == 'message':
+                canal = message['channel'].decode()[len(self.prefixe):]
+                MemoireDiffusion.publier(self, canal, json.loads(message['data']))
+
+
+@lru_cache(maxsize=None)
+def get_diffusion(chemin=None):
+    """Backend de diffusion du processus (partagé par toutes les requêtes)."""
+    return import_string(chemin or settings.DIFFUSION_BACKEND)()
+
+
+def publier_apres_validation(canaux, message):
+    """
+    Publie un message sur des canaux une fois la transaction en cours validée.
+    Une panne du backend est journalisée sans faire échouer la requête.
+    """
+    def publier():
+        diffusion = get_diffusion()
+        for canal in canaux:
+            diffusion.publier(canal, message)
+
+    transaction.on_commit(publier, robust=True)
+
+
+def diffuser(utilisateur_ids, evenement, donnees):
+    """Publie un évènement sur le flux de chaque utilisateur, après validation de la transaction."""
+    publier_apres_validation(
+        {canal_utilisateur(utilisateur_id) for utilisateur_id in utilisateur_ids},
+        {'evenement': evenement, 'donnees': donnees},
+    )
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import envoyer_lot
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails et SMS en attente dans l'outbox des notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=100, help="Nombre de notifications par lot.")
+        parser.add_argument('--boucle', action='store_true', help="Continue à surveiller l'outbox.")
+        parser.add_argument('--pause', type=float, default=1.0, help="Attente (s) quand l'outbox est vide.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            envoyees = envoyer_lot(options['lot'])
+            total += envoyees
+            if envoyees:
+                continue
+            if not options['boucle']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"{total} notification(s) traitée(s)."))
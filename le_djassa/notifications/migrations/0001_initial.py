@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canal', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS')], max_length=10)),
+                ('destinataire', models.CharField(max_length=255)),
+                ('sujet', models.CharField(blank=True, max_length=255)),
+                ('message', models.TextField()),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('envoyee', 'Envoyée'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('tentatives', models.PositiveIntegerField(default=0)),
+                ('prochaine_tentative', models.DateTimeField(default=django.utils.timezone.now)),
+                ('derniere_erreur', models.TextField(blank=True)),
+                ('cree_le', models.DateTimeField(auto_now_add=True)),
+                ('envoyee_le', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('statut', 'en_attente')), fields=['prochaine_tentative', 'id'], name='notification_a_envoyer_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+# Notification en attente d'envoi (outbox) : écrite dans la transaction
+# métier, puis livrée par la commande envoyer_notifications
+class Notification(models.Model):
+    CANAUX = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+
+    STATUTS = [
+        ('en_attente', 'En attente'),
+        ('envoyee', 'Envoyée'),
+        ('echec', 'Échec'),
+    ]
+
+    canal = models.CharField(max_length=10, choices=CANAUX)
+    destinataire = models.CharField(max_length=255)
+    sujet = models.CharField(max_length=255, blank=True)
+    message = models.TextField()
+    statut = models.CharField(max_length=20, choices=STATUTS, default='en_attente')
+    tentatives = models.PositiveIntegerField(default=0)
+    prochaine_tentative = models.DateTimeField(default=timezone.now)
+    derniere_erreur = models.TextField(blank=True)
+    cree_le = models.DateTimeField(auto_now_add=True)
+    envoyee_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['prochaine_tentative', 'id'], name='notification_a_envoyer_idx',
+                         condition=models.Q(statut='en_attente')),
+        ]
+
+    def __str__(self):
+        return f'{self.get_canal_display()} à {self.destinataire} ({self.statut})'
@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+from .sms import get_sms_backend
+
+
+def preparer_email(destinataire, sujet, message):
+    """Notification email non enregistrée, ou None sans destinataire."""
+    if not destinataire:
+        return None
+    return Notification(canal='email', destinataire=destinataire, sujet=sujet, message=message)
+
+
+def preparer_sms(numero, message):
+    """Notification SMS non enregistrée, ou None si l'utilisateur n'a pas de numéro."""
+    if not numero:
+        return None
+    return Notification(canal='sms', destinataire=numero, message=message)
+
+
+def mettre_en_file(notifications):
+    """Enregistre en une requête des notifications préparées (les None sont ignorés)."""
+    return Notification.objects.bulk_create([n for n in notifications if n is not None])
+
+
+def notifier_email(destinataire, sujet, message):
+    """Met un email en file ; il part dans la même transaction que l'écriture métier."""
+    return mettre_en_file([preparer_email(destinataire, sujet, message)])
+
+
+def notifier_sms(numero, message):
+    """Met un SMS en file dans la transaction en cours."""
+    return mettre_en_file([preparer_sms(numero, message)])
+
+
+def _delai_avant_nouvel_essai(tentatives):
+    """Attente exponentielle : base, 2 x base, 4 x base... plafonnée."""
+    delai = settings.NOTIFICATIONS_DELAI_BASE * (2 ** (tentatives - 1))
+    return timedelta(seconds=min(delai, settings.NOTIFICATIONS_DELAI_MAX))
+
+
+def _enregistrer_echec(notification, erreur):
+    notification.tentatives += 1
+    notification.derniere_erreur = str(erreur)
+    if notification.tentatives >= settings.NOTIFICATIONS_MAX_TENTATIVES:
+        notification.statut = 'echec'
+    else:
+        notification.prochaine_tentative = timezone.now() + _delai_avant_nouvel_essai(notification.tentatives)
+
+
+def _envoyer_emails(notifications):
+    # Une seule connexion SMTP pour tout le lot ; open() échoue avant tout envoi
+    connexion = get_connection(fail_silently=False)
+    connexion.open()
+    try:
+        for notification in notifications:
+            try:
+                EmailMessage(
+                    notification.sujet, notification.message,
+                    settings.DEFAULT_FROM_EMAIL, [notification.destinataire],
+                    connection=connexion,
+                ).send()
+            except Exception as e:
+                _enregistrer_echec(notification, e)
+            else:
+                notification.statut = 'envoyee'
+    finally:
+        connexion.close()
+
+
+def _envoyer_sms(notifications):
+    # Un seul client SMS pour tout le lot
+    backend = get_sms_backend()
+    backend.open()
+    try:
+        for notification in notifications:
+            try:
+                backend.envoyer(notification.destinataire, notification.message)
+            except Exception as e:
+                _enregistrer_echec(notification, e)
+            else:
+                notification.statut = 'envoyee'
+    finally:
+        backend.close()
+
+
+ENVOIS_PAR_CANAL = {
+    'email': _envoyer_emails,
+    'sms': _envoyer_sms,
+}
+
+
+def envoyer_lot(taille_lot=100):
+    """
+    Livre un lot de notifications échues et retourne le nombre traité.
+
+    Les lignes sont réservées avec SKIP LOCKED, ce qui permet plusieurs
+    workers. Seules les lignes de l'outbox sont verrouillées pendant l'envoi,
+    jamais les commandes ou les produits.
+    """
+    maintenant = timezone.now()
+    with transaction.atomic():
+        lot = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(statut='en_attente', prochaine_tentative__lte=maintenant)
+            .order_by('prochaine_tentative', 'id')[:taille_lot]
+        )
+        for canal, envoyer in ENVOIS_PAR_CANAL.items():
+            notifications = [n for n in lot if n.canal == canal]
+            if notifications:
+                try:
+                    envoyer(notifications)
+                except Exception as e:
+                    # Connexion impossible : rien n'est parti, tout le lot du canal est reporté
+                    for notification in notifications:
+                        _enregistrer_echec(notification, e)
+
+        for notification in lot:
+            if notification.statut == 'envoyee':
+                notification.envoyee_le = maintenant
+        Notification.objects.bulk_update(
+            lot, ['statut', 'tentatives', 'prochaine_tentative', 'derniere_erreur', 'envoyee_le']
+        )
+    return len(lot)
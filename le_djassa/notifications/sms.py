@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Messages « envoyés » par MemoireSmsBackend, à la manière de django.core.mail.outbox
+boite_envoi = []
+
+
+class BaseSmsBackend:
+    """
+    Interface des backends SMS, calquée sur les backends email de Django :
+    ``open()`` prépare la connexion partagée par tout un lot, ``envoyer()``
+    expédie un message et lève une exception en cas d'échec.
+    """
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def envoyer(self, numero, message):
+        raise NotImplementedError
+
+
+class TwilioSmsBackend(BaseSmsBackend):
+    def __init__(self):
+        self.client = None
+
+    def open(self):
+        # Import local : twilio n'est nécessaire que pour ce backend
+        from twilio.rest import Client
+        if self.client is None:
+            self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    def close(self):
+        self.client = None
+
+    def envoyer(self, numero, message):
+        self.client.messages.create(body=message, from_=settings.TWILIO_SMS_FROM, to=numero)
+
+
+class ConsoleSmsBackend(BaseSmsBackend):
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.RLock()
+
+    def envoyer(self, numero, message):
+        with self._lock:
+            self.stream.write(f"SMS à {numero}\n{message}\n{'-' * 79}\n")
+            self.stream.flush()
+
+
+class FichierSmsBackend(BaseSmsBackend):
+    def __init__(self, chemin=None):
+        self.chemin = chemin or settings.SMS_FILE_PATH
+        self.fichier = None
+
+    def open(self):
+        if self.fichier is None:
+            os.makedirs(os.path.dirname(self.chemin) or '.', exist_ok=True)
+            self.fichier = open(self.chemin, 'a', encoding='utf-8')
+
+    def close(self):
+        if self.fichier is not None:
+            self.fichier.close()
+            self.fichier = None
+
+    def envoyer(self, numero, message):
+        self.fichier.write(f"SMS à {numero}\n{message}\n{'-' * 79}\n")
+
+
+class MemoireSmsBackend(BaseSmsBackend):
+    def envoyer(self, numero, message):
+        boite_envoi.append({'numero': numero, 'message': message})
+
+
+def get_sms_backend(chemin=None):
+    return import_string(chemin or settings.SMS_BACKEND)()
@@ -0,0 +1,49 @@
+"""
+Authentification des connexions longues (flux SSE, WebSocket du chat).
+
+Ni EventSource ni WebSocket ne peuvent envoyer d'en-tête Authorization
+depuis un navigateur : le client échange son jeton JWT contre un ticket à
+usage unique, valable DIFFUSION_TICKET_DUREE secondes, qu'il passe dans
+l'URL (?ticket=...). Les autres clients peuvent garder l'en-tête Bearer.
+
+Les tickets sont gardés dans le cache Django : avec plusieurs serveurs
+(RedisDiffusion), ce cache doit être partagé (REDIS_URL), sans quoi le
+ticket émis par un worker est inconnu des autres (vérifié par
+notifications.checks).
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def _cle_ticket(ticket):
+    return f'notifications:ticket:{ticket}'
+
+
+def creer_ticket(utilisateur_id):
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_cle_ticket(ticket), utilisateur_id, settings.DIFFUSION_TICKET_DUREE)
+    return ticket
+
+
+async def utilisateur_connecte(ticket=None, autorisation=''):
+    """Id de l'utilisateur, lu dans le ticket ou le jeton JWT, sans requête SQL ; None si invalide."""
+    if ticket:
+        cle = _cle_ticket(ticket)
+        utilisateur_id = await cache.aget(cle)
+        # Seule la connexion dont la suppression a effacé la clé consomme le ticket :
+        # deux connexions concurrentes ne peuvent pas l'utiliser toutes les deux
+        if utilisateur_id is None or not await cache.adelete(cle):
+            return None
+        return utilisateur_id
+    type_jeton, _, jeton = autorisation.partition(' ')
+    if jeton and type_jeton in jwt_settings.AUTH_HEADER_TYPES:
+        try:
+            return AccessToken(jeton)[jwt_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            return None
+    return None
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import TicketEvenementsView, flux_evenements
+
+urlpatterns = [
+    path('evenements/', flux_evenements, name='flux-evenements'),
+    path('evenements/ticket/', TicketEvenementsView.as_view(), name='ticket-evenements'),
+]
@@ -0,0 +1,65 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .diffusion import canal_utilisateur, get_diffusion
+from .tickets import creer_ticket, utilisateur_connecte
+
+
+class TicketEvenementsView(APIView):
+    """
+    Ticket d'ouverture du flux d'évènements ou du chat (voir notifications.tickets),
+    à usage unique, valable DIFFUSION_TICKET_DUREE secondes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({'ticket': creer_ticket(request.user.pk), 'expire_dans': settings.DIFFUSION_TICKET_DUREE})
+
+
+def _evenement(nom, donnees):
+    return f'event: {nom}\ndata: {json.dumps(donnees, cls=DjangoJSONEncoder)}\n\n'
+
+
+async def flux_evenements(request):
+    """
+    Flux Server-Sent Events des évènements de l'utilisateur (commande_creee,
+    statut_commande), à servir par le serveur ASGI. L'authentification n'est
+    vérifiée qu'à l'ouverture ; un client reconnecté demande un nouveau ticket.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Méthode non autorisée.'}, status=405)
+    utilisateur_id = await utilisateur_connecte(request.GET.get('ticket'), request.headers.get('Authorization', ''))
+    if utilisateur_id is None:
+        return JsonResponse({'detail': "Ticket ou jeton d'accès invalide."}, status=401)
+
+    async def evenements():
+        diffusion = get_diffusion()
+        canal = canal_utilisateur(utilisateur_id)
+        abonnement = await diffusion.abonner(canal)
+        try:
+            yield f'retry: {settings.DIFFUSION_RECONNEXION_MS}\n\n'
+            while True:
+                message = await abonnement.recevoir(settings.DIFFUSION_PING)
+                if abonnement.debordement:
+                    # Des évènements ont été perdus : le client recharge son état
+                    abonnement.debordement = False
+                    yield _evenement('resynchroniser', {})
+                if message is None:
+                    # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                    yield ': ping\n\n'
+                else:
+                    yield _evenement(message['evenement'], message['donnees'])
+        finally:
+            await diffusion.desabonner(canal, abonnement)
+
+    response = StreamingHttpResponse(evenements(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,338 @@
+"""
+Chat en temps réel des conversations, par WebSocket (route /ws/chat/ de
+le_djassa.asgi). L'authentification se fait à l'ouverture, par ticket ou
+jeton JWT (voir notifications.tickets).
+
+Trames JSON dans les deux sens, distinguées par ``type``.
+
+Client → serveur, toutes avec ``conversation`` (id) :
+
+- ``abonner`` / ``desabonner`` : suivre le fil d'une conversation dont on
+  est participant ;
+- ``message`` {contenu, ref} : envoyer un message ; ``ref``, choisi par le
+  client, lui est renvoyé tel quel ;
+- ``frappe`` : l'utilisateur est en train d'écrire.
+
+Serveur → client : ``abonne``, ``message`` (diffusé tout de suite, avec un
+``uid`` provisoire), ``messages_enregistres`` (id définitif de chaque uid),
+``frappe``, ``presence`` {utilisateur, en_ligne}, ``resynchroniser`` et
+``erreur`` (avec ``uids`` quand des messages diffusés n'ont pas pu être
+enregistrés : les clients les retirent du fil, l'expéditeur peut les
+renvoyer).
+
+Les trames passent par le backend de notifications.diffusion (canal
+orders.messagerie.canal_conversation), en mémoire sur un seul serveur ou
+Redis sur plusieurs. Les messages sont diffusés avant d'être écrits : le
+TamponMessages les enregistre par lots, au plus CHAT_TAMPON_DELAI secondes
+plus tard. Si le processus meurt entre-temps, aucune trame ne suit : un
+message resté sans id définitif après quelques secondes doit être vérifié
+en rechargeant le fil par l'API. Une connexion envoie au plus un message
+toutes les CHAT_MESSAGES_INTERVALLE secondes, pour qu'elle ne puisse pas
+remplir le tampon à elle seule.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+import weakref
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+
+from notifications.diffusion import Abonnement, get_diffusion
+from notifications.tickets import utilisateur_connecte
+from .messagerie import canal_conversation, enregistrer_messages
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+# Code de fermeture applicatif (plage 4000-4999) : ticket ou jeton refusé
+FERMETURE_NON_AUTHENTIFIE = 4401
+
+
+class TamponMessages:
+    """
+    Écriture différée des messages du chat, pour une boucle asyncio.
+
+    Les messages sont enregistrés par lots (enregistrer_messages : une
+    insertion et un UPDATE par lot), dès que CHAT_TAMPON_TAILLE messages
+    attendent ou CHAT_TAMPON_DELAI secondes après le premier d'entre eux ;
+    les lots s'enchaînent dans l'ordre d'arrivée. Les messages qui n'ont pas
+    pu être écrits sont annoncés par une trame ``erreur`` avec leurs uids. Un
+    message accepté mais pas encore écrit est perdu sans annonce si le
+    processus est tué ; l'arrêt normal du serveur (lifespan) vide le tampon.
+    """
+
+    def __init__(self):
+        self.en_attente = []
+        self.minuterie = None
+        self.verrou = asyncio.Lock()
+        self.taches = set()
+        self.lots = 0
+        self.enregistres = 0
+        self.perdus = 0
+
+    def ajouter(self, message, uid):
+        self.en_attente.append((message, uid))
+        if len(self.en_attente) >= settings.CHAT_TAMPON_TAILLE:
+            self._lancer()
+        elif self.minuterie is None:
+            self.minuterie = asyncio.get_running_loop().call_later(settings.CHAT_TAMPON_DELAI, self._lancer)
+
+    def _lancer(self):
+        tache = asyncio.create_task(self.vider())
+        # Référence gardée jusqu'à la fin : la boucle ne garde que des références faibles
+        self.taches.add(tache)
+        tache.add_done_callback(self.taches.discard)
+
+    async def vider(self):
+        """Enregistre tout ce qui attend, lot par lot, et annonce l'id définitif des messages."""
+        async with self.verrou:
+            if self.minuterie is not None:
+                self.minuterie.cancel()
+                self.minuterie = None
+            while self.en_attente:
+                lot = self.en_attente[:settings.CHAT_TAMPON_TAILLE]
+                del self.en_attente[:settings.CHAT_TAMPON_TAILLE]
+                await self._ecrire(lot)
+
+    async def _ecrire(self, lot):
+        try:
+            enregistres = await sync_to_async(self._enregistrer)(lot)
+        except Exception:
+            # Un message invalide (conversation supprimée entre-temps...) ne doit pas faire perdre le lot
+            logger.exception("Échec de l'enregistrement groupé de %d message(s), nouvel essai un par un.",
+                             len(lot))
+            try:
+                enregistres = await sync_to_async(self._enregistrer_un_par_un)(lot)
+            except Exception:
+                # Base injoignable : tout le lot est perdu, les clients en sont avertis plus bas
+                logger.exception("Messages du chat perdus (%d).", len(lot))
+                enregistres = []
+        self.lots += 1
+        self.enregistres += len(enregistres)
+
+        par_conversation = {}
+        for message, uid in enregistres:
+            par_conversation.setdefault(message.conversation_id, []).append({
+                'uid': uid, 'id': message.pk, 'timestamp': DateTimeField().to_representation(message.timestamp),
+            })
+        uids_enregistres = {uid for _, uid in enregistres}
+        perdus = {}
+        for message, uid in lot:
+            if uid not in uids_enregistres:
+                perdus.setdefault(message.conversation_id, []).append(uid)
+        self.perdus += sum(len(uids) for uids in perdus.values())
+
+        diffusion = get_diffusion()
+        for conversation_id, messages in par_conversation.items():
+            await diffusion.apublier(canal_conversation(conversation_id), {
+                'type': 'messages_enregistres', 'conversation': conversation_id, 'messages': messages,
+            })
+        for conversation_id, uids in perdus.items():
+            await diffusion.apublier(canal_conversation(conversation_id), {
+                'type': 'erreur', 'conversation': conversation_id, 'uids': uids,
+                'message': "Message non enregistré, veuillez le renvoyer." if len(uids) == 1
+                else "Messages non enregistrés, veuillez les renvoyer.",
+            })
+
+    @staticmethod
+    def _enregistrer(lot):
+        with transaction.atomic():
+            messages = enregistrer_messages([message for message, _ in lot], diffuser_au_fil=False)
+        return list(zip(messages, (uid for _, uid in lot)))
+
+    @staticmethod
+    def _enregistrer_un_par_un(lot):
+        enregistres = []
+        for message, uid in lot:
+            try:
+                with transaction.atomic():
+                    enregistres.append((enregistrer_messages([message], diffuser_au_fil=False)[0], uid))
+            except Exception:
+                logger.exception("Message du chat perdu (conversation %s).", message.conversation_id)
+        return enregistres
+
+
+_tampons = weakref.WeakKeyDictionary()
+
+
+def get_tampon():
+    """Tampon d'écriture de la boucle asyncio courante (une par worker ASGI)."""
+    boucle = asyncio.get_running_loop()
+    if boucle not in _tampons:
+        _tampons[boucle] = TamponMessages()
+    return _tampons[boucle]
+
+
+async def vider_tampon():
+    """Écrit les messages en attente ; appelé à l'arrêt du serveur."""
+    await get_tampon().vider()
+
+
+class ChatConsumer:
+    """Une connexion WebSocket : un utilisateur, une seule file pour toutes ses conversations."""
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.diffusion = get_diffusion()
+        self.abonnement = None
+        self.utilisateur_id = None
+        # Conversations suivies, avec leurs participants
+        self.conversations = {}
+        self.derniere_frappe = {}
+        self.dernier_message = float('-inf')
+        self.actions = {
+            'abonner': self.abonner,
+            'desabonner': self.desabonner,
+            'message': self.message,
+            'frappe': self.frappe,
+        }
+
+    async def __call__(self):
+        if (await self.receive())['type'] != 'websocket.connect':
+            return
+        parametres = parse_qs(self.scope.get('query_string', b'').decode('latin-1'))
+        entetes = dict(self.scope.get('headers', []))
+        self.utilisateur_id = await utilisateur_connecte(
+            parametres.get('ticket', [None])[0], entetes.get(b'authorization', b'').decode('latin-1'),
+        )
+        if self.utilisateur_id is None:
+            await self.send({'type': 'websocket.close', 'code': FERMETURE_NON_AUTHENTIFIE})
+            return
+
+        await self.send({'type': 'websocket.accept'})
+        self.abonnement = Abonnement(settings.DIFFUSION_FILE_MAX)
+        relais = asyncio.create_task(self.relayer())
+        try:
+            await self.lire()
+        finally:
+            relais.cancel()
+            for conversation_id in list(self.conversations):
+                await self.desabonner(conversation_id)
+
+    async def envoyer(self, trame):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(trame, cls=DjangoJSONEncoder)})
+
+    async def erreur(self, message, conversation_id=None):
+        await self.envoyer({'type': 'erreur', 'conversation': conversation_id, 'message': message})
+
+    async def lire(self):
+        """Trames du client, jusqu'à la déconnexion."""
+        while True:
+            evenement = await self.receive()
+            if evenement['type'] == 'websocket.disconnect':
+                return
+            if evenement['type'] != 'websocket.receive':
+                continue
+            try:
+                trame = json.loads(evenement.get('text') or evenement.get('bytes') or '')
+                action = self.actions[trame['type']]
+                conversation_id = int(trame['conversation'])
+            except (ValueError, KeyError, TypeError):
+                await self.erreur('Trame invalide.')
+                continue
+            await action(conversation_id, trame)
+
+    async def relayer(self):
+        """Trames des conversations suivies, vers le client."""
+        while True:
+            trame = await self.abonnement.recevoir(None)
+            if self.abonnement.debordement:
+                # Des trames ont été perdues : le client recharge le fil par l'API
+                self.abonnement.debordement = False
+                await self.envoyer({'type': 'resynchroniser'})
+            conversation_id = trame.get('conversation')
+            if conversation_id not in self.conversations:
+                # Reçue après le désabonnement
+                continue
+            if trame['type'] in ('frappe', 'presence') and trame['utilisateur'] == self.utilisateur_id:
+                continue
+            if trame['type'] == 'presence' and trame.get('annonce'):
+                # Un participant arrive : on lui signale qu'on est là
+                await self.annoncer(conversation_id, True, annonce=False)
+            await self.envoyer(trame)
+
+    async def annoncer(self, conversation_id, en_ligne, annonce=False):
+        await self.diffusion.apublier(canal_conversation(conversation_id), {
+            'type': 'presence', 'conversation': conversation_id, 'utilisateur': self.utilisateur_id,
+            'en_ligne': en_ligne, 'annonce': annonce,
+        })
+
+    def _conversation(self, conversation_id):
+        return Conversation.objects.filter(
+            Q(acheteur_id=self.utilisateur_id) | Q(vendeur_id=self.utilisateur_id), pk=conversation_id,
+        ).only('id', 'acheteur_id', 'vendeur_id').first()
+
+    async def abonner(self, conversation_id, trame=None):
+        if conversation_id not in self.conversations:
+            if len(self.conversations) >= settings.CHAT_ABONNEMENTS_MAX:
+                return await self.erreur("Trop de conversations suivies sur cette connexion.", conversation_id)
+            conversation = await sync_to_async(self._conversation)(conversation_id)
+            if conversation is None:
+                return await self.erreur('Conversation introuvable.', conversation_id)
+            self.conversations[conversation_id] = conversation
+            await self.diffusion.abonner(canal_conversation(conversation_id), self.abonnement)
+            await self.annoncer(conversation_id, True, annonce=True)
+        await self.envoyer({'type': 'abonne', 'conversation': conversation_id})
+
+    async def desabonner(self, conversation_id, trame=None):
+        if self.conversations.pop(conversation_id, None) is None:
+            return
+        self.derniere_frappe.pop(conversation_id, None)
+        await self.diffusion.desabonner(canal_conversation(conversation_id), self.abonnement)
+        await self.annoncer(conversation_id, False)
+
+    async def message(self, conversation_id, trame):
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return await self.erreur("Abonnez-vous d'abord à la conversation.", conversation_id)
+        contenu = trame.get('contenu')
+        contenu = contenu.strip() if isinstance(contenu, str) else ''
+        if not contenu or len(contenu) > settings.MESSAGE_LONGUEUR_MAX:
+            return await self.erreur(
+                f"Le message doit contenir entre 1 et {settings.MESSAGE_LONGUEUR_MAX} caractères.", conversation_id,
+            )
+        maintenant = time.monotonic()
+        if maintenant - self.dernier_message < settings.CHAT_MESSAGES_INTERVALLE:
+            # Contrairement à « frappe », le refus est signalé : le client renvoie le message plus tard
+            return await self.envoyer({
+                'type': 'erreur', 'conversation': conversation_id, 'ref': trame.get('ref'),
+                'message': "Trop de messages, patientez un instant.",
+            })
+        self.dernier_message = maintenant
+
+        uid = uuid.uuid4().hex
+        get_tampon().ajouter(Message(conversation=conversation, expediteur_id=self.utilisateur_id, contenu=contenu),
+                             uid)
+        await self.diffusion.apublier(canal_conversation(conversation_id), {
+            'type': 'message', 'conversation': conversation_id, 'ref': trame.get('ref'),
+            'message': {
+                'id': None, 'uid': uid, 'conversation': conversation_id, 'expediteur': self.utilisateur_id,
+                'contenu': contenu, 'timestamp': DateTimeField().to_representation(timezone.now()),
+            },
+        })
+
+    async def frappe(self, conversation_id, trame):
+        if conversation_id not in self.conversations:
+            return await self.erreur("Abonnez-vous d'abord à la conversation.", conversation_id)
+        maintenant = time.monotonic()
+        if maintenant - self.derniere_frappe.get(conversation_id, float('-inf')) < settings.CHAT_FRAPPE_INTERVALLE:
+            return
+        self.derniere_frappe[conversation_id] = maintenant
+        await self.diffusion.apublier(canal_conversation(conversation_id), {
+            'type': 'frappe', 'conversation': conversation_id, 'utilisateur': self.utilisateur_id,
+        })
+
+
+async def application_chat(scope, receive, send):
+    await ChatConsumer(scope, receive, send)()
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import DenseRank
+
+from .models import ClassementVendeur, Commande
+
+
+def enregistrer_vente(commande):
+    """
+    Ajoute une commande livrée aux totaux de son vendeur.
+
+    Les totaux sont incrémentés atomiquement dans la transaction en cours ;
+    les rangs sont recalculés par lots (recalculer_rangs), pas à chaque vente.
+    """
+    vendeur_id = commande.produit.vendeur_id
+    ClassementVendeur.objects.get_or_create(vendeur_id=vendeur_id)
+    ClassementVendeur.objects.filter(vendeur_id=vendeur_id).update(
+        total_ventes=F('total_ventes') + 1,
+        revenu_total=F('revenu_total') + commande.montant_total,
+    )
+
+
+def recalculer_rangs():
+    """
+    Recalcule le rang dense de chaque vendeur (1 pour le meilleur, par total
+    de ventes puis revenu décroissants) à partir de la table de classement.
+
+    Tâche périodique (commande recalculer_rangs) : le rang stocké est lu en
+    une requête par clé primaire, au prix de quelques minutes de retard sur
+    les dernières ventes. Seuls les rangs qui ont changé sont écrits ; les
+    totaux, incrémentés en parallèle par les livraisons, ne sont pas touchés.
+    """
+    classement = ClassementVendeur.objects.annotate(
+        nouveau_rang=Window(
+            DenseRank(),
+            order_by=[F('total_ventes').desc(), F('revenu_total').desc()],
+        )
+    ).filter(total_ventes__gt=0).only('vendeur_id', 'rang')
+
+    modifies = []
+    for ligne in classement:
+        if ligne.rang != ligne.nouveau_rang:
+            ligne.rang = ligne.nouveau_rang
+            modifies.append(ligne)
+    ClassementVendeur.objects.bulk_update(modifies, ['rang'], batch_size=500)
+    # Un vendeur sans vente sort du classement
+    retires = ClassementVendeur.objects.filter(total_ventes=0, rang__isnull=False).update(rang=None)
+    return len(modifies) + retires
+
+
+@transaction.atomic
+def reconstruire_classement():
+    """Reconstruit entièrement le classement depuis les commandes livrées."""
+    totaux = Commande.objects.filter(statut='livree').values('produit__vendeur').annotate(
+        total_ventes=Count('id'),
+        revenu_total=Sum('montant_total'),
+    ).order_by()
+
+    ClassementVendeur.objects.all().delete()
+    ClassementVendeur.objects.bulk_create([
+        ClassementVendeur(
+            vendeur_id=ligne['produit__vendeur'],
+            total_ventes=ligne['total_ventes'],
+            revenu_total=ligne['revenu_total'] or Decimal('0'),
+        )
+        for ligne in totaux
+    ], batch_size=1000)
+    recalculer_rangs()
+    return len(totaux)
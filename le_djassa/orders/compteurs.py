@@ -0,0 +1,112 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+from .models import Commande, CompteurCommandesVendeur
+
+# Statuts d'une commande que le vendeur doit encore traiter, un compteur chacun
+STATUTS_OUVERTS = ('en_attente', 'en_traitement', 'livraison_en_cours')
+
+
+def _appliquer(variations):
+    """
+    Applique des variations ``{vendeur_id: Counter({statut: n})}`` aux compteurs
+    en un nombre constant de requêtes, dans la transaction en cours.
+
+    Cas courant, un seul vendeur : un UPDATE, suivi de la création de la ligne
+    la première fois. Avec plusieurs vendeurs, les lignes sont d'abord
+    verrouillées dans l'ordre des id, pour que deux paniers concurrents ne
+    puissent pas s'interbloquer, et les manquantes créées.
+    """
+    variations = {vendeur_id: variation for vendeur_id, variation in variations.items() if any(variation.values())}
+    if not variations:
+        return
+
+    def creer(vendeur_ids):
+        # ignore_conflicts : la ligne a pu être créée par une transaction concurrente
+        CompteurCommandesVendeur.objects.bulk_create(
+            [CompteurCommandesVendeur(vendeur_id=vendeur_id) for vendeur_id in vendeur_ids], ignore_conflicts=True,
+        )
+
+    champs = {}
+    for statut in STATUTS_OUVERTS:
+        cas = [When(vendeur_id=vendeur_id, then=Value(variation[statut]))
+               for vendeur_id, variation in variations.items() if variation[statut]]
+        if cas:
+            champs[statut] = F(statut) + Case(*cas, default=Value(0), output_field=IntegerField())
+
+    compteurs = CompteurCommandesVendeur.objects.filter(vendeur_id__in=variations)
+    if len(variations) > 1:
+        existants = compteurs.select_for_update().order_by('vendeur_id').values_list('vendeur_id', flat=True)
+        manquants = variations.keys() - set(existants)
+        if manquants:
+            creer(manquants)
+        compteurs.update(**champs)
+    elif not compteurs.update(**champs):
+        creer(variations)
+        compteurs.update(**champs)
+
+
+def ajouter_commandes(commandes):
+    """Compte des commandes qui viennent d'être créées."""
+    variations = defaultdict(Counter)
+    for commande in commandes:
+        if commande.statut in STATUTS_OUVERTS:
+            variations[commande.vendeur_id][commande.statut] += 1
+    _appliquer(variations)
+
+
+def changer_statut(commande, ancien_statut, nouveau_statut):
+    """Déplace une commande d'un compteur à l'autre (ou hors des compteurs si elle est close)."""
+    variation = Counter()
+    if ancien_statut in STATUTS_OUVERTS:
+        variation[ancien_statut] -= 1
+    if nouveau_statut in STATUTS_OUVERTS:
+        variation[nouveau_statut] += 1
+    _appliquer({commande.vendeur_id: variation})
+
+
+def compter_commandes_ouvertes(vendeur_id):
+    """Nombre de commandes en attente, en traitement ou en livraison du vendeur : une lecture par clé primaire."""
+    compteur = CompteurCommandesVendeur.objects.filter(vendeur_id=vendeur_id).values_list(*STATUTS_OUVERTS).first()
+    return sum(compteur) if compteur else 0
+
+
+@transaction.atomic
+def reconcilier_compteurs(corriger=True):
+    """
+    Recompte les commandes ouvertes de chaque vendeur et renvoie les écarts
+    avec les compteurs, sous la forme ``(vendeur_id, statut, enregistre, reel)``.
+
+    Les compteurs sont verrouillés avant le recomptage : une création ou une
+    transition concurrente attend la fin de la réconciliation au lieu d'être
+    comptée deux fois ou pas du tout.
+    """
+    compteurs = {compteur.vendeur_id: compteur for compteur in CompteurCommandesVendeur.objects.select_for_update()}
+    reels = defaultdict(Counter)
+    totaux = Commande.objects.filter(statut__in=STATUTS_OUVERTS).values('vendeur_id', 'statut').annotate(
+        nombre=Count('id'),
+    ).order_by()
+    for ligne in totaux:
+        reels[ligne['vendeur_id']][ligne['statut']] = ligne['nombre']
+
+    ecarts, modifies, nouveaux = [], [], []
+    for vendeur_id in sorted(compteurs.keys() | reels.keys()):
+        compteur = compteurs.get(vendeur_id) or CompteurCommandesVendeur(vendeur_id=vendeur_id)
+        ecarts_vendeur = [
+            (vendeur_id, statut, getattr(compteur, statut), reels[vendeur_id][statut])
+            for statut in STATUTS_OUVERTS
+            if getattr(compteur, statut) != reels[vendeur_id][statut]
+        ]
+        if not ecarts_vendeur:
+            continue
+        ecarts.extend(ecarts_vendeur)
+        for _, statut, _, reel in ecarts_vendeur:
+            setattr(compteur, statut, reel)
+        (modifies if vendeur_id in compteurs else nouveaux).append(compteur)
+
+    if corriger:
+        CompteurCommandesVendeur.objects.bulk_update(modifies, STATUTS_OUVERTS, batch_size=500)
+        CompteurCommandesVendeur.objects.bulk_create(nouveaux, batch_size=1000)
+    return ecarts
@@ -0,0 +1,74 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import CleIdempotence
+
+EN_TETE = 'Idempotency-Key'
+LONGUEUR_MAX_CLE = 255
+
+
+class CleReutilisee(Exception):
+    """La même clé a déjà servi pour une requête différente."""
+
+
+def empreinte(donnees):
+    contenu = json.dumps(donnees, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+
+def reserver_cle(utilisateur, cle, donnees):
+    """
+    Réserve ``cle`` pour l'utilisateur dans la transaction en cours.
+
+    Retourne ``(enregistrement, reponse)`` : ``reponse`` est la réponse déjà
+    produite si la requête est un renvoi, sinon None et l'appelant doit
+    exécuter la requête puis appeler ``enregistrer_reponse``.
+
+    L'insertion de la clé et le traitement partagent la même transaction :
+    un doublon concurrent bloque sur l'index unique jusqu'à la fin du premier,
+    puis relit la réponse validée au lieu de recréer les commandes.
+    """
+    maintenant = timezone.now()
+    enregistrement, cree = CleIdempotence.objects.select_for_update().get_or_create(
+        utilisateur=utilisateur,
+        cle=cle,
+        defaults={
+            'empreinte_requete': empreinte(donnees),
+            'expire_le': maintenant + settings.IDEMPOTENCE_DUREE,
+        }
+    )
+    if cree:
+        return enregistrement, None
+
+    if enregistrement.expire_le <= maintenant:
+        # Clé expirée mais pas encore purgée : elle repart pour un nouveau cycle
+        enregistrement.empreinte_requete = empreinte(donnees)
+        enregistrement.expire_le = maintenant + settings.IDEMPOTENCE_DUREE
+        enregistrement.statut_reponse = None
+        enregistrement.reponse = None
+        enregistrement.save()
+        return enregistrement, None
+
+    if enregistrement.empreinte_requete != empreinte(donnees):
+        raise CleReutilisee()
+
+    reponse = Response(enregistrement.reponse, status=enregistrement.statut_reponse)
+    reponse['Idempotent-Replayed'] = 'true'
+    return enregistrement, reponse
+
+
+def enregistrer_reponse(enregistrement, reponse):
+    enregistrement.statut_reponse = reponse.status_code
+    enregistrement.reponse = reponse.data
+    enregistrement.save(update_fields=['statut_reponse', 'reponse'])
+
+
+def purger_cles_expirees():
+    """Supprime les clés expirées ; la requête est servie par l'index sur expire_le."""
+    supprimees, _ = CleIdempotence.objects.filter(expire_le__lte=timezone.now()).delete()
+    return supprimees
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.idempotence import purger_cles_expirees
+
+
+class Command(BaseCommand):
+    help = "Supprime les clés d'idempotence expirées des passages de commande."
+
+    def handle(self, *args, **options):
+        nombre = purger_cles_expirees()
+        self.stdout.write(self.style.SUCCESS(f"{nombre} clé(s) expirée(s) supprimée(s)."))
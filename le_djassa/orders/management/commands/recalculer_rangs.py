@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.classement import recalculer_rangs
+
+
+class Command(BaseCommand):
+    help = "Recalcule le rang des vendeurs dans le classement (à planifier, par exemple toutes les 5 minutes)."
+
+    def handle(self, *args, **options):
+        nombre = recalculer_rangs()
+        self.stdout.write(self.style.SUCCESS(f"{nombre} rang(s) mis à jour."))
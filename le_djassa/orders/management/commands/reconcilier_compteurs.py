@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from orders.compteurs import reconcilier_compteurs
+
+
+class Command(BaseCommand):
+    help = "Recompte les commandes ouvertes de chaque vendeur et corrige les compteurs qui ont dérivé."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verifier', action='store_true',
+                            help="Signale les écarts sans corriger les compteurs.")
+
+    def handle(self, *args, **options):
+        ecarts = reconcilier_compteurs(corriger=not options['verifier'])
+        for vendeur_id, statut, enregistre, reel in ecarts:
+            self.stdout.write(f"Vendeur {vendeur_id}, {statut} : {enregistre} enregistré(s), {reel} réel(s).")
+
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS("Aucun écart : les compteurs sont à jour."))
+        elif options['verifier']:
+            self.stdout.write(self.style.WARNING(f"{len(ecarts)} écart(s) trouvé(s), non corrigé(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(ecarts)} écart(s) corrigé(s)."))
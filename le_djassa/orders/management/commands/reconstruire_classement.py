@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.classement import reconstruire_classement
+
+
+class Command(BaseCommand):
+    help = "Reconstruit le classement des vendeurs à partir des commandes livrées."
+
+    def handle(self, *args, **options):
+        nombre = reconstruire_classement()
+        self.stdout.write(self.style.SUCCESS(f"Classement reconstruit pour {nombre} vendeur(s)."))
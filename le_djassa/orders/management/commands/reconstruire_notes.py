@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from orders.notes import reconstruire_notes
+
+
+class Command(BaseCommand):
+    help = "Recalcule les notes des produits et des vendeurs à partir des évaluations."
+
+    def handle(self, *args, **options):
+        produits, vendeurs = reconstruire_notes()
+        self.stdout.write(self.style.SUCCESS(
+            f"Notes reconstruites : {produits} produit(s) et {vendeurs} vendeur(s) corrigé(s)."
+        ))
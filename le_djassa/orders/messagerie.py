@@ -0,0 +1,112 @@
+from django.db.models import BigIntegerField, Case, DateTimeField, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from notifications.diffusion import diffuser, publier_apres_validation
+from .models import Conversation, Message
+from .serializers import MessageSerializer
+
+
+def autre_role(role):
+    return 'vendeur' if role == 'acheteur' else 'acheteur'
+
+
+def canal_conversation(conversation_id):
+    """Canal de diffusion des abonnés au chat d'une conversation (orders.chat)."""
+    return f'conversation:{conversation_id}'
+
+
+def _par_conversation(valeurs, defaut, type_champ):
+    return Case(*[When(pk=pk, then=Value(valeur)) for pk, valeur in valeurs.items()],
+                default=defaut, output_field=type_champ)
+
+
+def enregistrer_messages(messages, diffuser_au_fil=True):
+    """
+    Enregistre des messages (instances non sauvegardées, conversation chargée)
+    en une insertion groupée, puis met à jour toutes leurs conversations en un
+    seul UPDATE : dernier message, date d'activité, un non-lu de plus pour le
+    destinataire de chaque message. L'expéditeur a lu ses propres messages.
+
+    Greatest() garde le message le plus récent si deux envois concurrents
+    sont validés dans le désordre, sans verrouiller les conversations.
+
+    Après validation, chaque destinataire est prévenu sur son flux
+    d'évènements et, si ``diffuser_au_fil``, les abonnés du chat de la
+    conversation reçoivent le message.
+    """
+    messages = Message.objects.bulk_create(messages)
+    derniers, dates, lus, non_lus = {}, {}, {'acheteur': {}, 'vendeur': {}}, {'acheteur': {}, 'vendeur': {}}
+    for message in messages:
+        conversation = message.conversation
+        role = 'acheteur' if message.expediteur_id == conversation.acheteur_id else 'vendeur'
+        destinataire = autre_role(role)
+        # Insérés dans l'ordre : le dernier message de la liste est le plus récent
+        derniers[conversation.pk] = message.pk
+        dates[conversation.pk] = message.timestamp
+        lus[role][conversation.pk] = message.pk
+        non_lus[destinataire][conversation.pk] = non_lus[destinataire].get(conversation.pk, 0) + 1
+
+    champs = {
+        'dernier_message': Greatest(Coalesce('dernier_message', Value(0), output_field=BigIntegerField()),
+                                    _par_conversation(derniers, Value(0), BigIntegerField()),
+                                    output_field=BigIntegerField()),
+        'dernier_message_le': Greatest('dernier_message_le',
+                                       _par_conversation(dates, F('dernier_message_le'), DateTimeField())),
+    }
+    for role in ('acheteur', 'vendeur'):
+        if lus[role]:
+            champs[f'lu_jusqu_a_{role}'] = Greatest(f'lu_jusqu_a_{role}',
+                                                    _par_conversation(lus[role], Value(0), BigIntegerField()))
+        if non_lus[role]:
+            champs[f'non_lus_{role}'] = F(f'non_lus_{role}') + _par_conversation(non_lus[role], Value(0),
+                                                                                 IntegerField())
+    Conversation.objects.filter(pk__in=derniers).update(**champs)
+
+    for message in messages:
+        conversation = message.conversation
+        donnees = MessageSerializer(message).data
+        destinataire_id = conversation.vendeur_id if message.expediteur_id == conversation.acheteur_id \
+            else conversation.acheteur_id
+        diffuser([destinataire_id], 'nouveau_message', {'conversation': conversation.pk, 'message': donnees})
+        if diffuser_au_fil:
+            publier_apres_validation([canal_conversation(conversation.pk)], {
+                'type': 'message', 'conversation': conversation.pk, 'message': {**donnees, 'uid': None},
+            })
+    return messages
+
+
+def envoyer_message(conversation, expediteur, contenu):
+    """Enregistre un message envoyé par l'API HTTP (voir enregistrer_messages)."""
+    return enregistrer_messages([Message(conversation=conversation, expediteur=expediteur, contenu=contenu)])[0]
+
+
+def marquer_lu(conversation, role, jusqu_a=None):
+    """
+    Marque comme lus, pour le participant `role`, les messages jusqu'à l'id
+    `jusqu_a` inclus (par défaut, jusqu'au dernier). La lecture n'avance
+    jamais à reculons. Renvoie ``(lu_jusqu_a, non_lus)``.
+
+    La conversation doit avoir été verrouillée par l'appelant
+    (select_for_update) : un message envoyé entre-temps ne peut pas être
+    effacé du compte des non-lus. Dans le cas courant, tout lire, aucun
+    message n'est compté.
+    """
+    dernier = conversation.dernier_message_id or 0
+    deja_lu = getattr(conversation, f'lu_jusqu_a_{role}')
+    lu = max(deja_lu, min(dernier if jusqu_a is None else jusqu_a, dernier))
+    if lu >= dernier:
+        non_lus = 0
+    else:
+        # Les id des messages croissent comme leur timestamp : « lu jusqu'à l'id » suit l'ordre du fil
+        non_lus = Message.objects.filter(conversation=conversation, id__gt=lu).exclude(
+            expediteur_id=getattr(conversation, f'{role}_id'),
+        ).count()
+
+    if (lu, non_lus) != (deja_lu, getattr(conversation, f'non_lus_{role}')):
+        Conversation.objects.filter(pk=conversation.pk).update(**{
+            f'lu_jusqu_a_{role}': lu,
+            f'non_lus_{role}': non_lus,
+        })
+        setattr(conversation, f'lu_jusqu_a_{role}', lu)
+        setattr(conversation, f'non_lus_{role}', non_lus)
+    return lu, non_lus
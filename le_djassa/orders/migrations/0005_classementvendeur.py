@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def remplir_classement(apps, schema_editor):
+    # Premier remplissage ; ensuite orders.classement tient la table à jour
+    Commande = apps.get_model('orders', 'Commande')
+    ClassementVendeur = apps.get_model('orders', 'ClassementVendeur')
+    totaux = Commande.objects.filter(statut='livree').values('produit__vendeur').annotate(
+        total_ventes=Count('id'),
+        revenu_total=Sum('montant_total'),
+    ).order_by('-total_ventes', '-revenu_total')
+
+    lignes, precedent, rang = [], None, 0
+    for ligne in totaux:
+        if (ligne['total_ventes'], ligne['revenu_total']) != precedent:
+            rang += 1
+            precedent = (ligne['total_ventes'], ligne['revenu_total'])
+        lignes.append(ClassementVendeur(
+            vendeur_id=ligne['produit__vendeur'],
+            total_ventes=ligne['total_ventes'],
+            revenu_total=ligne['revenu_total'],
+            rang=rang,
+        ))
+    ClassementVendeur.objects.bulk_create(lignes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_commande_date_annulee_commande_date_en_traitement_and_more'),
+        ('products', '0009_produit_filtres_indexes'),
+        ('users', '0005_delete_feedback'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassementVendeur',
+            fields=[
+                ('vendeur', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='classement', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_ventes', models.PositiveIntegerField(default=0)),
+                ('revenu_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rang', models.PositiveIntegerField(blank=True, null=True)),
+                ('mis_a_jour_le', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-total_ventes', '-revenu_total'], name='classement_totaux_idx')],
+            },
+        ),
+        migrations.RunPython(remplir_classement, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:18
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_classementvendeur'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CleIdempotence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(max_length=255)),
+                ('empreinte_requete', models.CharField(max_length=64)),
+                ('statut_reponse', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('reponse', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('cree_le', models.DateTimeField(auto_now_add=True)),
+                ('expire_le', models.DateTimeField(db_index=True)),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cles_idempotence', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('utilisateur', 'cle'), name='cle_idempotence_unique')],
+            },
+        ),
+    ]
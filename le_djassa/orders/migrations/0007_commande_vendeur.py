@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def remplir_vendeur(apps, schema_editor):
+    Commande = apps.get_model('orders', 'Commande')
+    Produit = apps.get_model('products', 'Produit')
+    Commande.objects.update(
+        vendeur=Subquery(Produit.objects.filter(id=OuterRef('produit_id')).values('vendeur_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_cleidempotence'),
+        ('products', '0010_variantes_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='vendeur',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='commandes_recues', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(remplir_vendeur, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='commande',
+            name='vendeur',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commandes_recues', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['vendeur', '-cree_le', '-id'], name='commande_vendeur_cree_le_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['vendeur', 'statut', '-cree_le', '-id'], name='commande_vendeur_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['produit', '-cree_le', '-id'], name='commande_produit_cree_le_idx'),
+        ),
+    ]
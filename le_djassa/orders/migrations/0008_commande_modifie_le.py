@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:33
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def remplir_modifie_le(apps, schema_editor):
+    # Date du dernier changement de statut connu, sinon de création
+    Commande = apps.get_model('orders', 'Commande')
+    Commande.objects.update(modifie_le=Coalesce(
+        'date_livree', 'date_annulee', 'date_livraison', 'date_en_traitement', 'cree_le',
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_commande_vendeur'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commande',
+            name='modifie_le',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(remplir_modifie_le, migrations.RunPython.noop),
+    ]
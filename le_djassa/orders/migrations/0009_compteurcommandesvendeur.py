@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remplir_compteurs(apps, schema_editor):
+    # Premier remplissage ; ensuite orders.compteurs tient la table à jour
+    Commande = apps.get_model('orders', 'Commande')
+    CompteurCommandesVendeur = apps.get_model('orders', 'CompteurCommandesVendeur')
+    totaux = Commande.objects.filter(
+        statut__in=['en_attente', 'en_traitement', 'livraison_en_cours'],
+    ).values('vendeur_id', 'statut').annotate(nombre=Count('id')).order_by()
+
+    compteurs = {}
+    for ligne in totaux:
+        compteur = compteurs.setdefault(ligne['vendeur_id'], CompteurCommandesVendeur(vendeur_id=ligne['vendeur_id']))
+        setattr(compteur, ligne['statut'], ligne['nombre'])
+    CompteurCommandesVendeur.objects.bulk_create(compteurs.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_commande_modifie_le'),
+        ('users', '0005_delete_feedback'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurCommandesVendeur',
+            fields=[
+                ('vendeur', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='compteur_commandes', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('en_attente', models.IntegerField(default=0)),
+                ('en_traitement', models.IntegerField(default=0)),
+                ('livraison_en_cours', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(remplir_compteurs, migrations.RunPython.noop),
+    ]
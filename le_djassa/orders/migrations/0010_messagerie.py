@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Exists, F, Min, OuterRef, Subquery
+
+
+def fusionner_conversations(apps, schema_editor):
+    # Avant la contrainte d'unicité : les conversations d'un même acheteur sur
+    # un même produit sont fusionnées dans la plus ancienne, avec leurs messages
+    Conversation = apps.get_model('orders', 'Conversation')
+    Message = apps.get_model('orders', 'Message')
+    doublons = list(
+        Conversation.objects.values('acheteur_id', 'produit_id')
+        .annotate(nombre=Count('id'), gardee=Min('id'))
+        .filter(nombre__gt=1)
+    )
+    for doublon in doublons:
+        autres = Conversation.objects.filter(
+            acheteur_id=doublon['acheteur_id'], produit_id=doublon['produit_id'],
+        ).exclude(pk=doublon['gardee'])
+        Message.objects.filter(conversation__in=autres).update(conversation_id=doublon['gardee'])
+        autres.delete()
+
+
+def remplir_conversations(apps, schema_editor):
+    # Premier remplissage ; ensuite orders.messagerie tient ces champs à jour.
+    # L'historique existant est considéré comme lu par les deux participants.
+    Conversation = apps.get_model('orders', 'Conversation')
+    Message = apps.get_model('orders', 'Message')
+    derniers = Message.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp', '-id')
+    Conversation.objects.filter(Exists(Message.objects.filter(conversation=OuterRef('pk')))).update(
+        dernier_message=Subquery(derniers.values('id')[:1]),
+        dernier_message_le=Subquery(derniers.values('timestamp')[:1]),
+    )
+    Conversation.objects.filter(dernier_message__isnull=False).update(
+        lu_jusqu_a_acheteur=F('dernier_message'),
+        lu_jusqu_a_vendeur=F('dernier_message'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_compteurcommandesvendeur'),
+        ('products', '0012_produit_couverture'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='dernier_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='orders.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='dernier_message_le',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='lu_jusqu_a_acheteur',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='lu_jusqu_a_vendeur',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='non_lus_acheteur',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='non_lus_vendeur',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fusionner_conversations, migrations.RunPython.noop),
+        migrations.RunPython(remplir_conversations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['acheteur', '-dernier_message_le', '-id'], name='conversation_acheteur_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['vendeur', '-dernier_message_le', '-id'], name='conversation_vendeur_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', '-timestamp', '-id'], name='message_conversation_ts_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('acheteur', 'produit'), name='conversation_acheteur_produit_unique'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+NOTES = range(1, 6)
+CHAMPS_NOTES = ('nombre_notes', 'somme_notes') + tuple(f'notes_{note}' for note in NOTES)
+
+
+def remplir_notes(apps, schema_editor):
+    Evaluation = apps.get_model('orders', 'Evaluation')
+    NotesVendeur = apps.get_model('orders', 'NotesVendeur')
+    Produit = apps.get_model('products', 'Produit')
+
+    def agreger(cle):
+        return Evaluation.objects.values(cle).annotate(
+            nombre_notes=Count('id'),
+            somme_notes=Sum('note'),
+            **{f'notes_{note}': Count('id', filter=Q(note=note)) for note in NOTES},
+        ).order_by()
+
+    produits = []
+    for ligne in agreger('commande__produit'):
+        produit = Produit(pk=ligne['commande__produit'])
+        for champ in CHAMPS_NOTES:
+            setattr(produit, champ, ligne[champ])
+        produits.append(produit)
+    Produit.objects.bulk_update(produits, CHAMPS_NOTES, batch_size=500)
+    NotesVendeur.objects.bulk_create([
+        NotesVendeur(vendeur_id=ligne['commande__vendeur'], **{champ: ligne[champ] for champ in CHAMPS_NOTES})
+        for ligne in agreger('commande__vendeur')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_messagerie'),
+        ('products', '0013_produit_notes'),
+        ('users', '0005_delete_feedback'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotesVendeur',
+            fields=[
+                ('vendeur', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notes_vendeur', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('nombre_notes', models.IntegerField(default=0)),
+                ('somme_notes', models.IntegerField(default=0)),
+                ('notes_1', models.IntegerField(default=0)),
+                ('notes_2', models.IntegerField(default=0)),
+                ('notes_3', models.IntegerField(default=0)),
+                ('notes_4', models.IntegerField(default=0)),
+                ('notes_5', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(remplir_notes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_notesvendeur'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notesvendeur',
+            name='mis_a_jour_le',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
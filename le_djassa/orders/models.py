@@ -1,4 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from users.models import Utilisateur
 from products.models import Produit
@@ -22,17 +24,29 @@ class Commande(models.Model):
 
     acheteur = models.ForeignKey(Utilisateur, on_delete=models.CASCADE, related_name='commandes_passees')
     produit = models.ForeignKey(Produit, on_delete=models.CASCADE, related_name='commandes')
+    # Copie de produit.vendeur : permet d'indexer le flux de commandes du vendeur
+    vendeur = models.ForeignKey(Utilisateur, on_delete=models.CASCADE, related_name='commandes_recues')
     quantite = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
     montant_total = models.DecimalField(max_digits=10, decimal_places=2)
     statut = models.CharField(max_length=50, choices=STATUT_CHOICES)
     methode_paiement = models.CharField(max_length=50, choices=METHODES_PAIEMENT)
     infos_livraison = models.TextField(blank=True, null=True)
     cree_le = models.DateTimeField(auto_now_add=True)
+    # Validateur des GET conditionnels (orders.views.CommandeDetailClientView)
+    modifie_le = models.DateTimeField(auto_now=True)
     date_en_traitement = models.DateTimeField(null=True, blank=True)
     date_livraison = models.DateTimeField(null=True, blank=True)
     date_livree = models.DateTimeField(null=True, blank=True)
     date_annulee = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Flux des commandes du vendeur, avec ou sans filtre de statut / produit
+            models.Index(fields=['vendeur', '-cree_le', '-id'], name='commande_vendeur_cree_le_idx'),
+            models.Index(fields=['vendeur', 'statut', '-cree_le', '-id'], name='commande_vendeur_statut_idx'),
+            models.Index(fields=['produit', '-cree_le', '-id'], name='commande_produit_cree_le_idx'),
+        ]
+
     def __str__(self):
         return f'Commande {self.id} par {self.acheteur.username}'
 
@@ -48,16 +62,121 @@ class HistoriqueStatutCommande(models.Model):
         ordering = ['-date_changement']
 
 
+# Classement des vendeurs : totaux des commandes livrées, tenus à jour par
+# orders.classement à chaque livraison pour éviter d'agréger à la lecture
+class ClassementVendeur(models.Model):
+    vendeur = models.OneToOneField(Utilisateur, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='classement')
+    total_ventes = models.PositiveIntegerField(default=0)
+    revenu_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Rang dense, recalculé périodiquement (orders.classement.recalculer_rangs) ; vide avant le premier calcul
+    rang = models.PositiveIntegerField(null=True, blank=True)
+    mis_a_jour_le = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-total_ventes', '-revenu_total'], name='classement_totaux_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.vendeur.username} : {self.total_ventes} ventes (rang {self.rang})'
+
+
+# Commandes ouvertes de chaque vendeur, par statut : tenues à jour par
+# orders.compteurs dans la transaction de chaque création ou transition, pour
+# que le badge du tableau de bord soit une lecture par clé primaire
+class CompteurCommandesVendeur(models.Model):
+    vendeur = models.OneToOneField(Utilisateur, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='compteur_commandes')
+    # Signés : un écart (corrigé par reconcilier_compteurs) ne doit pas bloquer une transition
+    en_attente = models.IntegerField(default=0)
+    en_traitement = models.IntegerField(default=0)
+    livraison_en_cours = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.vendeur_id} : {self.en_attente} / {self.en_traitement} / {self.livraison_en_cours}'
+
+
+# Notes reçues par chaque vendeur : nombre, somme et histogramme des
+# évaluations de ses commandes, tenus à jour par orders.notes à chaque
+# écriture d'une Evaluation (ceux de chaque produit sont sur Produit)
+class NotesVendeur(models.Model):
+    vendeur = models.OneToOneField(Utilisateur, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='notes_vendeur')
+    # Signés, comme les compteurs de commandes : un écart est corrigé par reconstruire_notes
+    nombre_notes = models.IntegerField(default=0)
+    somme_notes = models.IntegerField(default=0)
+    notes_1 = models.IntegerField(default=0)
+    notes_2 = models.IntegerField(default=0)
+    notes_3 = models.IntegerField(default=0)
+    notes_4 = models.IntegerField(default=0)
+    notes_5 = models.IntegerField(default=0)
+    # Entre dans le validateur du détail des produits du vendeur, qui affiche ces notes
+    mis_a_jour_le = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.vendeur_id} : {self.nombre_notes} note(s)'
+
+
+# Clé d'idempotence d'un passage de commande : la réponse est conservée pour
+# être rejouée si le client renvoie la même requête (voir orders.idempotence)
+class CleIdempotence(models.Model):
+    utilisateur = models.ForeignKey(Utilisateur, on_delete=models.CASCADE, related_name='cles_idempotence')
+    cle = models.CharField(max_length=255)
+    empreinte_requete = models.CharField(max_length=64)
+    statut_reponse = models.PositiveSmallIntegerField(null=True, blank=True)
+    reponse = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    cree_le = models.DateTimeField(auto_now_add=True)
+    expire_le = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['utilisateur', 'cle'], name='cle_idempotence_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.cle} ({self.utilisateur_id})'
+
+
 # Modèle de conversation
 class Conversation(models.Model):
     acheteur = models.ForeignKey(Utilisateur, on_delete=models.CASCADE,
                                  related_name='conversations_en_tant_qu_acheteur')
     vendeur = models.ForeignKey(Utilisateur, on_delete=models.CASCADE, related_name='conversations_en_tant_qu_vendeur')
     produit = models.ForeignKey(Produit, on_delete=models.CASCADE, related_name='conversations')
+    # Dénormalisés par orders.messagerie à chaque message : la boîte de réception
+    # se lit sans agréger les messages
+    dernier_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True,
+                                        related_name='+')
+    dernier_message_le = models.DateTimeField(default=timezone.now)
+    # Lecture de chaque participant : id du dernier message lu et nombre de messages non lus
+    lu_jusqu_a_acheteur = models.PositiveBigIntegerField(default=0)
+    lu_jusqu_a_vendeur = models.PositiveBigIntegerField(default=0)
+    non_lus_acheteur = models.PositiveIntegerField(default=0)
+    non_lus_vendeur = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Une conversation par acheteur et par produit
+            models.UniqueConstraint(fields=['acheteur', 'produit'], name='conversation_acheteur_produit_unique'),
+        ]
+        indexes = [
+            # Boîte de réception de chaque participant, la plus récente en premier
+            models.Index(fields=['acheteur', '-dernier_message_le', '-id'], name='conversation_acheteur_idx'),
+            models.Index(fields=['vendeur', '-dernier_message_le', '-id'], name='conversation_vendeur_idx'),
+        ]
 
     def __str__(self):
         return f'Conversation à propos de {self.produit.nom}'
 
+    def role(self, utilisateur):
+        """'acheteur' ou 'vendeur' selon le participant, None pour un tiers."""
+        if utilisateur.pk == self.acheteur_id:
+            return 'acheteur'
+        if utilisateur.pk == self.vendeur_id:
+            return 'vendeur'
+        return None
+
 
 # Modèle de message
 class Message(models.Model):
@@ -66,6 +185,12 @@ class Message(models.Model):
     contenu = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Fil de la conversation, paginé par curseur sur (timestamp, id)
+            models.Index(fields=['conversation', '-timestamp', '-id'], name='message_conversation_ts_idx'),
+        ]
+
     def __str__(self):
         return f'Message de {self.expediteur.username} à {self.timestamp}'
 
@@ -0,0 +1,135 @@
+"""
+Agrégats des évaluations : nombre de notes, somme et histogramme des notes
+de 1 à 5, par produit (colonnes de Produit) et par vendeur (NotesVendeur).
+
+Tenus à jour par orders.signals à chaque création, modification ou
+suppression d'une Evaluation, pour que listes et détail des produits
+affichent les notes sans agréger les évaluations à la lecture : la liste lit
+les colonnes du produit, le détail y joint la ligne de son vendeur.
+reconstruire_notes() recalcule le tout depuis les évaluations.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from products.cache import invalider, invalider_produits
+from products.models import Produit
+from .models import Commande, Evaluation, NotesVendeur
+
+NOTES = range(1, 6)
+CHAMPS_NOTES = ('nombre_notes', 'somme_notes') + tuple(f'notes_{note}' for note in NOTES)
+
+
+def resumer_notes(nombre, somme, *histogramme):
+    """Représentation des agrégats (dans l'ordre de CHAMPS_NOTES), partagée par les serializers."""
+    return {
+        'nombre': nombre,
+        'somme': somme,
+        'moyenne': round(somme / nombre, 2) if nombre > 0 else None,
+        # Clés textuelles : ce sont celles du JSON
+        'histogramme': {str(note): compte for note, compte in zip(NOTES, histogramme)},
+    }
+
+
+def _variation(note, sens):
+    # Une note hors de 1..5 (écrite sans passer par les validateurs du modèle) n'entre pas dans les agrégats
+    if note not in NOTES:
+        return {}
+    return {'nombre_notes': sens, 'somme_notes': sens * note, f'notes_{note}': sens}
+
+
+def _appliquer(commande_id, variation):
+    """
+    Reporte une variation ``{champ: n}`` sur les agrégats du produit et du
+    vendeur de la commande : deux UPDATE, suivis de la création de la ligne du
+    vendeur à sa première note.
+
+    Seule la ligne du produit noté est écrite. Le détail des autres produits
+    du vendeur, qui affiche aussi ses notes, suit le mis_a_jour_le de
+    NotesVendeur (validateur du GET conditionnel) et l'étiquette de cache
+    ``vendeur:<id>``.
+    """
+    variation = {champ: n for champ, n in variation.items() if n}
+    commande = Commande.objects.filter(pk=commande_id).values('produit_id', 'vendeur_id').first()
+    if not variation or commande is None:
+        return
+    produit_id, vendeur_id = commande['produit_id'], commande['vendeur_id']
+
+    champs = {champ: F(champ) + n for champ, n in variation.items()}
+    with transaction.atomic():
+        Produit.objects.filter(pk=produit_id).update(modifie_le=Now(), **champs)
+        notes = NotesVendeur.objects.filter(vendeur_id=vendeur_id)
+        if not notes.update(mis_a_jour_le=Now(), **champs):
+            # ignore_conflicts : la ligne a pu être créée par une transaction concurrente
+            NotesVendeur.objects.bulk_create([NotesVendeur(vendeur_id=vendeur_id)], ignore_conflicts=True)
+            notes.update(mis_a_jour_le=Now(), **champs)
+    invalider(f'produit:{produit_id}', f'vendeur:{vendeur_id}')
+
+
+def ajouter_note(commande_id, note):
+    _appliquer(commande_id, _variation(note, 1))
+
+
+def retirer_note(commande_id, note):
+    _appliquer(commande_id, _variation(note, -1))
+
+
+def modifier_note(commande_id, ancienne_note, nouvelle_note):
+    """Remplace une note par une autre sur la même commande : le nombre de notes ne change pas."""
+    variation = _variation(ancienne_note, -1)
+    for champ, n in _variation(nouvelle_note, 1).items():
+        variation[champ] = variation.get(champ, 0) + n
+    _appliquer(commande_id, variation)
+
+
+def _agreger(cle):
+    """Agrégats des évaluations, une ligne par valeur de `cle`, en une requête GROUP BY."""
+    return Evaluation.objects.filter(note__in=NOTES).values(cle).annotate(
+        nombre_notes=Count('id'),
+        somme_notes=Sum('note'),
+        **{f'notes_{note}': Count('id', filter=Q(note=note)) for note in NOTES},
+    ).order_by()
+
+
+@transaction.atomic
+def reconstruire_notes():
+    """
+    Recalcule les notes de tous les produits et vendeurs depuis les
+    évaluations. Seuls les produits et vendeurs dont les notes changent sont
+    écrits (et leur cache invalidé). Renvoie le nombre de produits et de
+    vendeurs corrigés.
+    """
+    reels = {ligne['commande__produit']: ligne for ligne in _agreger('commande__produit')}
+    aucune_note = Q(**{champ: 0 for champ in CHAMPS_NOTES})
+    maintenant = timezone.now()
+    produits = []
+    for produit in Produit.objects.filter(~aucune_note | Q(pk__in=reels)).only(*CHAMPS_NOTES):
+        valeurs = reels.get(produit.pk, {})
+        if any(getattr(produit, champ) != valeurs.get(champ, 0) for champ in CHAMPS_NOTES):
+            for champ in CHAMPS_NOTES:
+                setattr(produit, champ, valeurs.get(champ, 0))
+            produit.modifie_le = maintenant
+            produits.append(produit)
+    Produit.objects.bulk_update(produits, CHAMPS_NOTES + ('modifie_le',), batch_size=500)
+
+    # Vendeurs : une ligne sans note est remise à zéro plutôt que supprimée, pour que son
+    # mis_a_jour_le (validateur du détail des produits) ne recule pas
+    reels = {ligne['commande__vendeur']: ligne for ligne in _agreger('commande__vendeur')}
+    vendeurs, nouveaux = [], []
+    for notes in NotesVendeur.objects.select_for_update():
+        valeurs = reels.pop(notes.vendeur_id, {})
+        if any(getattr(notes, champ) != valeurs.get(champ, 0) for champ in CHAMPS_NOTES):
+            for champ in CHAMPS_NOTES:
+                setattr(notes, champ, valeurs.get(champ, 0))
+            notes.mis_a_jour_le = maintenant
+            vendeurs.append(notes)
+    for vendeur_id, valeurs in reels.items():
+        nouveaux.append(NotesVendeur(vendeur_id=vendeur_id, **{champ: valeurs[champ] for champ in CHAMPS_NOTES}))
+    NotesVendeur.objects.bulk_update(vendeurs, CHAMPS_NOTES + ('mis_a_jour_le',), batch_size=500)
+    NotesVendeur.objects.bulk_create(nouveaux, batch_size=1000)
+    corriges = [notes.vendeur_id for notes in vendeurs + nouveaux]
+
+    invalider_produits([produit.pk for produit in produits])
+    invalider(*[f'vendeur:{vendeur_id}' for vendeur_id in corriges])
+    return len(produits), len(corriges)
@@ -0,0 +1,21 @@
+from django.conf import settings
+
+from products.pagination import KeysetPagination
+
+
+class CommandePagination(KeysetPagination):
+    ordering = ('-cree_le', '-id')
+    page_size = settings.COMMANDES_PAGE_SIZE
+    max_page_size = settings.COMMANDES_MAX_PAGE_SIZE
+
+
+class ConversationPagination(KeysetPagination):
+    ordering = ('-dernier_message_le', '-id')
+    page_size = settings.CONVERSATIONS_PAGE_SIZE
+    max_page_size = settings.CONVERSATIONS_MAX_PAGE_SIZE
+
+
+class MessagePagination(KeysetPagination):
+    ordering = ('-timestamp', '-id')
+    page_size = settings.MESSAGES_PAGE_SIZE
+    max_page_size = settings.MESSAGES_MAX_PAGE_SIZE
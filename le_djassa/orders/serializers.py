@@ -1,7 +1,12 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Commande, Conversation, Message, Evaluation
 from users.serializers import UserDetailSerializer
 from products.serializers import ProduitSerializer
+from products.models import Produit
+from users.models import Utilisateur
+from le_djassa.valeurs import Dates, UrlsFichiers, ValeursSerializer
+from .notes import NOTES
 from django.utils import formats
 from datetime import datetime
 
@@ -15,6 +20,14 @@ class CommandeCreateSerializer(serializers.ModelSerializer):
         return Commande.objects.create(**validated_data)
 
 
+class LigneCommandeSerializer(serializers.Serializer):
+    """Article du panier envoyé au passage de commande ; validé sans requête SQL."""
+    produit = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    montant_total = serializers.DecimalField(max_digits=10, decimal_places=2)
+    adresse_livraison = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
 class CommandeSerializer(serializers.ModelSerializer):
     acheteur = UserDetailSerializer()  # Sérialiseur imbriqué pour l'utilisateur acheteur
     produit = ProduitSerializer()  # Sérialiseur imbriqué pour le produit de la commande
@@ -26,6 +39,28 @@ class CommandeSerializer(serializers.ModelSerializer):
             'cree_le')
 
 
+class AcheteurResumeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Utilisateur
+        fields = ('username',)
+
+
+class ProduitResumeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Produit
+        fields = ('id', 'nom', 'prix', 'couverture_miniature')
+
+
+class CommandeVendeurSerializer(serializers.ModelSerializer):
+    """Ligne du tableau de bord vendeur : uniquement les colonnes affichées."""
+    acheteur = AcheteurResumeSerializer(read_only=True)
+    produit = ProduitResumeSerializer(read_only=True)
+
+    class Meta:
+        model = Commande
+        fields = ('id', 'acheteur', 'produit', 'montant_total', 'quantite', 'statut', 'methode_paiement', 'cree_le')
+
+
 class ConversationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Conversation
@@ -38,8 +73,99 @@ class MessageSerializer(serializers.ModelSerializer):
         fields = ('id', 'conversation', 'expediteur', 'contenu', 'timestamp')
 
 
+class NouvelleConversationSerializer(serializers.Serializer):
+    """Ouverture d'une conversation par un acheteur, avec un premier message facultatif."""
+    produit = serializers.IntegerField()
+    contenu = serializers.CharField(required=False, max_length=settings.MESSAGE_LONGUEUR_MAX)
+
+
+class NouveauMessageSerializer(serializers.Serializer):
+    contenu = serializers.CharField(max_length=settings.MESSAGE_LONGUEUR_MAX)
+
+
+class MarquerLuSerializer(serializers.Serializer):
+    # Id du dernier message lu ; par défaut, toute la conversation
+    jusqu_a = serializers.IntegerField(required=False, min_value=0)
+
+
+class ConversationValeursSerializer(ValeursSerializer):
+    """
+    Boîte de réception : une ligne par conversation, vue du participant
+    connecté (context['request'].user), avec le dernier message et le nombre
+    de non-lus dénormalisés sur la conversation. Une seule requête par page.
+    """
+    colonnes = ('id', 'acheteur_id', 'acheteur__username', 'vendeur_id', 'vendeur__username', 'produit_id',
+                'produit__nom', 'produit__couverture_miniature', 'dernier_message_id', 'dernier_message__expediteur_id',
+                'dernier_message__contenu', 'dernier_message__timestamp', 'dernier_message_le',
+                'non_lus_acheteur', 'non_lus_vendeur')
+
+    def charger(self, lignes):
+        request = self.context['request']
+        self.utilisateur_id = request.user.pk
+        self.dates = Dates()
+        self.urls_miniatures = UrlsFichiers(Produit._meta.get_field('couverture_miniature'), request)
+
+    def representer(self, ligne):
+        role = 'acheteur' if ligne['acheteur_id'] == self.utilisateur_id else 'vendeur'
+        interlocuteur = 'vendeur' if role == 'acheteur' else 'acheteur'
+        dernier_message = None
+        if ligne['dernier_message_id'] is not None:
+            dernier_message = {
+                'id': ligne['dernier_message_id'],
+                'expediteur': ligne['dernier_message__expediteur_id'],
+                'contenu': ligne['dernier_message__contenu'],
+                'timestamp': self.dates.iso(ligne['dernier_message__timestamp']),
+            }
+        return {
+            'id': ligne['id'],
+            'role': role,
+            'interlocuteur': {
+                'id': ligne[f'{interlocuteur}_id'],
+                'username': ligne[f'{interlocuteur}__username'],
+            },
+            'produit': {
+                'id': ligne['produit_id'],
+                'nom': ligne['produit__nom'],
+                'couverture_miniature': self.urls_miniatures(ligne['produit__couverture_miniature']),
+            },
+            'dernier_message': dernier_message,
+            'non_lus': ligne[f'non_lus_{role}'],
+            'dernier_message_le': self.dates.iso(ligne['dernier_message_le']),
+        }
+
+
+class MessageValeursSerializer(ValeursSerializer):
+    """
+    Fil d'une conversation : les champs de MessageSerializer, plus ``lu``
+    (le destinataire a lu le message), déduit de la lecture de chaque
+    participant sur context['conversation'].
+    """
+    colonnes = ('id', 'conversation_id', 'expediteur_id', 'contenu', 'timestamp')
+
+    def charger(self, lignes):
+        conversation = self.context['conversation']
+        self.dates = Dates()
+        # Le message de l'un est lu quand la lecture de l'autre l'a dépassé
+        self.lu_par_destinataire = {
+            conversation.acheteur_id: conversation.lu_jusqu_a_vendeur,
+            conversation.vendeur_id: conversation.lu_jusqu_a_acheteur,
+        }
+
+    def representer(self, ligne):
+        return {
+            'id': ligne['id'],
+            'conversation': ligne['conversation_id'],
+            'expediteur': ligne['expediteur_id'],
+            'contenu': ligne['contenu'],
+            'timestamp': self.dates.iso(ligne['timestamp']),
+            'lu': ligne['id'] <= self.lu_par_destinataire.get(ligne['expediteur_id'], 0),
+        }
+
+
 class EvaluationSerializer(serializers.ModelSerializer):
     noteur = UserDetailSerializer()  # Sérialiseur imbriqué pour l'utilisateur qui donne la note
+    # Hors de cette plage, une note ne peut pas entrer dans les agrégats (orders.notes) : 400 plutôt qu'une 500
+    note = serializers.IntegerField(min_value=NOTES[0], max_value=NOTES[-1])
 
     class Meta:
         model = Evaluation
@@ -67,3 +193,24 @@ class HistoriqueCommandeSerializer(serializers.ModelSerializer):
         # Formate le montant sans décimale, avec des espaces comme séparateurs
         montant = round(obj.montant_total)  # Retire les décimales
         return "{:,}".format(montant).replace(",", " ")  # Remplace les virgules par des espaces
+
+
+class HistoriqueCommandeValeursSerializer(ValeursSerializer):
+    """Même sortie que HistoriqueCommandeSerializer (voir le_djassa.valeurs)."""
+    colonnes = ('id', 'produit__nom', 'cree_le', 'statut', 'montant_total')
+
+    def charger(self, lignes):
+        # DATE_FORMAT ne dépend que du jour : une mise en forme par jour distinct
+        self.jours = {}
+
+    def representer(self, ligne):
+        jour = ligne['cree_le'].date()
+        if jour not in self.jours:
+            self.jours[jour] = formats.date_format(ligne['cree_le'], "DATE_FORMAT")
+        return {
+            'id': ligne['id'],
+            'produit_nom': ligne['produit__nom'],
+            'cree_le_formate': self.jours[jour],
+            'statut': ligne['statut'],
+            'montant_total_formate': "{:,}".format(round(ligne['montant_total'])).replace(",", " "),
+        }
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Evaluation
+from .notes import ajouter_note, modifier_note, retirer_note
+
+# Agrégats des notes (orders.notes) tenus à jour à chaque écriture d'une
+# évaluation, y compris depuis l'admin et lors des suppressions en cascade.
+
+
+@receiver(pre_save, sender=Evaluation)
+def evaluation_a_enregistrer(sender, instance, update_fields=None, **kwargs):
+    # Commande et note enregistrées, pour ne reporter que la différence
+    instance._note_enregistree = None
+    if not instance._state.adding and (update_fields is None or {'commande', 'note'} & set(update_fields)):
+        instance._note_enregistree = Evaluation.objects.filter(pk=instance.pk).values_list(
+            'commande_id', 'note',
+        ).first()
+
+
+@receiver(post_save, sender=Evaluation)
+def evaluation_enregistree(sender, instance, created, **kwargs):
+    if created:
+        ajouter_note(instance.commande_id, instance.note)
+        return
+    enregistree = getattr(instance, '_note_enregistree', None)
+    if enregistree is None:
+        return
+    commande_id, note = enregistree
+    if commande_id == instance.commande_id:
+        modifier_note(commande_id, note, instance.note)
+    else:
+        retirer_note(commande_id, note)
+        ajouter_note(instance.commande_id, instance.note)
+
+
+@receiver(post_delete, sender=Evaluation)
+def evaluation_supprimee(sender, instance, **kwargs):
+    retirer_note(instance.commande_id, instance.note)
@@ -1,3 +1,103 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from products.models import Categorie, Produit
+from users.models import Utilisateur
+from .models import Commande, Evaluation
+from .serializers import EvaluationSerializer, HistoriqueCommandeSerializer, HistoriqueCommandeValeursSerializer
+
+
+class HistoriqueCommandeValeursSerializerTests(TestCase):
+    """HistoriqueCommandeValeursSerializer doit rendre exactement le JSON de HistoriqueCommandeSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendeur = Utilisateur.objects.create_user(username='vendeur', email='vendeur@ledjassa.test',
+                                                  password='secret', est_vendeur=True)
+        acheteur = Utilisateur.objects.create_user(username='acheteur', email='acheteur@ledjassa.test',
+                                                   password='secret')
+        produit = Produit.objects.create(
+            nom='Téléphone', description='Bon état', prix=Decimal('1234567.50'), etat='neuf',
+            localisation='Abidjan', qte_stock=5, vendeur=vendeur, categorie=Categorie.objects.create(nom='Divers'),
+        )
+        champs = {'acheteur': acheteur, 'vendeur': vendeur, 'produit': produit,
+                  'methode_paiement': 'espece_sur_place'}
+        # Montants arrondis à l'unité, dont un demi (arrondi au pair, comme round())
+        commandes = [
+            Commande.objects.create(montant_total=Decimal('1234567.50'), statut='en_attente', **champs),
+            Commande.objects.create(montant_total=Decimal('2.50'), statut='livree', **champs),
+            Commande.objects.create(montant_total=Decimal('999.99'), quantite=3, statut='annulee', **champs),
+        ]
+        # Deux commandes le même jour, dont une juste avant minuit UTC
+        dates = [datetime(2024, 3, 1, 23, 30), datetime(2024, 3, 1, 8, 0), datetime(2024, 12, 31, 0, 15)]
+        for commande, date in zip(commandes, dates):
+            Commande.objects.filter(pk=commande.pk).update(cree_le=date.replace(tzinfo=dt_timezone.utc))
+
+    def assertMemeSortie(self):
+        commandes = Commande.objects.order_by('-cree_le', '-id')
+        attendu = HistoriqueCommandeSerializer(commandes.select_related('produit'), many=True).data
+        obtenu = HistoriqueCommandeValeursSerializer(HistoriqueCommandeValeursSerializer.preparer(commandes),
+                                                     many=True).data
+        rendu = JSONRenderer()
+        self.assertEqual(rendu.render(obtenu), rendu.render(attendu))
+
+    def test_meme_sortie(self):
+        self.assertMemeSortie()
+
+    def test_autre_fuseau(self):
+        with timezone.override('Asia/Tokyo'):
+            self.assertMemeSortie()
+
+    def test_valeurs(self):
+        premiere = HistoriqueCommandeValeursSerializer(
+            HistoriqueCommandeValeursSerializer.preparer(Commande.objects.order_by('-cree_le')), many=True,
+        ).data[0]
+        self.assertEqual(premiere['montant_total_formate'], '1 000')
+        self.assertEqual(premiere['produit_nom'], 'Téléphone')
+
+
+class NotesTests(TestCase):
+    """Agrégats des notes (orders.notes) face à une note hors de 1..5."""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendeur = Utilisateur.objects.create_user(username='vendeur', email='vendeur@ledjassa.test',
+                                                  password='secret', est_vendeur=True)
+        cls.acheteur = Utilisateur.objects.create_user(username='acheteur', email='acheteur@ledjassa.test',
+                                                       password='secret')
+        cls.produit = Produit.objects.create(
+            nom='Téléphone', description='Bon état', prix=Decimal('15000'), etat='neuf',
+            localisation='Abidjan', qte_stock=5, vendeur=vendeur, categorie=Categorie.objects.create(nom='Divers'),
+        )
+        cls.commande = Commande.objects.create(acheteur=cls.acheteur, vendeur=vendeur, produit=cls.produit,
+                                               montant_total=Decimal('15000'), statut='livree',
+                                               methode_paiement='espece_sur_place')
+
+    def test_serializer_refuse_hors_plage(self):
+        for note in (0, 6):
+            serializer = EvaluationSerializer(data={'commande': self.commande.pk, 'note': note})
+            self.assertFalse(serializer.is_valid())
+            self.assertIn('note', serializer.errors)
+
+    def test_note_hors_plage_ignoree(self):
+        # Écrite sans validation : les agrégats restent cohérents et rien ne lève
+        evaluation = Evaluation.objects.create(commande=self.commande, noteur=self.acheteur, note=7)
+        self.produit.refresh_from_db()
+        self.assertEqual((self.produit.nombre_notes, self.produit.somme_notes), (0, 0))
+
+        evaluation.note = 4
+        evaluation.save()
+        self.produit.refresh_from_db()
+        self.assertEqual((self.produit.nombre_notes, self.produit.somme_notes, self.produit.notes_4), (1, 4, 1))
 
-# Create your tests here.
+        evaluation.note = 0
+        evaluation.save()
+        self.produit.refresh_from_db()
+        self.assertEqual((self.produit.nombre_notes, self.produit.somme_notes, self.produit.notes_4), (0, 0, 0))
+        evaluation.delete()
+        self.produit.refresh_from_db()
+        self.assertEqual(self.produit.nombre_notes, 0)
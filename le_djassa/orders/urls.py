@@ -4,6 +4,7 @@ from django.urls import path
 from .views import CommandesEnAttenteCountView
 from .views import (CreateCommandeView, CommandesVendeurView, TraiterCommandeView, HistoriqueCommandesView,
                     CommandeDetailClientView)
+from .views import ConversationsView, MessagesConversationView, MarquerConversationLueView
 
 urlpatterns = [
     path('commande/', CreateCommandeView.as_view(), name='create-commande'),
@@ -15,5 +16,11 @@ urlpatterns = [
     # autres routes
 
     path('historique-commandes/', HistoriqueCommandesView.as_view(), name='historique-commandes'),
+
+    # Messagerie acheteur / vendeur
+    path('conversations/', ConversationsView.as_view(), name='conversations'),
+    path('conversations/<int:conversation_id>/messages/', MessagesConversationView.as_view(),
+         name='messages-conversation'),
+    path('conversations/<int:conversation_id>/lu/', MarquerConversationLueView.as_view(), name='conversation-lue'),
     
 ]
@@ -1,17 +1,34 @@
-from rest_framework import status
+from datetime import datetime, time, timedelta
+from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Commande, HistoriqueStatutCommande
-from .serializers import CommandeCreateSerializer, CommandeSerializer, HistoriqueCommandeSerializer
+from .models import Commande, Conversation, HistoriqueStatutCommande
+from .serializers import (CommandeSerializer, HistoriqueCommandeValeursSerializer, LigneCommandeSerializer,
+                          CommandeVendeurSerializer, ConversationValeursSerializer, MarquerLuSerializer,
+                          MessageSerializer, MessageValeursSerializer, NouveauMessageSerializer,
+                          NouvelleConversationSerializer)
+from .pagination import CommandePagination, ConversationPagination, MessagePagination
+from .classement import enregistrer_vente
+from .compteurs import ajouter_commandes, changer_statut, compter_commandes_ouvertes
+from .messagerie import autre_role, envoyer_message, marquer_lu
+from . import idempotence
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from products.models import Produit
+from products.cache import invalider_produits
 from django.utils import timezone
-from django.db import transaction
-from twilio.rest import Client
-from django.core.mail import send_mail
-from django.conf import settings
-from decouple import config
+from django.utils.dateparse import parse_date
+from django.db import models, transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Now
+from le_djassa.conditionnel import reponse_conditionnelle
 from rest_framework import serializers
+from notifications.outbox import notifier_email, notifier_sms, preparer_email, preparer_sms, mettre_en_file
+from notifications.diffusion import diffuser
+
+
+class StockInsuffisant(Exception):
+    pass
 
 
 class CreateCommandeView(APIView):
@@ -22,102 +39,194 @@ class CreateCommandeView(APIView):
         return "\n".join([f"{key.capitalize()}: {value}" for key, value in commande_data.items()])
 
     def send_email(self, vendeur_email, commande_data):
-        """Envoi d'une notification par email."""
-        try:
-            subject = 'Nouvelle commande reçue'
-            message = f"Bonjour, vous avez une nouvelle commande. Détails :\n\n{self.format_commande_data(commande_data)}"
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [vendeur_email])
-        except Exception as e:
-            print(f"Erreur lors de l'envoi de l'email : {e}")
+        """Prépare une notification par email (envoyée par envoyer_notifications)."""
+        subject = 'Nouvelle commande reçue'
+        message = f"Bonjour, vous avez une nouvelle commande. Détails :\n\n{self.format_commande_data(commande_data)}"
+        return preparer_email(vendeur_email, subject, message)
 
     def send_sms(self, vendeur_phone, commande_data):
-        """Envoi d'une notification par SMS."""
-        try:
-            client = Client(config('TWILIO_ACCOUNT_SID'), config('TWILIO_AUTH_TOKEN'))
-            client.messages.create(
-                body=f"Vous avez une nouvelle commande. Détails :\n\n{self.format_commande_data(commande_data)}",
-                from_=config('TWILIO_SMS_FROM'),
-                to=vendeur_phone
-            )
-        except Exception as e:
-            print(f"Erreur lors de l'envoi du SMS : {e}")
+        """Prépare une notification par SMS (envoyée par envoyer_notifications)."""
+        return preparer_sms(
+            vendeur_phone,
+            f"Vous avez une nouvelle commande. Détails :\n\n{self.format_commande_data(commande_data)}"
+        )
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
-        utilisateur = request.user
-        data = request.data
-        commandes_crees = []
-
-        for item in data:
-            produit_id = item['produit']
-            try:
-                # Vérifions si le produit existe et le stock est suffisant
-                produit = Produit.objects.get(id=produit_id)
-                if produit.qte_stock < item['quantity']:
-                    return Response({
-                        'message': f"Stock insuffisant pour le produit {produit.nom}. Disponible : {produit.qte_stock}."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-
-                # Sérialiser les données
-                serializer = CommandeCreateSerializer(data={
-                    'acheteur': utilisateur.id,
-                    'produit': produit_id,
-                    'quantite': item['quantity'],
-                    'montant_total': item['montant_total'],
-                    'statut': 'en_attente',
-                    'methode_paiement': 'espece_sur_place',
-                    'infos_livraison': item['adresse_livraison']
-                })
-
-                if serializer.is_valid():
-                    commande = serializer.save()
-                    commandes_crees.append(CommandeSerializer(commande).data)
-
-                    # Mise à jour du stock
-                    produit.qte_stock -= item['quantity']
-                    produit.save()
+        lignes = LigneCommandeSerializer(data=request.data, many=True)
+        if not lignes.is_valid():
+            return Response({
+                'message': 'Échec de la création de la commande.',
+                'errors': lignes.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-                    # Notifications au vendeur
-                    vendeur = produit.vendeur
-                    commande_data = {
-                        "produit": produit.nom,
-                        "quantite": str(commande.quantite),
-                        "montant_total": f"{commande.montant_total} Fr CFA"
-                    }
-                    self.send_email(vendeur.email, commande_data)
-                    self.send_sms(vendeur.numero_telephone, commande_data)
+        cle = request.headers.get(idempotence.EN_TETE)
+        if cle is not None and not 0 < len(cle) <= idempotence.LONGUEUR_MAX_CLE:
+            return Response({
+                'message': f"L'en-tête {idempotence.EN_TETE} doit contenir entre 1 et "
+                           f"{idempotence.LONGUEUR_MAX_CLE} caractères."
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-                else:
-                    return Response({
-                        'message': 'Échec de la création de la commande.',
-                        'errors': serializer.errors
-                    }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                if cle is None:
+                    return self.creer_commandes(request.user, lignes.validated_data)
+
+                # Un renvoi du même panier rejoue la réponse d'origine sans recréer les commandes
+                enregistrement, reponse = idempotence.reserver_cle(request.user, cle, request.data)
+                if reponse is None:
+                    reponse = self.creer_commandes(request.user, lignes.validated_data)
+                    idempotence.enregistrer_reponse(enregistrement, reponse)
+                return reponse
+        except idempotence.CleReutilisee:
+            return Response({
+                'message': "Cette clé d'idempotence a déjà été utilisée pour une autre commande."
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        except StockInsuffisant as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Produit.DoesNotExist as e:
+            return Response({'message': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    def creer_commandes(self, utilisateur, lignes):
+        """
+        Crée toutes les commandes du panier en un nombre constant de requêtes.
+
+        Les produits sont verrouillés en une seule requête, dans l'ordre des id
+        pour que deux paniers concurrents ne puissent pas s'interbloquer. Le
+        stock est vérifié pour tout le panier avant la moindre écriture, puis
+        décrémenté par un UPDATE conditionnel unique.
+        """
+        quantites = {}
+        for ligne in lignes:
+            quantites[ligne['produit']] = quantites.get(ligne['produit'], 0) + ligne['quantity']
+
+        produits = {
+            produit.id: produit
+            for produit in Produit.objects.select_for_update(of=('self',))
+            .select_related('vendeur')
+            .filter(id__in=quantites)
+            .order_by('id')
+        }
 
-            except Produit.DoesNotExist:
-                return Response({
-                    'message': f"Produit avec ID {produit_id} introuvable."
-                }, status=status.HTTP_404_NOT_FOUND)
+        for produit_id, quantite in quantites.items():
+            produit = produits.get(produit_id)
+            if produit is None:
+                raise Produit.DoesNotExist(f"Produit avec ID {produit_id} introuvable.")
+            if produit.qte_stock < quantite:
+                raise StockInsuffisant(
+                    f"Stock insuffisant pour le produit {produit.nom}. Disponible : {produit.qte_stock}."
+                )
+
+        condition = Q()
+        for produit_id, quantite in quantites.items():
+            condition |= Q(id=produit_id, qte_stock__gte=quantite)
+        mis_a_jour = Produit.objects.filter(condition).update(
+            qte_stock=Case(
+                *[When(id=produit_id, then=F('qte_stock') - quantite) for produit_id, quantite in quantites.items()],
+                output_field=models.PositiveIntegerField(),
+            ),
+            modifie_le=Now(),
+        )
+        if mis_a_jour != len(quantites):
+            # Impossible sous verrou, sauf écriture hors transaction : on annule tout
+            raise StockInsuffisant("Stock insuffisant pour un des produits du panier.")
+        # UPDATE groupé : aucun signal post_save, le cache du catalogue est invalidé ici
+        invalider_produits(quantites)
+
+        commandes = Commande.objects.bulk_create([
+            Commande(
+                acheteur=utilisateur,
+                produit=produits[ligne['produit']],
+                vendeur=produits[ligne['produit']].vendeur,
+                quantite=ligne['quantity'],
+                montant_total=ligne['montant_total'],
+                statut='en_attente',
+                methode_paiement='espece_sur_place',
+                infos_livraison=ligne.get('adresse_livraison'),
+            )
+            for ligne in lignes
+        ])
+        ajouter_commandes(commandes)
+
+        # Notifications au vendeur, enregistrées en une seule insertion
+        notifications = []
+        for commande in commandes:
+            produit = commande.produit
+            produit.qte_stock -= commande.quantite
+            commande_data = {
+                "produit": produit.nom,
+                "quantite": str(commande.quantite),
+                "montant_total": f"{commande.montant_total} Fr CFA"
+            }
+            notifications.append(self.send_email(produit.vendeur.email, commande_data))
+            notifications.append(self.send_sms(produit.vendeur.numero_telephone, commande_data))
+            diffuser([commande.vendeur_id], 'commande_creee', {
+                'id': commande.id,
+                'produit': produit.nom,
+                'quantite': commande.quantite,
+                'montant_total': str(commande.montant_total),
+                'statut': commande.statut,
+                'cree_le': commande.cree_le.isoformat(),
+            })
+        mettre_en_file(notifications)
 
         return Response({
             'message': 'Commandes créées avec succès !',
-            'commandes': commandes_crees
+            'commandes': CommandeSerializer(commandes, many=True).data
         }, status=status.HTTP_201_CREATED)
 
 
-class CommandesVendeurView(APIView):
-    permission_classes = [IsAuthenticated]
+class CommandesVendeurView(generics.ListAPIView):
+    """
+    Flux paginé des commandes reçues par le vendeur connecté.
 
-    def get(self, request):
-        # Récupérons tous les produits dont l'utilisateur connecté est le vendeur
-        produits_vendeur = Produit.objects.filter(vendeur=request.user)
-
-        # Récupérons toutes les commandes pour ces produits
-        commandes = Commande.objects.filter(produit__in=produits_vendeur).order_by('-cree_le')
-
-        # Sérialiser les commandes
-        serializer = CommandeSerializer(commandes, many=True)
+    Filtres : ``statut`` (liste séparée par des virgules), ``produit`` (id),
+    ``date_debut`` et ``date_fin`` (AAAA-MM-JJ, bornes incluses).
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = CommandeVendeurSerializer
+    pagination_class = CommandePagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        commandes = Commande.objects.filter(vendeur=self.request.user)
+
+        statuts = [s for s in params.get('statut', '').split(',') if s]
+        if statuts:
+            inconnus = set(statuts) - set(dict(Commande.STATUT_CHOICES))
+            if inconnus:
+                raise serializers.ValidationError({'statut': f"Statut inconnu : {', '.join(sorted(inconnus))}."})
+            commandes = commandes.filter(statut__in=statuts)
+
+        produit = params.get('produit')
+        if produit:
+            if not produit.isdigit():
+                raise serializers.ValidationError({'produit': "Identifiant de produit invalide."})
+            commandes = commandes.filter(produit_id=produit)
+
+        date_debut = self._lire_date('date_debut')
+        if date_debut:
+            commandes = commandes.filter(cree_le__gte=date_debut)
+        date_fin = self._lire_date('date_fin')
+        if date_fin:
+            commandes = commandes.filter(cree_le__lt=date_fin + timedelta(days=1))
+
+        return commandes.select_related('acheteur', 'produit').only(
+            'id', 'quantite', 'montant_total', 'statut', 'methode_paiement', 'cree_le',
+            'acheteur', 'acheteur__username', 'produit', 'produit__nom', 'produit__prix', 'produit__couverture_miniature',
+        )
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def _lire_date(self, nom):
+        """Début du jour (fuseau courant) pour une date AAAA-MM-JJ, ou None."""
+        valeur = self.request.query_params.get(nom)
+        if not valeur:
+            return None
+        try:
+            jour = parse_date(valeur)
+        except ValueError:
+            jour = None
+        if jour is None:
+            raise serializers.ValidationError({nom: "Date invalide, format attendu : AAAA-MM-JJ."})
+        return timezone.make_aware(datetime.combine(jour, time.min))
 
 
 class TraiterCommandeView(APIView):
@@ -156,31 +265,17 @@ class TraiterCommandeView(APIView):
         )
 
     def _send_notification(self, client_email, client_phone, statut_commande):
-        """Envoie un email et un SMS de notification selon le statut."""
+        """Met en file un email et un SMS de notification selon le statut."""
         subject = f'Statut de votre commande: {statut_commande}'
         message = f"Bonjour, votre commande est maintenant en statut '{statut_commande}'."
-
-        # Envoi de l'email
-        try:
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [client_email])
-        except Exception as e:
-            print(f"Erreur lors de l'envoi de l'email : {e}")
-
-        # Envoi du SMS
-        try:
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-            client.messages.create(
-                body=message,
-                from_=settings.TWILIO_SMS_FROM,
-                to=client_phone
-            )
-        except Exception as e:
-            print(f"Erreur lors de l'envoi du SMS : {e}")
+        notifier_email(client_email, subject, message)
+        notifier_sms(client_phone, message)
 
     @transaction.atomic
     def post(self, request, commande_id):
         try:
-            commande = Commande.objects.get(id=commande_id, produit__vendeur=request.user)
+            # Verrouillée : deux transitions concurrentes ne peuvent pas partir du même statut
+            commande = Commande.objects.select_for_update().get(id=commande_id, vendeur=request.user)
             nouveau_statut = request.data.get('action')
 
             # Vérifi si la transition est valide
@@ -192,6 +287,7 @@ class TraiterCommandeView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             # Mise à jour du statut
+            changer_statut(commande, commande.statut, nouveau_statut)
             commande.statut = nouveau_statut
 
             # Mettre à jour la date correspondante si elle existe
@@ -204,13 +300,24 @@ class TraiterCommandeView(APIView):
             # Création de l'historique
             historique = self._create_status_history(commande, nouveau_statut, request.user)
 
+            if nouveau_statut == 'livree':
+                enregistrer_vente(commande)
+
             if nouveau_statut == 'annulee':
-                produit = commande.produit
-                produit.qte_stock += commande.quantite
-                produit.save()
+                # Incrément atomique, sans réécrire la ligne : un passage de commande concurrent garde
+                # sa décrémentation, et les colonnes dénormalisées (couverture, notes) restent intactes
+                Produit.objects.filter(pk=commande.produit_id).update(
+                    qte_stock=F('qte_stock') + commande.quantite, modifie_le=Now(),
+                )
+                invalider_produits([commande.produit_id])
 
             # Notifications
             self._send_notification(commande.acheteur.email, commande.acheteur.numero_telephone, nouveau_statut)
+            diffuser([commande.acheteur_id, commande.vendeur_id], 'statut_commande', {
+                'id': commande.id,
+                'statut': nouveau_statut,
+                'date_changement': historique.date_changement.isoformat(),
+            })
 
             return Response({
                 'message': f'Commande mise à jour avec succès. Nouveau statut: {nouveau_statut}',
@@ -225,7 +332,7 @@ class TraiterCommandeView(APIView):
 
     def get(self, request, commande_id):
         try:
-            commande = Commande.objects.get(id=commande_id, produit__vendeur=request.user)
+            commande = Commande.objects.get(id=commande_id, vendeur=request.user)
             historique_statuts = HistoriqueStatutCommande.objects.filter(commande=commande).order_by('-date_changement')
 
             # Formater l'historique
@@ -263,12 +370,21 @@ class TraiterCommandeView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+def derniere_modification_commande(vue, request, commande_id):
+    """La commande change avec son statut (et son historique), le produit avec ses images ou son vendeur."""
+    dates = Commande.objects.filter(id=commande_id, acheteur=request.user).values_list(
+        'modifie_le', 'produit__modifie_le'
+    ).first()
+    return max(dates) if dates else None
+
+
 class CommandeDetailClientView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @reponse_conditionnelle(derniere_modification_commande)
     def get(self, request, commande_id):
         try:
-            commande = Commande.objects.get(
+            commande = Commande.objects.select_related('produit__vendeur').get(
                 id=commande_id,
                 acheteur=request.user
             )
@@ -277,10 +393,8 @@ class CommandeDetailClientView(APIView):
                 commande=commande
             ).order_by('-date_changement')
 
-            # Récupérer la première image du produit s'il en a
-            image_url = None
-            if commande.produit.images.first():
-                image_url = commande.produit.images.first().image.url
+            # Image de couverture du produit, recopiée sur le produit (products.couverture)
+            image_url = commande.produit.couverture.url if commande.produit.couverture else None
 
             response_data = {
                 'id': commande.id,
@@ -331,41 +445,19 @@ class HistoriqueCommandesView(APIView):
                             status=status.HTTP_403_FORBIDDEN)
 
         # Si c'est un client, on récupère les commandes
-        historiquecommandes = Commande.objects.filter(acheteur=utilisateur)
-        serializer = HistoriqueCommandeSerializer(historiquecommandes, many=True)
+        historiquecommandes = HistoriqueCommandeValeursSerializer.preparer(Commande.objects.filter(acheteur=utilisateur))
+        serializer = HistoriqueCommandeValeursSerializer(historiquecommandes, many=True)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class HistoriqueCommandeSerializer(serializers.ModelSerializer):
-    produit_nom = serializers.CharField(source='produit.nom', read_only=True)
-    produit_image = serializers.SerializerMethodField()  # Nouveau champ pour l'image du produit
-
-    class Meta:
-        model = Commande
-        fields = ['id', 'produit_nom', 'produit_image', 'quantite', 'montant_total', 'statut', 'methode_paiement',
-                  'cree_le']
-
-    def get_produit_image(self, obj):
-        # Récupère l'URL de la première image du produit, si elle existe
-        first_image = obj.produit.images.first()
-        return first_image.image.url if first_image else None
-
-
 class CommandesEnAttenteCountView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
-            # Récupérer tous les produits du vendeur
-            produits_vendeur = Produit.objects.filter(vendeur=request.user)
-
-            # Compter les commandes en attente pour ces produits
-            count = Commande.objects.filter(
-                produit__in=produits_vendeur,
-                statut__in=['en_attente', 'en_traitement', 'livraison_en_cours']
-                # Utilisation de 'in' pour filtrer plusieurs statuts
-            ).count()
+            # Commandes en attente, en traitement ou en livraison, lues dans les compteurs du vendeur
+            count = compter_commandes_ouvertes(request.user.pk)
 
             return Response({
                 'count': count
@@ -375,3 +467,114 @@ class CommandesEnAttenteCountView(APIView):
             return Response({
                 'message': f'Erreur lors de la récupération des commandes en attente: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ConversationParticipantMixin:
+    """Conversation de l'URL, si l'utilisateur connecté en est l'un des deux participants."""
+
+    def get_conversation(self, verrou=False):
+        conversations = Conversation.objects.filter(Q(acheteur=self.request.user) | Q(vendeur=self.request.user))
+        if verrou:
+            conversations = conversations.select_for_update()
+        try:
+            return conversations.get(pk=self.kwargs['conversation_id'])
+        except Conversation.DoesNotExist:
+            raise NotFound('Conversation introuvable.')
+
+
+class ConversationsView(generics.ListAPIView):
+    """
+    Boîte de réception de l'utilisateur connecté, la conversation la plus
+    récemment active en premier, en une requête par page quel que soit le
+    nombre de conversations. Filtre : ``role`` (acheteur ou vendeur).
+
+    POST ouvre (ou retrouve) la conversation de l'acheteur sur un produit,
+    avec un premier message facultatif.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ConversationValeursSerializer
+    pagination_class = ConversationPagination
+
+    def get_queryset(self):
+        role = self.request.query_params.get('role')
+        if role in ('acheteur', 'vendeur'):
+            conversations = Conversation.objects.filter(**{role: self.request.user})
+        elif role:
+            raise serializers.ValidationError({'role': "Rôle inconnu : acheteur ou vendeur."})
+        else:
+            conversations = Conversation.objects.filter(Q(acheteur=self.request.user) | Q(vendeur=self.request.user))
+        return ConversationValeursSerializer.preparer(conversations)
+
+    def post(self, request):
+        donnees = NouvelleConversationSerializer(data=request.data)
+        donnees.is_valid(raise_exception=True)
+        try:
+            produit = Produit.objects.only('id', 'vendeur_id').get(pk=donnees.validated_data['produit'])
+        except Produit.DoesNotExist:
+            return Response({'message': 'Produit introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+        if produit.vendeur_id == request.user.pk:
+            return Response({'message': "Impossible d'ouvrir une conversation sur son propre produit."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            conversation, creee = Conversation.objects.get_or_create(
+                acheteur=request.user, produit=produit, defaults={'vendeur_id': produit.vendeur_id},
+            )
+            contenu = donnees.validated_data.get('contenu')
+            if contenu:
+                envoyer_message(conversation, request.user, contenu)
+
+        ligne = ConversationValeursSerializer.preparer(Conversation.objects.filter(pk=conversation.pk)).get()
+        return Response(ConversationValeursSerializer(ligne, context={'request': request}).data,
+                        status=status.HTTP_201_CREATED if creee else status.HTTP_200_OK)
+
+
+class MessagesConversationView(ConversationParticipantMixin, generics.ListAPIView):
+    """
+    Fil d'une conversation, le plus récent en premier, paginé par curseur sur
+    (timestamp, id). POST envoie un message à l'autre participant.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MessageValeursSerializer
+    pagination_class = MessagePagination
+
+    def get_queryset(self):
+        self.conversation = self.get_conversation()
+        return MessageValeursSerializer.preparer(self.conversation.messages.all())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['conversation'] = self.conversation
+        return context
+
+    def post(self, request, conversation_id):
+        donnees = NouveauMessageSerializer(data=request.data)
+        donnees.is_valid(raise_exception=True)
+        conversation = self.get_conversation()
+        with transaction.atomic():
+            message = envoyer_message(conversation, request.user, donnees.validated_data['contenu'])
+        return Response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
+
+
+class MarquerConversationLueView(ConversationParticipantMixin, APIView):
+    """
+    Marque la conversation comme lue jusqu'au message ``jusqu_a`` inclus
+    (par défaut, jusqu'au dernier) ; renvoie le nombre de messages restant non lus.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, conversation_id):
+        donnees = MarquerLuSerializer(data=request.data)
+        donnees.is_valid(raise_exception=True)
+        with transaction.atomic():
+            conversation = self.get_conversation(verrou=True)
+            role = conversation.role(request.user)
+            deja_lu = getattr(conversation, f'lu_jusqu_a_{role}')
+            lu, non_lus = marquer_lu(conversation, role, donnees.validated_data.get('jusqu_a'))
+            if lu > deja_lu:
+                # Accusé de lecture pour l'autre participant
+                diffuser([getattr(conversation, f'{autre_role(role)}_id')], 'conversation_lue', {
+                    'conversation': conversation.pk,
+                    'lu_jusqu_a': lu,
+                })
+        return Response({'lu_jusqu_a': lu, 'non_lus': non_lus}, status=status.HTTP_200_OK)
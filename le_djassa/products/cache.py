@@ -0,0 +1,130 @@
+"""
+Cache des réponses publiques du catalogue, invalidé par étiquettes.
+
+Une réponse est mise en cache avec la liste des étiquettes des objets
+qu'elle contient (``produit:12``, ``categories``...) et la version de chacune.
+Invalider une étiquette supprime sa version : toute réponse qui la porte
+devient périmée, sans avoir à retrouver les clés concernées. Le tout repose
+sur le cache Django ``default`` (mémoire locale, ou Redis avec REDIS_URL).
+
+Les signaux de products.signals invalident les étiquettes à chaque écriture ;
+les mises à jour groupées (QuerySet.update) doivent appeler invalider_produits.
+
+Une réponse à mettre en cache est calculée sur la base principale : lue sur
+un réplica en retard juste après une invalidation, elle serait conservée
+CACHE_CATALOGUE_DUREE secondes sous la nouvelle version des étiquettes.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from le_djassa.instrumentation import registre
+from le_djassa.routage import sur_primaire
+
+PREFIXE = 'catalogue'
+
+
+def _cle_etiquette(etiquette):
+    return f'{PREFIXE}:etiquette:{etiquette}'
+
+
+def cle_reponse(request):
+    """Clé d'une réponse : hôte (les URL d'images sont absolues), chemin, paramètres triés, format."""
+    parametres = '&'.join(f'{cle}={valeur}' for cle, valeurs in sorted(request.GET.lists()) for valeur in valeurs)
+    brut = '|'.join([request.scheme, request.get_host(), request.path, parametres,
+                     request.META.get('HTTP_ACCEPT', '')])
+    return f'{PREFIXE}:reponse:{hashlib.sha256(brut.encode()).hexdigest()}'
+
+
+def _compter(resultat):
+    registre.incrementer('le_djassa_cache_catalogue_total', 'Lectures du cache du catalogue.', resultat=resultat)
+
+
+def lire(cle):
+    """Données en cache pour cette clé, ou None si absentes ou périmées."""
+    entree = cache.get(cle)
+    if entree is not None:
+        versions = cache.get_many([_cle_etiquette(etiquette) for etiquette in entree['versions']])
+        if all(versions.get(_cle_etiquette(etiquette)) == version
+               for etiquette, version in entree['versions'].items()):
+            _compter('hit')
+            return entree['donnees']
+    _compter('miss')
+    return None
+
+
+def ecrire(cle, donnees, etiquettes):
+    """
+    Met des données en cache avec la version courante de leurs étiquettes.
+
+    Une étiquette sans version (jamais vue ou tout juste invalidée) en reçoit
+    une, mais la réponse n'est pas conservée cette fois : elle a pu être
+    calculée avant l'invalidation. La suivante le sera.
+    """
+    cles = {etiquette: _cle_etiquette(etiquette) for etiquette in set(etiquettes)}
+    versions = cache.get_many(cles.values())
+    manquantes = [cle_etiquette for cle_etiquette in cles.values() if cle_etiquette not in versions]
+    if manquantes:
+        cache.set_many({cle_etiquette: uuid.uuid4().hex for cle_etiquette in manquantes}, timeout=None)
+        return
+    cache.set(cle, {
+        'donnees': donnees,
+        'versions': {etiquette: versions[cle_etiquette] for etiquette, cle_etiquette in cles.items()},
+    }, settings.CACHE_CATALOGUE_DUREE)
+
+
+def invalider(*etiquettes):
+    """Périme les réponses portant ces étiquettes, une fois la transaction en cours validée."""
+    cles = [_cle_etiquette(etiquette) for etiquette in etiquettes]
+    transaction.on_commit(lambda: cache.delete_many(cles))
+
+
+def invalider_produits(produit_ids):
+    invalider(*[f'produit:{produit_id}' for produit_id in produit_ids])
+
+
+def servir(request, calculer, etiquettes):
+    """
+    Réponse GET depuis le cache, ou calculée par `calculer()` sur la base
+    principale puis mise en cache.
+
+    `etiquettes` reçoit les données de la réponse et retourne ses étiquettes.
+    """
+    cle = cle_reponse(request)
+    donnees = lire(cle)
+    if donnees is not None:
+        return Response(donnees, headers={'X-Cache': 'HIT'})
+    with sur_primaire():
+        response = calculer()
+    if response.status_code == 200:
+        ecrire(cle, response.data, etiquettes(response.data))
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+class ReponseEnCacheMixin:
+    """Met en cache les GET d'une vue DRF publique ; définir get_etiquettes_cache(donnees)."""
+
+    def get(self, request, *args, **kwargs):
+        return servir(request, lambda: super(ReponseEnCacheMixin, self).get(request, *args, **kwargs),
+                      self.get_etiquettes_cache)
+
+    def get_etiquettes_cache(self, donnees):
+        raise NotImplementedError
+
+
+def en_cache(etiquettes):
+    """Équivalent de ReponseEnCacheMixin pour une vue @api_view (à placer sous le décorateur)."""
+    def decorateur(vue):
+        @wraps(vue)
+        def enveloppe(request, *args, **kwargs):
+            if request.method != 'GET':
+                return vue(request, *args, **kwargs)
+            return servir(request, lambda: vue(request, *args, **kwargs), etiquettes)
+        return enveloppe
+    return decorateur
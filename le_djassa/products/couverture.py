@@ -0,0 +1,41 @@
+"""
+Image de couverture dénormalisée sur Produit.
+
+La couverture d'un produit est sa première image (ordre des identifiants,
+comme ``images.first()``) ; sa miniature est la variante ``thumbnail`` WebP
+de cette image, vide tant que le traitement n'est pas passé. Les deux noms de
+fichier sont recopiés sur Produit pour que listes, historiques et commandes
+affichent l'image sans requête sur ImageProduit.
+
+Recalculées par products.signals à chaque écriture d'une ImageProduit (le
+traitement enregistre l'image après avoir créé ses variantes) ; les
+insertions groupées doivent appeler actualiser_couvertures().
+"""
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+
+from .models import ImageProduit, VarianteImage
+
+MINIATURE = {'nom': 'thumbnail', 'format': 'webp'}
+
+
+def _premiere_image(produit):
+    return ImageProduit.objects.filter(produit=produit).order_by('pk')
+
+
+def actualiser_couvertures(produits, modification=True):
+    """
+    Recalcule couverture et miniature des produits du queryset, en une seule
+    requête UPDATE. `modification` avance aussi leur modifie_le (inutile pour
+    un chargement initial).
+    """
+    miniature = VarianteImage.objects.filter(
+        image=Subquery(_premiere_image(OuterRef(OuterRef('pk'))).values('pk')[:1]), **MINIATURE,
+    ).values('fichier')[:1]
+    champs = {
+        'couverture': Coalesce(Subquery(_premiere_image(OuterRef('pk')).values('image')[:1]), Value('')),
+        'couverture_miniature': Coalesce(Subquery(miniature), Value('')),
+    }
+    if modification:
+        champs['modifie_le'] = Now()
+    return produits.update(**champs)
@@ -0,0 +1,94 @@
+from collections import defaultdict
+
+from django.db.models import BooleanField, Case, CharField, Count, Q, Value, When
+
+from .models import Produit
+from .search import condition_recherche, condition_prix
+
+# Tranches de prix (Fr CFA) : (clé, libellé, minimum inclus, maximum exclu)
+TRANCHES_PRIX = [
+    ('moins_10000', 'Moins de 10 000 Fr', None, 10000),
+    ('10000_50000', '10 000 - 50 000 Fr', 10000, 50000),
+    ('50000_100000', '50 000 - 100 000 Fr', 50000, 100000),
+    ('100000_500000', '100 000 - 500 000 Fr', 100000, 500000),
+    ('plus_500000', 'Plus de 500 000 Fr', 500000, None),
+]
+
+
+def _tranche_prix():
+    cas = []
+    for cle, _, minimum, maximum in TRANCHES_PRIX:
+        condition = Q()
+        if minimum is not None:
+            condition &= Q(prix__gte=minimum)
+        if maximum is not None:
+            condition &= Q(prix__lt=maximum)
+        cas.append(When(condition, then=Value(cle)))
+    return Case(*cas, output_field=CharField())
+
+
+def calculer_facettes(query, filtres):
+    """
+    Compte les produits par catégorie, état et tranche de prix en une seule requête.
+
+    La requête SQL groupe les produits correspondant à la recherche (et à la
+    localisation) par (catégorie, état, tranche, prix dans l'intervalle demandé).
+    Ce résultat tient en quelques dizaines de lignes ; les facettes en sont
+    déduites en Python. Chaque facette ignore son propre filtre et applique les
+    autres, pour que l'utilisateur voie ce que donnerait un autre choix.
+    """
+    correspondance, _ = condition_recherche(query)
+    produits = Produit.objects.filter(correspondance)
+    if filtres['localisation']:
+        produits = produits.filter(localisation__iexact=filtres['localisation'])
+
+    intervalle = condition_prix(filtres)
+    if intervalle:
+        dans_prix = Case(When(intervalle, then=Value(True)), default=Value(False), output_field=BooleanField())
+    else:
+        dans_prix = Value(True, output_field=BooleanField())
+
+    lignes = produits.annotate(
+        tranche=_tranche_prix(),
+        dans_prix=dans_prix,
+    ).values(
+        'categorie_id', 'categorie__nom', 'etat', 'tranche', 'dans_prix'
+    ).annotate(nombre=Count('id')).order_by()
+
+    categories_choisies = set(filtres['category_ids'])
+    etats_choisis = set(filtres['etats'])
+    categories, noms_categories = defaultdict(int), {}
+    etats, tranches = defaultdict(int), defaultdict(int)
+    total = 0
+
+    for ligne in lignes:
+        nombre = ligne['nombre']
+        bonne_categorie = not categories_choisies or ligne['categorie_id'] in categories_choisies
+        bon_etat = not etats_choisis or ligne['etat'] in etats_choisis
+        bon_prix = bool(ligne['dans_prix'])
+
+        noms_categories[ligne['categorie_id']] = ligne['categorie__nom']
+        if bon_etat and bon_prix:
+            categories[ligne['categorie_id']] += nombre
+        if bonne_categorie and bon_prix:
+            etats[ligne['etat']] += nombre
+        if bonne_categorie and bon_etat:
+            tranches[ligne['tranche']] += nombre
+        if bonne_categorie and bon_etat and bon_prix:
+            total += nombre
+
+    return {
+        'total': total,
+        'categories': [
+            {'id': categorie_id, 'nom': nom, 'count': categories[categorie_id]}
+            for categorie_id, nom in sorted(noms_categories.items(), key=lambda item: item[1])
+        ],
+        'etats': [
+            {'value': cle, 'label': libelle, 'count': etats[cle]}
+            for cle, libelle in Produit.ETATS
+        ],
+        'prix': [
+            {'value': cle, 'label': libelle, 'count': tranches[cle]}
+            for cle, libelle, _, _ in TRANCHES_PRIX
+        ],
+    }
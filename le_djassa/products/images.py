@@ -0,0 +1,199 @@
+import os
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import ImageProduit, VarianteImage
+
+# Plus grand côté, en pixels, de chaque variante
+TAILLES_VARIANTES = {
+    'thumbnail': 200,
+    'card': 600,
+    'full': 1600,
+}
+
+# Paramètres d'encodage par format ; aucune métadonnée n'est recopiée
+ENCODAGES = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+# Réencodage de l'original déposé, dans son format, sans ses métadonnées (EXIF, position GPS...).
+# Les autres formats sont enregistrés en JPEG.
+ORIGINAUX = {
+    'JPEG': ({'format': 'JPEG', 'quality': 90, 'optimize': True}, 'jpg'),
+    'MPO': ({'format': 'JPEG', 'quality': 90, 'optimize': True}, 'jpg'),
+    'PNG': ({'format': 'PNG', 'optimize': True}, 'png'),
+    'WEBP': ({'format': 'WEBP', 'quality': 90, 'method': 4}, 'webp'),
+}
+
+# Une image réservée depuis plus longtemps (worker interrompu) est de nouveau à traiter
+DELAI_RESERVATION = timedelta(minutes=10)
+
+
+class ImageIllisible(Exception):
+    pass
+
+
+def _ouvrir(image_produit):
+    """Image décodée et redressée, avec son format d'origine."""
+    try:
+        with image_produit.image.open('rb') as fichier:
+            image = Image.open(fichier)
+            format_ = image.format
+            # Applique l'orientation EXIF avant de perdre les métadonnées
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageIllisible(str(e))
+    # Seule la transparence est conservée ; Pillow réécrirait sinon commentaires et profils
+    image.info = {cle: valeur for cle, valeur in image.info.items() if cle == 'transparency'}
+    return image, format_
+
+
+def _aplatir(image):
+    """Convertit en RVB ; la transparence est posée sur un fond blanc."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        fond = Image.new('RGB', image.size, (255, 255, 255))
+        fond.paste(image, mask=image.split()[-1])
+        return fond
+    return image.convert('RGB')
+
+
+def _encoder(image, encodage, nom):
+    tampon = BytesIO()
+    image.save(tampon, **encodage)
+    return ContentFile(tampon.getvalue(), name=nom)
+
+
+def _supprimer(fichiers):
+    for stockage, nom in fichiers:
+        stockage.delete(nom)
+
+
+def _original_sans_metadonnees(image, format_, source, base):
+    if format_ in ORIGINAUX:
+        encodage, extension = ORIGINAUX[format_]
+        return _encoder(image, encodage, f'{base}.{extension}')
+    return _encoder(source, ENCODAGES['jpeg'], f'{base}.jpg')
+
+
+def _reservee(image_produit):
+    """Filtre de la ligne tant qu'elle reste réservée par ce worker."""
+    return ImageProduit.objects.filter(
+        pk=image_produit.pk,
+        statut_traitement='en_cours',
+        traitement_reserve_le=image_produit.traitement_reserve_le,
+    )
+
+
+def generer_variantes(image_produit):
+    """
+    Produit les variantes redimensionnées d'une image réservée, remplace
+    l'original par une copie sans métadonnées et enregistre ses dimensions.
+
+    Décodage et encodages ont lieu hors transaction ; seul l'enregistrement
+    final en ouvre une, après avoir vérifié que la réservation tient
+    toujours. Les fichiers écrits sont supprimés si cet enregistrement
+    n'aboutit pas, ceux qu'il remplace une fois la transaction validée.
+    Renvoie les variantes, ou None si la réservation a été perdue.
+    """
+    image, format_ = _ouvrir(image_produit)
+    source = _aplatir(image)
+    base = os.path.splitext(os.path.basename(image_produit.image.name))[0]
+
+    champ_image = image_produit.image.field
+    ecrits = []
+    try:
+        variantes = []
+        for nom, cote in TAILLES_VARIANTES.items():
+            copie = source.copy()
+            copie.thumbnail((cote, cote), Image.LANCZOS)
+            for format_variante, encodage in ENCODAGES.items():
+                contenu = _encoder(copie, encodage, f'{base}_{nom}.{EXTENSIONS[format_variante]}')
+                variante = VarianteImage(
+                    image=image_produit,
+                    nom=nom,
+                    format=format_variante,
+                    largeur=copie.width,
+                    hauteur=copie.height,
+                    taille=contenu.size,
+                )
+                variante.fichier.save(contenu.name, contenu, save=False)
+                ecrits.append((variante.fichier.storage, variante.fichier.name))
+                variantes.append(variante)
+
+        original = _original_sans_metadonnees(image, format_, source, base)
+        nom_original = champ_image.storage.save(
+            champ_image.generate_filename(image_produit, original.name), original,
+        )
+        ecrits.append((champ_image.storage, nom_original))
+
+        with transaction.atomic():
+            if not _reservee(image_produit).select_for_update().exists():
+                # Image supprimée, ou reprise par un autre worker après DELAI_RESERVATION
+                _supprimer(ecrits)
+                return None
+            remplaces = [(champ_image.storage, image_produit.image.name)]
+            remplaces += [(variante.fichier.storage, variante.fichier.name)
+                          for variante in image_produit.variantes.all()]
+            image_produit.variantes.all().delete()
+            VarianteImage.objects.bulk_create(variantes)
+
+            image_produit.image.name = nom_original
+            image_produit.largeur, image_produit.hauteur = source.size
+            image_produit.taille = original.size
+            image_produit.statut_traitement = 'traitee'
+            image_produit.save(update_fields=['image', 'largeur', 'hauteur', 'taille', 'statut_traitement'])
+            transaction.on_commit(lambda: _supprimer(remplaces))
+    except BaseException:
+        _supprimer(ecrits)
+        raise
+    return variantes
+
+
+def reserver_lot(taille_lot=20):
+    """
+    Réserve jusqu'à `taille_lot` images à traiter, en une courte transaction.
+
+    Les lignes sont verrouillées avec SKIP LOCKED le temps de passer
+    « en cours » : plusieurs workers peuvent vider la file en parallèle sans
+    traiter deux fois la même image. Les réservations de plus de
+    DELAI_RESERVATION sont reprises.
+    """
+    maintenant = timezone.now()
+    a_traiter = Q(statut_traitement='en_attente') | Q(
+        statut_traitement='en_cours', traitement_reserve_le__lt=maintenant - DELAI_RESERVATION,
+    )
+    with transaction.atomic():
+        lot = list(
+            ImageProduit.objects.select_for_update(skip_locked=True)
+            .filter(a_traiter)
+            .order_by('id')[:taille_lot]
+        )
+        ImageProduit.objects.filter(pk__in=[image_produit.pk for image_produit in lot]).update(
+            statut_traitement='en_cours', traitement_reserve_le=maintenant,
+        )
+    for image_produit in lot:
+        image_produit.statut_traitement = 'en_cours'
+        image_produit.traitement_reserve_le = maintenant
+    return lot
+
+
+def traiter_lot(taille_lot=20):
+    """Réserve puis traite un lot d'images à traiter ; retourne le nombre d'images réservées."""
+    lot = reserver_lot(taille_lot)
+    for image_produit in lot:
+        try:
+            generer_variantes(image_produit)
+        except ImageIllisible:
+            _reservee(image_produit).update(statut_traitement='echec')
+    return len(lot)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.images import traiter_lot
+
+
+class Command(BaseCommand):
+    help = "Génère les variantes redimensionnées des images de produits en attente."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=20, help="Nombre d'images réservées à la fois.")
+        parser.add_argument('--boucle', action='store_true', help="Continue à surveiller la file d'attente.")
+        parser.add_argument('--pause', type=float, default=2.0, help="Attente (s) quand la file est vide.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            traitees = traiter_lot(options['lot'])
+            total += traitees
+            if traitees:
+                continue
+            if not options['boucle']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"{total} image(s) traitée(s)."))
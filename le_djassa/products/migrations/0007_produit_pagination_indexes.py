@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_produit_est_actif'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['-cree_le', '-id'], name='produit_cree_le_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['vendeur', '-cree_le', '-id'], name='produit_vendeur_cree_le_idx'),
+        ),
+    ]
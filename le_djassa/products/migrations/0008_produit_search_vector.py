@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Le vecteur de recherche est maintenu par un trigger plutôt que par le code
+# applicatif, pour rester exact quelle que soit la voie d'écriture. Les index
+# GIN et le trigger n'existent que sur PostgreSQL ; SQLite garde une colonne
+# inutilisée et products.search se replie sur icontains.
+SQL_CREATION = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION products_produit_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('french', coalesce(NEW.nom, '')), 'A') ||
+            setweight(to_tsvector('french', coalesce(NEW.description, '')), 'B') ||
+            setweight(to_tsvector('french', coalesce(NEW.localisation, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER products_produit_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF nom, description, localisation, search_vector
+    ON products_produit
+    FOR EACH ROW EXECUTE FUNCTION products_produit_search_vector_update()
+    """,
+    # Remplit les lignes existantes en passant par le trigger
+    "UPDATE products_produit SET search_vector = NULL",
+    "CREATE INDEX IF NOT EXISTS produit_search_vector_idx ON products_produit USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS produit_nom_trgm_idx ON products_produit USING gin (nom gin_trgm_ops)",
+]
+
+SQL_SUPPRESSION = [
+    "DROP INDEX IF EXISTS produit_nom_trgm_idx",
+    "DROP INDEX IF EXISTS produit_search_vector_idx",
+    "DROP TRIGGER IF EXISTS products_produit_search_vector_trigger ON products_produit",
+    "DROP FUNCTION IF EXISTS products_produit_search_vector_update()",
+]
+
+
+def executer_sql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_produit_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produit',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(executer_sql(SQL_CREATION), executer_sql(SQL_SUPPRESSION)),
+    ]
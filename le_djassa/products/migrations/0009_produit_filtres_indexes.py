@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_produit_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['categorie', 'etat', 'prix'], name='produit_categorie_etat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['etat', 'prix'], name='produit_etat_prix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['prix'], name='produit_prix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(django.db.models.functions.text.Upper('localisation'), name='produit_localisation_idx'),
+        ),
+    ]
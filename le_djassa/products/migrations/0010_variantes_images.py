@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_produit_filtres_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VarianteImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(choices=[('thumbnail', 'Miniature'), ('card', 'Carte'), ('full', 'Plein écran')], max_length=20)),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10)),
+                ('fichier', models.ImageField(upload_to='images_produit/variantes')),
+                ('largeur', models.PositiveIntegerField()),
+                ('hauteur', models.PositiveIntegerField()),
+                ('taille', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='imageproduit',
+            name='hauteur',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imageproduit',
+            name='largeur',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imageproduit',
+            name='statut_traitement',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('traitee', 'Traitée'), ('echec', 'Échec')], default='en_attente', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='imageproduit',
+            name='taille',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='imageproduit',
+            index=models.Index(condition=models.Q(('statut_traitement', 'en_attente')), fields=['id'], name='image_en_attente_idx'),
+        ),
+        migrations.AddField(
+            model_name='varianteimage',
+            name='image',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variantes', to='products.imageproduit'),
+        ),
+        migrations.AddConstraint(
+            model_name='varianteimage',
+            constraint=models.UniqueConstraint(fields=('image', 'nom', 'format'), name='variante_image_unique'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def remplir_modifie_le(apps, schema_editor):
+    Produit = apps.get_model('products', 'Produit')
+    Produit.objects.update(modifie_le=F('cree_le'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_variantes_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produit',
+            name='modifie_le',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(remplir_modifie_le, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:43
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def remplir_couvertures(apps, schema_editor):
+    Produit = apps.get_model('products', 'Produit')
+    ImageProduit = apps.get_model('products', 'ImageProduit')
+    VarianteImage = apps.get_model('products', 'VarianteImage')
+
+    def premiere_image(produit):
+        return ImageProduit.objects.filter(produit=produit).order_by('pk')
+
+    miniature = VarianteImage.objects.filter(
+        image=Subquery(premiere_image(OuterRef(OuterRef('pk'))).values('pk')[:1]), nom='thumbnail', format='webp',
+    ).values('fichier')[:1]
+    Produit.objects.update(
+        couverture=Coalesce(Subquery(premiere_image(OuterRef('pk')).values('image')[:1]), Value('')),
+        couverture_miniature=Coalesce(Subquery(miniature), Value('')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_produit_modifie_le'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produit',
+            name='couverture',
+            field=models.ImageField(blank=True, editable=False, upload_to='images_produit'),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='couverture_miniature',
+            field=models.ImageField(blank=True, editable=False, upload_to='images_produit/variantes'),
+        ),
+        migrations.RunPython(remplir_couvertures, migrations.RunPython.noop),
+    ]
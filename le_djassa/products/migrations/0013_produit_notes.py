@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_produit_couverture'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produit',
+            name='nombre_notes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='notes_1',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='notes_2',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='notes_3',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='notes_4',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='notes_5',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produit',
+            name='somme_notes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
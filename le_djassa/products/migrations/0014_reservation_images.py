@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_produit_notes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='imageproduit',
+            name='image_en_attente_idx',
+        ),
+        migrations.AddField(
+            model_name='imageproduit',
+            name='traitement_reserve_le',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='imageproduit',
+            name='statut_traitement',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('traitee', 'Traitée'), ('echec', 'Échec')], default='en_attente', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='imageproduit',
+            index=models.Index(condition=models.Q(('statut_traitement__in', ['en_attente', 'en_cours'])), fields=['id'], name='image_a_traiter_idx'),
+        ),
+    ]
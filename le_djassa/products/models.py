@@ -1,4 +1,6 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from users.models import Utilisateur
 
 
@@ -27,9 +29,37 @@ class Produit(models.Model):
     localisation = models.CharField(max_length=255)
     est_vendu = models.BooleanField(default=False)
     qte_stock = models.PositiveIntegerField(default=0)
+    est_actif = models.BooleanField(default=True)
     vendeur = models.ForeignKey(Utilisateur, on_delete=models.CASCADE, related_name='produits_vendus')
     categorie = models.ForeignKey(Categorie, on_delete=models.CASCADE, related_name='produits')
     cree_le = models.DateTimeField(auto_now_add=True)
+    # Validateur des GET conditionnels ; à mettre à jour explicitement dans les QuerySet.update()
+    modifie_le = models.DateTimeField(auto_now=True)
+    # Première image et sa miniature, tenues à jour à chaque écriture d'image (products.couverture)
+    couverture = models.ImageField(upload_to='images_produit', blank=True, editable=False)
+    couverture_miniature = models.ImageField(upload_to='images_produit/variantes', blank=True, editable=False)
+    # Agrégats des évaluations des commandes du produit, tenus à jour par orders.notes
+    nombre_notes = models.IntegerField(default=0, editable=False)
+    somme_notes = models.IntegerField(default=0, editable=False)
+    notes_1 = models.IntegerField(default=0, editable=False)
+    notes_2 = models.IntegerField(default=0, editable=False)
+    notes_3 = models.IntegerField(default=0, editable=False)
+    notes_4 = models.IntegerField(default=0, editable=False)
+    notes_5 = models.IntegerField(default=0, editable=False)
+    # Maintenu par un trigger PostgreSQL (migration 0008), voir products.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Pagination par curseur sur (cree_le, id), globale et par vendeur
+            models.Index(fields=['-cree_le', '-id'], name='produit_cree_le_id_idx'),
+            models.Index(fields=['vendeur', '-cree_le', '-id'], name='produit_vendeur_cree_le_idx'),
+            # Filtres de recherche et facettes (products.search, products.facets)
+            models.Index(fields=['categorie', 'etat', 'prix'], name='produit_categorie_etat_idx'),
+            models.Index(fields=['etat', 'prix'], name='produit_etat_prix_idx'),
+            models.Index(fields=['prix'], name='produit_prix_idx'),
+            models.Index(Upper('localisation'), name='produit_localisation_idx'),
+        ]
 
     def __str__(self):
         return self.nom
@@ -37,8 +67,58 @@ class Produit(models.Model):
 
 # Modèle d'image de produit
 class ImageProduit(models.Model):
+    STATUTS_TRAITEMENT = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('traitee', 'Traitée'),
+        ('echec', 'Échec'),
+    ]
+
     produit = models.ForeignKey(Produit, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='images_produit')
+    # Renseignés par le traitement en arrière-plan (products.images)
+    statut_traitement = models.CharField(max_length=20, choices=STATUTS_TRAITEMENT, default='en_attente')
+    traitement_reserve_le = models.DateTimeField(null=True, blank=True)
+    largeur = models.PositiveIntegerField(null=True, blank=True)
+    hauteur = models.PositiveIntegerField(null=True, blank=True)
+    taille = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # File d'attente du traitement : seules les images en attente ou réservées sont indexées
+            models.Index(fields=['id'], name='image_a_traiter_idx',
+                         condition=models.Q(statut_traitement__in=['en_attente', 'en_cours'])),
+        ]
+
+    def __str__(self):
+        return self.produit.nom + ' - ' + str(self.id)
+
+
+# Version redimensionnée d'une image de produit, sans métadonnées EXIF
+class VarianteImage(models.Model):
+    VARIANTES = [
+        ('thumbnail', 'Miniature'),
+        ('card', 'Carte'),
+        ('full', 'Plein écran'),
+    ]
+
+    FORMATS = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    image = models.ForeignKey(ImageProduit, on_delete=models.CASCADE, related_name='variantes')
+    nom = models.CharField(max_length=20, choices=VARIANTES)
+    format = models.CharField(max_length=10, choices=FORMATS)
+    fichier = models.ImageField(upload_to='images_produit/variantes')
+    largeur = models.PositiveIntegerField()
+    hauteur = models.PositiveIntegerField()
+    taille = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['image', 'nom', 'format'], name='variante_image_unique'),
+        ]
 
     def __str__(self):
-        return self.produit.nom + ' - ' + str(self.id)
\ No newline at end of file
+        return f'{self.image} - {self.nom} ({self.format})'
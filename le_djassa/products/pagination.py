@@ -0,0 +1,116 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) sur un couple de colonnes.
+
+    Contrairement à OFFSET, chaque page est obtenue par un simple
+    « WHERE a <= x AND (a < x OR (a = x AND b < y)) ORDER BY a, b LIMIT n »,
+    équivalent à « (a, b) < (x, y) » : la première condition sert de borne à
+    l'index sur (a, b), et la page 1000 coûte le même prix que la première.
+    """
+    # Les deux champs de tri ; le second doit être unique (généralement l'id)
+    ordering = ('-cree_le', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Curseur invalide.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        position = self.decode_cursor(request, queryset.model)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [self._value(last, field) for field in self.ordering]
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(values))
+
+    def get_first_link(self):
+        return remove_query_param(self.base_url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        })
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _value(self, obj, field):
+        # Instance de modèle, ou dictionnaire d'un queryset .values()
+        value = obj[field.lstrip('-')] if isinstance(obj, dict) else getattr(obj, field.lstrip('-'))
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def _after(self, position):
+        """
+        Condition « strictement après la position » selon le sens du tri.
+
+        La borne large sur le premier champ est redondante avec le OU qui
+        suit, mais c'est elle que le planificateur utilise comme borne du
+        parcours d'index : sans elle, il lit l'index depuis la tête.
+        """
+        (first, second), (first_value, second_value) = self.ordering, position
+        lookup_first = 'lt' if first.startswith('-') else 'gt'
+        lookup_second = 'lt' if second.startswith('-') else 'gt'
+        first, second = first.lstrip('-'), second.lstrip('-')
+        return Q(**{f'{first}__{lookup_first}e': first_value}) & (
+            Q(**{f'{first}__{lookup_first}': first_value})
+            | Q(**{first: first_value, f'{second}__{lookup_second}': second_value})
+        )
+
+
+class ProduitPagination(KeysetPagination):
+    ordering = ('-cree_le', '-id')
+    page_size = settings.PRODUITS_PAGE_SIZE
+    max_page_size = settings.PRODUITS_MAX_PAGE_SIZE
@@ -0,0 +1,117 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import Produit
+
+# Configuration de recherche plein texte PostgreSQL (racinisation française)
+CONFIG_RECHERCHE = 'french'
+
+
+def recherche_plein_texte_disponible():
+    """La recherche classée n'existe que sur PostgreSQL ; SQLite utilise le repli."""
+    return connection.vendor == 'postgresql'
+
+
+def lire_filtres(params):
+    """Extrait des paramètres GET les filtres combinables avec la recherche."""
+    def liste(nom):
+        return [valeur for valeur in params.get(nom, '').split(',') if valeur]
+
+    def montant(nom):
+        try:
+            valeur = Decimal(params[nom])
+        except (KeyError, InvalidOperation):
+            return None
+        return valeur if valeur.is_finite() else None
+
+    etats = dict(Produit.ETATS)
+    return {
+        'category_ids': [int(c) for c in liste('category_id') if c.isdigit()],
+        'etats': [e for e in liste('etat') if e in etats],
+        'prix_min': montant('prix_min'),
+        'prix_max': montant('prix_max'),
+        'localisation': params.get('localisation', '').strip(),
+    }
+
+
+def condition_recherche(query):
+    """
+    Condition de correspondance textuelle et requête plein texte associée.
+
+    Sur PostgreSQL, un produit correspond si son ``search_vector`` satisfait la
+    requête (syntaxe « websearch », racinisation française) ou si son nom est
+    proche par trigrammes (fautes de frappe) ; les deux sont servis par des
+    index GIN. Ailleurs, repli sur ``icontains``.
+    """
+    query = query.strip()
+    if not query:
+        return Q(), None
+    if not recherche_plein_texte_disponible():
+        return Q(nom__icontains=query) | Q(description__icontains=query) | Q(localisation__icontains=query), None
+    search_query = SearchQuery(query, config=CONFIG_RECHERCHE, search_type='websearch')
+    return Q(search_vector=search_query) | Q(nom__trigram_similar=query), search_query
+
+
+def condition_prix(filtres):
+    condition = Q()
+    if filtres['prix_min'] is not None:
+        condition &= Q(prix__gte=filtres['prix_min'])
+    if filtres['prix_max'] is not None:
+        condition &= Q(prix__lte=filtres['prix_max'])
+    return condition
+
+
+def condition_filtres(filtres):
+    """Tous les filtres combinés ; chaque combinaison est couverte par un index de Produit."""
+    condition = condition_prix(filtres)
+    if filtres['category_ids']:
+        condition &= Q(categorie_id__in=filtres['category_ids'])
+    if filtres['etats']:
+        condition &= Q(etat__in=filtres['etats'])
+    if filtres['localisation']:
+        condition &= Q(localisation__iexact=filtres['localisation'])
+    return condition
+
+
+def rechercher_produits(query, filtres=None):
+    """
+    Retourne le queryset des produits correspondant à ``query`` et aux filtres.
+
+    Trié par pertinence sur PostgreSQL, par date de création sinon ou lorsque
+    la requête est vide.
+    """
+    correspondance, search_query = condition_recherche(query)
+    produits = Produit.objects.select_related('categorie').filter(correspondance)
+    if filtres:
+        produits = produits.filter(condition_filtres(filtres))
+
+    if search_query is None:
+        return produits.order_by('-cree_le', '-id')
+
+    return produits.annotate(
+        rang=SearchRank(F('search_vector'), search_query),
+        similarite=TrigramSimilarity('nom', query.strip()),
+    ).order_by('-rang', '-similarite', '-id')
+
+
+def page_de_recherche(queryset, page, page_size=None):
+    """
+    Découpe un résultat classé en pages bornées.
+
+    La pertinence n'offre pas de clé stable pour un curseur : on pagine par
+    décalage mais la profondeur est plafonnée à ``RECHERCHE_MAX_PAGES``, ce qui
+    borne le coût de la requête quelle que soit la taille du catalogue.
+    Retourne ``(produits, page, page_suivante)``.
+    """
+    page_size = page_size or settings.RECHERCHE_PAGE_SIZE
+    page = max(1, min(page, settings.RECHERCHE_MAX_PAGES))
+    debut = (page - 1) * page_size
+    produits = list(queryset[debut:debut + page_size + 1])
+    page_suivante = None
+    if len(produits) > page_size and page < settings.RECHERCHE_MAX_PAGES:
+        page_suivante = page + 1
+    return produits[:page_size], page, page_suivante
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from .models import Produit, Categorie, ImageProduit
 from users.models import Utilisateur
 from users.serializers import UserDetailSerializer
+from le_djassa.valeurs import Dates, UrlsFichiers, ValeursSerializer, texte_decimal
+from orders.notes import CHAMPS_NOTES, resumer_notes
 
 
 class CategorieSerializer(serializers.ModelSerializer):
@@ -11,9 +13,22 @@ class CategorieSerializer(serializers.ModelSerializer):
 
 
 class ImageProduitSerializer(serializers.ModelSerializer):
+    variantes = serializers.SerializerMethodField()
+
     class Meta:
         model = ImageProduit
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'largeur', 'hauteur', 'variantes')
+
+    def get_variantes(self, obj):
+        # {'card': {'webp': url, 'jpeg': url}, ...}, vide tant que l'image n'est pas traitée
+        request = self.context.get('request')
+        variantes = {}
+        for variante in obj.variantes.all():
+            url = variante.fichier.url
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variantes.setdefault(variante.nom, {})[variante.format] = url
+        return variantes
 
 
 class ProduitSerializer(serializers.ModelSerializer):
@@ -21,12 +36,12 @@ class ProduitSerializer(serializers.ModelSerializer):
         queryset=Utilisateur.objects.all(),
         required=False
     )
-    images = ImageProduitSerializer(many=True, read_only=True)
     uploaded_images = serializers.ListField(
         child=serializers.ImageField(),
         write_only=True,
         required=False
     )
+    notes = serializers.SerializerMethodField()
     cree_le = serializers.DateTimeField(
         format="%d/%m/%Y",
         read_only=True
@@ -37,10 +52,14 @@ class ProduitSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'nom', 'description', 'prix', 'etat',
             'localisation', 'est_vendu', 'vendeur',
-            'categorie', 'uploaded_images', 'images',
-            'qte_stock', 'cree_le'
+            'categorie', 'uploaded_images',
+            'couverture', 'couverture_miniature',
+            'qte_stock', 'notes', 'cree_le'
         )
 
+    def get_notes(self, obj):
+        return resumer_notes(*(getattr(obj, champ) for champ in CHAMPS_NOTES))
+
     def validate_uploaded_images(self, value):
         if len(value) > 6:
             raise serializers.ValidationError(
@@ -79,10 +98,42 @@ class ProduitSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ProduitValeursSerializer(ValeursSerializer):
+    """Même sortie que ProduitSerializer, pour les listes de produits (voir le_djassa.valeurs)."""
+    colonnes = ('id', 'nom', 'description', 'prix', 'etat', 'localisation', 'est_vendu', 'vendeur', 'categorie',
+                'couverture', 'couverture_miniature', 'qte_stock', 'cree_le') + CHAMPS_NOTES
+
+    def charger(self, lignes):
+        request = self.context.get('request')
+        self.dates = Dates()
+        # Les cartes n'affichent que la couverture, dénormalisée sur le produit : aucune requête sur les images
+        self.urls_couverture = UrlsFichiers(Produit._meta.get_field('couverture'), request)
+
+    def representer(self, ligne):
+        return {
+            'id': ligne['id'],
+            'nom': ligne['nom'],
+            'description': ligne['description'],
+            'prix': texte_decimal(ligne['prix']),
+            'etat': ligne['etat'],
+            'localisation': ligne['localisation'],
+            'est_vendu': ligne['est_vendu'],
+            'vendeur': ligne['vendeur'],
+            'categorie': ligne['categorie'],
+            'couverture': self.urls_couverture(ligne['couverture']),
+            'couverture_miniature': self.urls_couverture(ligne['couverture_miniature']),
+            'qte_stock': ligne['qte_stock'],
+            'notes': resumer_notes(*(ligne[champ] for champ in CHAMPS_NOTES)),
+            'cree_le': self.dates.format(ligne['cree_le'], '%d/%m/%Y'),
+        }
+
+
 class ProduitDetailSerializer(serializers.ModelSerializer):
     vendeur = UserDetailSerializer(read_only=True)
     categorie = CategorieSerializer(read_only=True)
     images = ImageProduitSerializer(many=True, read_only=True)
+    notes = serializers.SerializerMethodField()
+    notes_vendeur = serializers.SerializerMethodField()
     cree_le = serializers.DateTimeField(
         format="%d/%m/%Y",
         read_only=True
@@ -93,5 +144,14 @@ class ProduitDetailSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'nom', 'description', 'prix', 'etat',
             'localisation', 'est_vendu', 'qte_stock',
-            'vendeur', 'categorie', 'images', 'cree_le'
+            'vendeur', 'categorie', 'images', 'notes',
+            'notes_vendeur', 'cree_le'
         )
+
+    def get_notes(self, obj):
+        return resumer_notes(*(getattr(obj, champ) for champ in CHAMPS_NOTES))
+
+    def get_notes_vendeur(self, obj):
+        # Chargées avec le produit (select_related('vendeur__notes_vendeur')) ; absentes avant la première note
+        notes = getattr(obj.vendeur, 'notes_vendeur', None)
+        return resumer_notes(*(getattr(notes, champ, 0) for champ in CHAMPS_NOTES))
@@ -0,0 +1,50 @@
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Utilisateur
+
+from .cache import invalider
+from .couverture import actualiser_couvertures
+from .models import Categorie, ImageProduit, Produit
+
+# Invalidation du cache du catalogue (products.cache) à chaque écriture. Les données
+# imbriquées dans le détail d'un produit (images, catégorie, vendeur) avancent aussi
+# son modifie_le, validateur des GET conditionnels.
+
+
+@receiver(post_save, sender=Produit)
+def produit_enregistre(sender, instance, created, **kwargs):
+    if created:
+        # Un nouveau produit n'apparaît qu'en tête de liste (tri par date décroissante)
+        invalider('produits:tete', f'produit:{instance.pk}')
+    else:
+        invalider(f'produit:{instance.pk}')
+
+
+@receiver(post_delete, sender=Produit)
+def produit_supprime(sender, instance, **kwargs):
+    invalider(f'produit:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=ImageProduit)
+def image_modifiee(sender, instance, **kwargs):
+    # Avance aussi modifie_le
+    actualiser_couvertures(Produit.objects.filter(pk=instance.produit_id))
+    invalider(f'produit:{instance.produit_id}')
+
+
+@receiver([post_save, post_delete], sender=Categorie)
+def categorie_modifiee(sender, instance, **kwargs):
+    Produit.objects.filter(categorie_id=instance.pk).update(modifie_le=Now())
+    invalider('categories', f'categorie:{instance.pk}')
+
+
+@receiver(post_save, sender=Utilisateur)
+def vendeur_modifie(sender, instance, update_fields=None, **kwargs):
+    # Le détail d'un produit inclut son vendeur ; la date de connexion n'y figure pas
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    if instance.est_vendeur:
+        Produit.objects.filter(vendeur_id=instance.pk).update(modifie_le=Now())
+    invalider(f'vendeur:{instance.pk}')
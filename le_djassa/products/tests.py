@@ -1,3 +1,63 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from users.models import Utilisateur
+from .models import Categorie, Produit
+from .serializers import ProduitSerializer, ProduitValeursSerializer
+
+
+class ProduitValeursSerializerTests(TestCase):
+    """ProduitValeursSerializer doit rendre exactement le JSON de ProduitSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendeur = Utilisateur.objects.create_user(username='vendeur', email='vendeur@ledjassa.test',
+                                                  password='secret', est_vendeur=True)
+        categorie = Categorie.objects.create(nom='Téléphones')
+        champs = {'description': 'Bon état', 'etat': 'neuf', 'localisation': 'Abidjan',
+                  'vendeur': vendeur, 'categorie': categorie}
+        # Sans image : couverture et miniature vides
+        Produit.objects.create(nom='Sans image', prix=Decimal('15000'), qte_stock=2, **champs)
+        avec_image = Produit.objects.create(nom='Avec image', prix=Decimal('1234.5'), qte_stock=0,
+                                            est_vendu=True, **champs)
+        # Colonnes dénormalisées posées directement : aucun fichier n'est lu
+        Produit.objects.filter(pk=avec_image.pk).update(
+            couverture='images_produit/photo été.jpg',
+            couverture_miniature='images_produit/variantes/photo_thumbnail.webp',
+            nombre_notes=3, somme_notes=13, notes_4=1, notes_5=2,
+            # Juste avant minuit UTC : le jour affiché dépend du fuseau
+            cree_le=datetime(2024, 3, 1, 23, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def assertMemeSortie(self, context):
+        produits = Produit.objects.order_by('-cree_le', '-id')
+        attendu = ProduitSerializer(produits, many=True, context=context).data
+        obtenu = ProduitValeursSerializer(ProduitValeursSerializer.preparer(produits), many=True,
+                                          context=context).data
+        rendu = JSONRenderer()
+        self.assertEqual(rendu.render(obtenu), rendu.render(attendu))
+
+    def test_sans_requete(self):
+        self.assertMemeSortie({})
+
+    def test_urls_absolues(self):
+        self.assertMemeSortie({'request': APIRequestFactory().get('/api/produit/')})
+
+    def test_autre_fuseau(self):
+        with timezone.override('Asia/Tokyo'):
+            self.assertMemeSortie({})
 
-# Create your tests here.
+    def test_valeurs(self):
+        produits = Produit.objects.order_by('nom')
+        avec_image, sans_image = ProduitValeursSerializer(ProduitValeursSerializer.preparer(produits),
+                                                          many=True).data
+        self.assertEqual(avec_image['prix'], '1234.50')
+        self.assertEqual(avec_image['cree_le'], '01/03/2024')
+        self.assertEqual(avec_image['notes']['moyenne'], 4.33)
+        self.assertIsNone(sans_image['couverture'])
+        self.assertIsNone(sans_image['notes']['moyenne'])
@@ -1,17 +1,20 @@
 from rest_framework import generics, permissions
 from .models import Produit, Categorie
 from users.models import Utilisateur
-from .serializers import ProduitSerializer, CategorieSerializer, ProduitDetailSerializer
+from .serializers import ProduitSerializer, CategorieSerializer, ProduitDetailSerializer, ProduitValeursSerializer
+from .pagination import ProduitPagination
+from .search import rechercher_produits, page_de_recherche, lire_filtres
+from .facets import calculer_facettes
+from .cache import ReponseEnCacheMixin, en_cache
+from le_djassa.conditionnel import reponse_conditionnelle
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.views import View
 from django.http import JsonResponse
-from django.db.models import Count, Sum, Window, Q, F
-from django.db.models.functions import Rank
-from django.db import models
 from rest_framework.views import APIView
 from users.permissions import IsBuyer, IsSeller
+from orders.models import ClassementVendeur
 
 
 class ProduitCreate(generics.CreateAPIView):
@@ -24,25 +27,72 @@ class ProduitCreate(generics.CreateAPIView):
         serializer.save(vendeur=self.request.user)
 
 
-class ProduitList(generics.ListAPIView):
-    queryset = Produit.objects.all()
-    serializer_class = ProduitSerializer
+def produits_pour_detail(queryset):
+    """
+    Charge vendeur (et ses notes), catégorie et images en un nombre constant
+    de requêtes. Réservé au détail : les listes n'affichent que la couverture,
+    recopiée sur le produit.
+    """
+    return queryset.select_related('vendeur__notes_vendeur', 'categorie').prefetch_related('images__variantes')
+
+
+class ProduitList(ReponseEnCacheMixin, generics.ListAPIView):
+    queryset = ProduitValeursSerializer.preparer(Produit.objects.all())
+    serializer_class = ProduitValeursSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ProduitPagination
+
+    def get_etiquettes_cache(self, donnees):
+        etiquettes = [f"produit:{produit['id']}" for produit in donnees['results']]
+        # Seule la première page peut recevoir un nouveau produit ; les suivantes sont fixées par leur curseur
+        if ProduitPagination.cursor_query_param not in self.request.query_params:
+            etiquettes.append('produits:tete')
+        return etiquettes
 
 
 class ProduitListOwner(generics.ListAPIView):
-    serializer_class = ProduitSerializer
+    """Annonces du vendeur connecté, paginées ; ``q`` filtre sur le nom."""
+    serializer_class = ProduitValeursSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ProduitPagination
 
     def get_queryset(self):
-        return Produit.objects.filter(vendeur=self.request.user)
-
-
-class ProduitDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Produit.objects.all()
+        produits = Produit.objects.filter(vendeur=self.request.user)
+        recherche = self.request.query_params.get('q', '').strip()
+        if recherche:
+            produits = produits.filter(nom__icontains=recherche)
+        return ProduitValeursSerializer.preparer(produits)
+
+
+def derniere_modification_produit(vue, request, pk):
+    """
+    Validateur du détail d'un produit : sa propre date de modification, ou
+    celle des notes de son vendeur si elle est plus récente (le détail les
+    affiche). Une requête, par clé primaire.
+    """
+    dates = Produit.objects.filter(pk=pk).values_list('modifie_le', 'vendeur__notes_vendeur__mis_a_jour_le').first()
+    if dates is None:
+        return None
+    return max(date for date in dates if date is not None)
+
+
+class ProduitDetail(ReponseEnCacheMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = produits_pour_detail(Produit.objects.all())
     serializer_class = ProduitDetailSerializer
     permission_classes = [permissions.AllowAny]
 
+    @reponse_conditionnelle(derniere_modification_produit)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_object(self):
+        self.produit = super().get_object()
+        return self.produit
+
+    def get_etiquettes_cache(self, donnees):
+        return [f'produit:{self.produit.pk}', f'categorie:{self.produit.categorie_id}',
+                f'vendeur:{self.produit.vendeur_id}']
+
     def delete(self, request, *args, **kwargs):
         produit = self.get_object()
 
@@ -59,44 +109,57 @@ class ProduitDetail(generics.RetrieveUpdateDestroyAPIView):
 
 
 @api_view(['GET'])
+@en_cache(lambda donnees: [])
 def list_etats(request):
     etats = [{'value': key, 'label': label} for key, label in Produit.ETATS]
     return Response(etats)
 
 
 @api_view(['GET'])
+@en_cache(lambda donnees: ['categories'])
 def list_categorie(request):
     categorie = [{'value': key, 'label': label} for key, label in Categorie.objects.values_list('id', 'nom')]
     return Response(categorie)
 
 
-class CategorieList(generics.ListAPIView):
+class CategorieList(ReponseEnCacheMixin, generics.ListAPIView):
     queryset = Categorie.objects.all()
     serializer_class = CategorieSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_etiquettes_cache(self, donnees):
+        return ['categories']
+
 
 class SearchProductsView(View):
     def get(self, request):
         query = request.GET.get('q', '')
-        categories = request.GET.get('category_id', '')
+        filtres = lire_filtres(request.GET)
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 1
 
-        if categories:
-            category_ids = categories.split(',')
-            products = Produit.objects.filter(nom__icontains=query, categorie_id__in=category_ids)
-        else:
-            # products = Produit.objects.filter(nom__icontains(query))
-            products = Produit.objects.filter(nom__icontains=query)
+        products, page, next_page = page_de_recherche(
+            rechercher_produits(query, filtres).only('id', 'nom', 'prix', 'couverture_miniature', 'categorie__nom'),
+            page
+        )
+
+        results = [{
+            'id': product.id,
+            'nom': product.nom,
+            'prix': product.prix,
+            'categorie': product.categorie.nom,
+            'couverture_miniature': product.couverture_miniature.url if product.couverture_miniature else None,
+        } for product in products]
 
-        results = []
-        for product in products:
-            results.append({
-                'nom': product.nom,
-                'prix': product.prix,
-                'categorie': product.categorie.nom,
-            })
+        response = {'results': results, 'page': page, 'next_page': next_page}
+        # Les facettes ne dépendent pas de la page : calculées une fois, sur la première
+        if page == 1:
+            response['facettes'] = calculer_facettes(query, filtres)
+
+        return JsonResponse(response)
 
-        return JsonResponse(results, safe=False)
 
 def get_rank_suffix(rank):
     if 10 < rank % 100 < 20:  # Pour les nombres entre 11 et 19
@@ -109,47 +172,29 @@ class StatisticsView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsSeller]
 
     def get(self, request):
-        # Obtenir tous les vendeurs avec leurs statistiques
-        vendeurs_stats = Utilisateur.objects.filter(
-            est_vendeur=True
-        ).annotate(
-            total_ventes=Count(
-                'produits_vendus__commandes',
-                filter=Q(produits_vendus__commandes__statut='livree'),
-                distinct=True
-            ),
-            revenu_total=Sum(
-                'produits_vendus__prix',
-                filter=Q(produits_vendus__commandes__statut='livree')
-            )
-        ).filter(total_ventes__gt=0)  # Filtre uniquement les vendeurs ayant des ventes
-
-        # Trier les vendeurs par total_ventes et revenu_total en ordre décroissant
-        vendeurs_stats = sorted(vendeurs_stats, key=lambda x: (-x.total_ventes, -x.revenu_total))
-
-        # Calcul manuel du classement
-        rang_actuel = 1
-        for index, vendeur in enumerate(vendeurs_stats):
-            if index > 0 and (vendeurs_stats[index - 1].total_ventes > vendeur.total_ventes or vendeurs_stats[index - 1].revenu_total > vendeur.revenu_total):
-                rang_actuel = index + 1  # Met à jour le rang pour les non-égaux
-            vendeur.rang = rang_actuel  # Attribue le rang (en ajoutant cet attribut manuellement)
-
-        # Trouve les statistiques du vendeur actuel
-        stats_vendeur = next((v for v in vendeurs_stats if v.id == request.user.id), None)
+        # Statistiques du vendeur actuel, lues dans le classement pré-calculé
+        stats_vendeur = ClassementVendeur.objects.filter(
+            vendeur=request.user,
+            total_ventes__gt=0
+        ).first()
 
         # Statistiques de base pour l'utilisateur actuel
         published_count = Produit.objects.filter(vendeur=request.user).count()
         sold_count = stats_vendeur.total_ventes if stats_vendeur else 0
         total_revenue = stats_vendeur.revenu_total if stats_vendeur else 0
+        # Rang stocké, recalculé périodiquement (orders.classement.recalculer_rangs)
+        rang = stats_vendeur.rang if stats_vendeur else None
 
         # Préparer le message de classement pour les vendeurs avec ventes
         rank_message = ""
-        if stats_vendeur and stats_vendeur.total_ventes > 0:
-            rank_suffix = get_rank_suffix(stats_vendeur.rang)
+        if rang:
+            rank_suffix = get_rank_suffix(rang)
             rank_message = (
-                f"🏆 Vous êtes classé(e) {stats_vendeur.rang}{rank_suffix} "
+                f"🏆 Vous êtes classé(e) {rang}{rank_suffix} "
                 f"meilleur vendeur du site avec {stats_vendeur.total_ventes} ventes !"
             )
+        elif stats_vendeur:
+            rank_message = "Votre classement sera calculé dans quelques minutes."
         else:
             rank_message = "Commencez à vendre pour apparaître dans le classement !"
 
@@ -158,6 +203,6 @@ class StatisticsView(APIView):
             'sold_count': sold_count,
             'total_revenue': total_revenue,
             'rank_message': rank_message,
-            'rank': stats_vendeur.rang if stats_vendeur else None,
+            'rank': rang,
             'total_sales': stats_vendeur.total_ventes if stats_vendeur else 0
         })
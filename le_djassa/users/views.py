@@ -14,6 +14,8 @@ from django.contrib.auth.hashers import check_password
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from notifications.outbox import notifier_email
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -21,11 +23,12 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
 
+    @transaction.atomic
     def perform_create(self, serializer):
         user = serializer.save()
         subject = 'Bienvenue au djassa'
         message = f'Bonjour {user.username},\n\nMerci de vous être inscrit sur notre plateforme!'
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
+        notifier_email(user.email, subject, message)
 
 
 class UserDetailUpdateView(generics.RetrieveUpdateAPIView):